@@ -0,0 +1,52 @@
+"""Benchmark concurrent hit factor queries with AsyncMongo
+
+Queries every classifier of a synthetic collection served in-process
+with a fixed latency per query, one at a time and concurrently.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_async_mongo
+"""
+import asyncio
+import time
+
+import uclass.database.async_mongo
+from benchmarks.fake_mongo import FakeAsyncScores, synthetic_scores
+
+
+class FakeAsyncMongo(uclass.database.async_mongo.AsyncMongo):
+    """AsyncMongo with the scores collection served by FakeAsyncScores"""
+    def __init__(self, scores):
+        super().__init__(connect=False)
+        self._fake_scores = scores
+
+    @property
+    def scores(self):
+        """The scores collection"""
+        return self._fake_scores
+
+
+async def sequential(mongo, pairs):
+    """One query at a time"""
+    return {pair: await mongo.get_hf_array(*pair) for pair in pairs}
+
+
+def main(n_classifiers=200, latency=0.005):
+    scores = synthetic_scores(100000, n_classifiers=n_classifiers)
+    mongo = FakeAsyncMongo(FakeAsyncScores(scores, latency=latency))
+    pairs = [(classifier, "co") for classifier in sorted(set(scores.classifier))]
+    print(f"{len(pairs)} classifiers, {latency*1e3:.0f} ms latency per query")
+
+    runs = {"sequential": lambda: sequential(mongo, pairs)}
+    for max_concurrency in [4, 16, 64]:
+        runs[f"concurrency {max_concurrency}"] = (
+            lambda n=max_concurrency: mongo.get_hf_many(pairs, n))
+    for name, run in runs.items():
+        t0 = time.perf_counter()
+        asyncio.run(run())
+        t = time.perf_counter() - t0
+        print(f"{name:>16}: {t:6.3f} s, {len(pairs)/t:8.1f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
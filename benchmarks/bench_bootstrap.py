@@ -0,0 +1,39 @@
+"""Benchmark bootstrap HHF intervals against sequential Weibull5 fits
+
+Run from the repository root::
+
+    python -m benchmarks.bench_bootstrap
+"""
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.bootstrap
+import uclass.hhf_methods.weibull5
+
+
+def main(n_resamples=1000):
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    print(f"{len(hf)} hit factors, {n_resamples} replicates")
+
+    rng = np.random.default_rng(123)
+    t0 = time.perf_counter()
+    hhf = [
+        uclass.hhf_methods.weibull5.Weibull5(
+            hf[rng.integers(len(hf), size=len(hf))]).get_hhf()
+        for _ in range(n_resamples)]
+    t_loop = time.perf_counter() - t0
+    print(f"sequential fits: {t_loop:7.3f} s, "
+          f"interval {np.round(np.quantile(hhf, [0.025, 0.975]), 4)}")
+
+    for max_workers in [1, 2, 4]:
+        t0 = time.perf_counter()
+        result = uclass.hhf_methods.bootstrap.bootstrap_hhf(
+            hf, n_resamples=n_resamples, max_workers=max_workers)
+        t = time.perf_counter() - t0
+        print(f"  batched, {max_workers} proc: {t:7.3f} s, "
+              f"interval {np.round(result['confidence_interval'], 4)}")
+
+
+if __name__ == "__main__":
+    main()
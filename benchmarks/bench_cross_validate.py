@@ -0,0 +1,52 @@
+"""Benchmark PPRegress leave-one-out cross-validation
+
+Run from the repository root::
+
+    python -m benchmarks.bench_cross_validate
+"""
+import pickle
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.ppregress
+
+
+def main():
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = np.array(pickle.load(f))
+    n = len(hhf_sample)
+    print(f"{n} stages")
+
+    # Legacy: refit every Weibull and run a cold regression per fold.
+    t0 = time.perf_counter()
+    hhf = np.empty(n)
+    for i in range(n):
+        mask = np.arange(n) != i
+        ppregress = uclass.hhf_methods.ppregress.PPRegress(
+            hf_sample[i], [hf_sample[j] for j in np.flatnonzero(mask)],
+            hhf_sample[mask])
+        hhf[i] = ppregress.get_hhf()
+    t_legacy = time.perf_counter() - t0
+    error = np.abs(hhf/hhf_sample - 1)
+    print(f"        legacy loop: {t_legacy:7.3f} s, "
+          f"mean |error| {error.mean():.4f}")
+
+    ppregress = uclass.hhf_methods.ppregress.PPRegress(
+        None, hf_sample, hhf_sample)
+    for method in ["de", "local"]:
+        for max_workers in [1, 4]:
+            ppregress.percentile = ppregress.percentage = None
+            results = ppregress.cross_validate(
+                method=method, max_workers=max_workers)
+            error = np.abs(results["error"])
+            print(f"{method:>5}, {max_workers} processes: "
+                  f"{results['elapsed']:7.3f} s, "
+                  f"mean |error| {error.mean():.4f}, "
+                  f"mean nfev {results['nfev'].mean():.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark Weibull5.fit_weibull methods and batched fitting
+
+Run from the repository root::
+
+    python -m benchmarks.bench_fit_weibull
+"""
+import pickle
+import timeit
+
+import numpy as np
+
+import uclass
+import uclass.statistics.weibull_mle
+
+
+def main(number=20):
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    print(f"{len(hf)} hit factors from tests/data/co_23-01.txt")
+
+    timing = {}
+    for method in ["nelder-mead", "newton"]:
+        weibull5 = uclass.Weibull5(hf)
+        t = timeit.timeit(
+            lambda: weibull5.fit_weibull(method=method), number=number)
+        timing[method] = t / number
+        weibull = weibull5.weibull
+        print(f"{method:>12}: {timing[method]*1e3:8.3f} ms/fit, "
+              f"lam={weibull.lam:.6f}, k={weibull.k:.6f}")
+
+    speedup = timing["nelder-mead"] / timing["newton"]
+    print(f"Speedup: {speedup:.1f}x")
+
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    print(f"{len(hf_sample)} stages from tests/data/co_hf_sample.pkl")
+
+    bench_batch(hf_sample, number)
+
+    rng = np.random.default_rng(123)
+    hf_sample = [
+        8 * rng.weibull(3.6, size=n) for n in rng.integers(20, 200, 5000)]
+    print(f"{len(hf_sample)} synthetic stages of 20 to 200 hit factors")
+    bench_batch(hf_sample, 1)
+
+
+def bench_batch(hf_sample, number):
+    t_loop = timeit.timeit(
+        lambda: [uclass.Weibull5(hf).fit_weibull() for hf in hf_sample],
+        number=number) / number
+    t_batch = timeit.timeit(
+        lambda: uclass.statistics.weibull_mle.fit_weibull_batch(hf_sample),
+        number=number) / number
+    print(f"{'loop':>12}: {t_loop*1e3:8.3f} ms/set")
+    print(f"{'batch':>12}: {t_batch*1e3:8.3f} ms/set")
+    print(f"Speedup: {t_loop/t_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark the generic fitting engine against the legacy Nelder-Mead fit
+
+Run from the repository root::
+
+    python -m benchmarks.bench_fitting
+"""
+import time
+
+import numpy as np
+import scipy.optimize
+
+import uclass.statistics.fitting
+import uclass.statistics.logitnormal
+import uclass.statistics.weibull
+
+
+def legacy_fit(distribution, x, params0):
+    """Nelder-Mead on the mean negative log likelihood of the pdf"""
+    def nll(params, x):
+        return -np.mean(np.log(distribution(*params).pdf(x)))
+    return scipy.optimize.minimize(
+        nll, x0=params0, args=x, method="nelder-mead")
+
+
+def main(number=20):
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    hf = hf[hf > 0]
+    cases = {
+        "Weibull": (
+            uclass.statistics.weibull.Weibull, hf,
+            [np.median(hf)/np.log(2)**(1/3.6), 3.6],
+            [None, "BFGS", "L-BFGS-B", "Nelder-Mead"]),
+        "LogitNormal": (
+            uclass.statistics.logitnormal.LogitNormal, hf/(1.1*hf.max()),
+            [1, 0],
+            [None, "L-BFGS-B", "Nelder-Mead"]),
+    }
+    print(f"{len(hf)} samples")
+    for name, (distribution, x, params0, methods) in cases.items():
+        print(name)
+        runs = {"legacy": lambda: legacy_fit(distribution, x, params0)}
+        for method in methods:
+            runs[str(method)] = (
+                lambda method=method:
+                uclass.statistics.fitting.fit_distribution(
+                    distribution, x, params0, method=method))
+        for run_name, run in runs.items():
+            res = run()
+            t0 = time.perf_counter()
+            for _ in range(number):
+                run()
+            t = (time.perf_counter()-t0) / number
+            nfev = getattr(res, "nfev", 0)
+            print(f"{run_name:>12}: {t*1e3:8.2f} ms, nfev {nfev:4d}, "
+                  f"params {np.round(res.x, 5)}")
+
+
+if __name__ == "__main__":
+    main()
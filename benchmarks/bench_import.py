@@ -0,0 +1,47 @@
+"""Benchmark the startup time of `import uclass`
+
+Each command runs in a fresh interpreter.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_import
+"""
+import subprocess
+import sys
+import time
+
+
+COMMANDS = {
+    "python": "pass",
+    "import uclass": "import uclass",
+    "import uclass; uclass.Weibull5": "import uclass; uclass.Weibull5",
+    "import uclass; uclass.StageData": "import uclass; uclass.StageData",
+    "eager (all subpackages)": (
+        "import uclass; [getattr(uclass, name) for name in uclass.__all__]"),
+}
+
+
+def timeit(code, repeat=5):
+    """Best wall time of a fresh interpreter running code"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(repeat=5):
+    t_python = None
+    for name, code in COMMANDS.items():
+        t = timeit(code, repeat)
+        if t_python is None:
+            t_python = t
+            print(f"{name:>34}: {t*1e3:8.1f} ms")
+        else:
+            print(f"{name:>34}: {t*1e3:8.1f} ms "
+                  f"(+{(t-t_python)*1e3:.1f} ms over python)")
+
+
+if __name__ == "__main__":
+    main()
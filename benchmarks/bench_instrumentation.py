@@ -0,0 +1,43 @@
+"""Benchmark the overhead of the instrumentation hooks
+
+Run from the repository root::
+
+    python -m benchmarks.bench_instrumentation
+"""
+import timeit
+
+import uclass.hhf_methods.weibull5
+import uclass.instrumentation
+from benchmarks.synthetic import synthetic_hf
+
+
+def main(n_calls=1000000, n_fits=1000):
+    count = uclass.instrumentation.count
+    timer = uclass.instrumentation.timer
+
+    def hooks():
+        count("rows_fetched", 10, source="mongo")
+        with timer("query", source="mongo"):
+            pass
+
+    hf = synthetic_hf(1000)
+
+    def fit():
+        uclass.hhf_methods.weibull5.Weibull5(hf).fit_weibull()
+
+    t_hooks = min(timeit.repeat(hooks, number=n_calls, repeat=3)) / n_calls
+    t_fit = min(timeit.repeat(fit, number=n_fits, repeat=3)) / n_fits
+    with uclass.instrumentation.collect():
+        t_hooks_on = min(
+            timeit.repeat(hooks, number=n_calls//10, repeat=3)) / (n_calls//10)
+        t_fit_on = min(timeit.repeat(fit, number=n_fits, repeat=3)) / n_fits
+
+    print(f"counter + timer, disabled: {t_hooks*1e9:8.1f} ns")
+    print(f"counter + timer,  enabled: {t_hooks_on*1e9:8.1f} ns")
+    print(f"Weibull5 fit of 1000 scores, disabled: {t_fit*1e6:8.1f} us")
+    print(f"Weibull5 fit of 1000 scores,  enabled: {t_fit_on*1e6:8.1f} us "
+          f"({t_fit_on/t_fit-1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Micro-benchmark log-space distribution methods
+
+Run from the repository root::
+
+    python -m benchmarks.bench_logpdf
+"""
+import timeit
+
+import numpy as np
+
+import uclass.statistics.logitnormal
+import uclass.statistics.weibull
+
+
+def main(n=100000, number=200):
+    rng = np.random.default_rng(123)
+    print(f"{n} samples")
+
+    weibull = uclass.statistics.weibull.Weibull(lam=8, k=3.6)
+    logitnormal = uclass.statistics.logitnormal.LogitNormal(sigma=0.7, mu=0.3)
+    cases = {
+        "Weibull": (weibull, 8 * rng.weibull(3.6, n)),
+        "LogitNormal": (logitnormal, rng.uniform(0.01, 0.99, n)),
+    }
+    for name, (distribution, x) in cases.items():
+        out = np.empty_like(x)
+        runs = {
+            "log(pdf(x))": lambda: np.log(distribution.pdf(x)),
+            "logpdf(x)": lambda: distribution.logpdf(x),
+            "logpdf(x, out)": lambda: distribution.logpdf(x, out=out),
+            "-mean(log(pdf))": lambda: -np.mean(np.log(distribution.pdf(x))),
+            "nll(x)": lambda: distribution.nll(x),
+        }
+        print(name)
+        for run_name, run in runs.items():
+            t = timeit.timeit(run, number=number) / number
+            print(f"{run_name:>18}: {t*1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Benchmark peak memory of reading hit factors from Mongo
+
+Compares `np.array(Mongo.get_hf(...))` with `Mongo.get_hf_array(...)`
+on a synthetic collection of one classifier served in-process.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_mongo_stream [n_scores]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.fake_mongo import FakeMongo, synthetic_scores
+
+
+def measure(func):
+    """Wall time and peak traced memory of a call"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func()
+    t = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, t, peak
+
+
+def main(n_scores=1000000):
+    mongo = FakeMongo(synthetic_scores(n_scores))
+    print(f"{n_scores} synthetic scores")
+
+    runs = {
+        "list": lambda: np.array(mongo.get_hf("00-00", "co")),
+        "stream": lambda: mongo.get_hf_array("00-00", "co"),
+    }
+    for name, run in runs.items():
+        hf, t, peak = measure(run)
+        print(f"{name:>8}: {t:6.2f} s, peak {peak/2**20:8.1f} MiB, "
+              f"array {hf.nbytes/2**20:6.1f} MiB")
+    mongo.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,48 @@
+"""Benchmark online HHF updates against refitting from scratch
+
+Run from the repository root::
+
+    python -m benchmarks.bench_online_weibull5
+"""
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.online_weibull5
+import uclass.hhf_methods.weibull5
+
+
+def main(n=200000, batch_size=50):
+    rng = np.random.default_rng(123)
+    hf = 6.5 * rng.weibull(3.3, n)
+    n_history = n - 100*batch_size
+    batches = np.split(hf[n_history:], 100)
+    print(f"{n_history} historical scores, 100 batches of {batch_size}")
+
+    t0 = time.perf_counter()
+    online = uclass.hhf_methods.online_weibull5.OnlineWeibull5(
+        hf[:n_history])
+    t_init = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for batch in batches:
+        online.update(batch)
+        online.get_hhf()
+    t_online = (time.perf_counter()-t0) / len(batches)
+
+    t0 = time.perf_counter()
+    n_seen = n_history
+    for batch in batches[:10]:
+        n_seen += len(batch)
+        uclass.hhf_methods.weibull5.Weibull5(hf[:n_seen]).get_hhf()
+    t_full = (time.perf_counter()-t0) / 10
+
+    print(f"initial fit: {t_init*1e3:8.2f} ms")
+    print(f" full refit: {t_full*1e3:8.2f} ms per batch")
+    print(f"     online: {t_online*1e3:8.2f} ms per batch "
+          f"({online.n_reanchor} re-anchors)")
+    print(f"    speedup: {t_full/t_online:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
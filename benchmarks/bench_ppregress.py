@@ -0,0 +1,87 @@
+"""Benchmark PPRegress.regress
+
+Compares the regression against a reimplementation of the former
+per-stage Weibull loop and cost function, with the original Nelder-Mead
+Weibull fits ("original", the end-to-end baseline) and with the Newton
+fits ("loop", isolating the cost vectorization).
+
+Run from the repository root::
+
+    python -m benchmarks.bench_ppregress
+"""
+import pickle
+import time
+
+import numpy as np
+import scipy.optimize
+
+import uclass
+
+
+def regress_loop(hf_sample, hhf_sample, method="newton"):
+    """Former PPRegress.regress, one Weibull object per stage"""
+    list_weibull = [
+        uclass.Weibull5(hf_sample[i]).fit_weibull(method=method)
+        for i in range(len(hhf_sample))]
+
+    def cost(params, list_weibull, hhf_sample):
+        percentile, percentage = params
+        hhf_estimate = []
+        for weibull in list_weibull:
+            hhf = weibull.quantile(percentile) / percentage
+            hhf_estimate.append(hhf)
+        hhf_estimate = np.array(hhf_estimate)
+        hhf_sample = np.array(hhf_sample)
+        error = np.mean(np.abs(np.log(hhf_estimate/hhf_sample))**2)
+        return error
+
+    bounds = [(1e-6, 1-1e-6), (1e-6, 1-1e-6)]
+    res = scipy.optimize.differential_evolution(
+        cost, bounds=bounds, args=(list_weibull, hhf_sample), rng=123)
+    return res.x
+
+
+def main(number=3):
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    print(f"{len(hhf_sample)} stages from tests/data/co_hf_sample.pkl")
+
+    runs = {
+        "original": lambda: regress_loop(
+            hf_sample, hhf_sample, method="nelder-mead"),
+        "loop": lambda: regress_loop(hf_sample, hhf_sample),
+        "array": lambda: uclass.PPRegress(
+            None, hf_sample, hhf_sample).regress(),
+        "vectorized": lambda: uclass.PPRegress(
+            None, hf_sample, hhf_sample, vectorized=True).regress(),
+    }
+    timing = {}
+    for name, run in runs.items():
+        t0 = time.perf_counter()
+        for _ in range(number):
+            percentile, percentage = run()
+        timing[name] = (time.perf_counter()-t0) / number
+        print(f"{name:>12}: {timing[name]*1e3:9.2f} ms/regress, "
+              f"percentile={percentile:.6f}, percentage={percentage:.6f}")
+
+    for name in ["array", "vectorized"]:
+        print(f"Speedup {name}: {timing['original']/timing[name]:.1f}x "
+              f"end-to-end, {timing['loop']/timing[name]:.1f}x "
+              f"over the Newton loop")
+
+    # Nine divisions sharing the same reference set.
+    divisions = ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"]
+    hf_samples = {division: hf_sample for division in divisions}
+    hhf_samples = {division: hhf_sample for division in divisions}
+    for max_workers in [1, None]:
+        t0 = time.perf_counter()
+        uclass.hhf_methods.ppregress.regress_divisions(
+            hf_samples, hhf_samples, max_workers=max_workers)
+        t = time.perf_counter() - t0
+        print(f"9 divisions, max_workers={max_workers}: {t*1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark PPRegress recalibration after adding reference stages
+
+Run from the repository root::
+
+    python -m benchmarks.bench_recalibrate
+"""
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.ppregress
+import uclass.instrumentation
+from benchmarks.synthetic import synthetic_reference
+
+
+def main(n_stages=500, n_new=10):
+    hf_sample, hhf_sample = synthetic_reference(n_stages+n_new, 500*n_stages)
+    print(f"{n_stages} reference stages, {n_new} new")
+    previous = uclass.hhf_methods.ppregress.PPRegress(
+        None, hf_sample[:n_stages], hhf_sample[:n_stages])
+    x0 = previous.regress()
+
+    ppregress = uclass.hhf_methods.ppregress.PPRegress(
+        None, hf_sample, hhf_sample)
+    ppregress.fit_weibull_sample()  # Warm up.
+    with uclass.instrumentation.collect() as report:
+        t0 = time.perf_counter()
+        params = ppregress.regress()
+        t_regress = time.perf_counter() - t0
+    nfev = report.to_dict()["counters"]["regress_nfev"]
+    print(f"      regress: {t_regress*1e3:8.1f} ms, {nfev:5d} evaluations")
+
+    for method in ["de", "local"]:
+        results = ppregress.recalibrate(x0=x0, method=method)
+        error = np.abs(results["params"]/params - 1).max()
+        print(f"{method:>13}: {results['elapsed']*1e3:8.1f} ms, "
+              f"{results['nfev']:5d} evaluations "
+              f"({nfev/results['nfev']:5.1f}x fewer), "
+              f"max rel. difference {error:.1e}")
+
+
+if __name__ == "__main__":
+    main()
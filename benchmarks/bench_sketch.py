@@ -0,0 +1,51 @@
+"""Benchmark quantile sketches against full hit factor arrays
+
+Run from the repository root::
+
+    python -m benchmarks.bench_sketch
+"""
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.weibull5
+import uclass.statistics.sketch
+
+
+def main(n_stages=100, n_scores=100000):
+    rng = np.random.default_rng(123)
+    print(f"{n_stages} stages of {n_scores} scores")
+    stages = [6.5 * rng.weibull(3.3, n_scores) for _ in range(n_stages)]
+
+    t0 = time.perf_counter()
+    sketches = []
+    for hf in stages:
+        sketch = uclass.statistics.sketch.QuantileSketch(rng=rng)
+        for batch in np.array_split(hf, 10):
+            sketch.update(batch)
+        sketches.append(sketch)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hhf_full = [uclass.hhf_methods.weibull5.Weibull5(hf).get_hhf()
+                for hf in stages]
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    hhf_sketch = [
+        uclass.hhf_methods.weibull5.Weibull5.from_sketch(sketch).get_hhf()
+        for sketch in sketches]
+    t_sketch = time.perf_counter() - t0
+
+    bytes_full = sum(hf.nbytes for hf in stages)
+    bytes_sketch = sum(len(sketch.to_bytes()) for sketch in sketches)
+    error = np.abs(np.array(hhf_sketch)/hhf_full - 1)
+    print(f"   build sketches: {t_build:8.3f} s")
+    print(f"  memory (arrays): {bytes_full/2**20:8.2f} MiB")
+    print(f"memory (sketches): {bytes_sketch/2**20:8.2f} MiB (serialized)")
+    print(f"  Weibull5 arrays: {t_full:8.3f} s")
+    print(f"Weibull5 sketches: {t_sketch:8.3f} s")
+    print(f"   HHF rel. error: max {error.max():.4f}, mean {error.mean():.4f}")
+
+
+if __name__ == "__main__":
+    main()
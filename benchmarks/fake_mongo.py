@@ -0,0 +1,185 @@
+"""In-process stand-in of the Mongo scores collection for benchmarks"""
+import asyncio
+
+import numpy as np
+
+import uclass.database.mongo
+
+
+class FakeScores:
+    """Stand-in of the scores collection
+
+    Notes
+    -----
+    Scores are stored as arrays and decoded into fresh documents
+    on iteration, as pymongo does. Only the queries issued by
+    `uclass.database.mongo.Mongo` are supported.
+    """
+    def __init__(self, classifier, division, hf, bad):
+        """Constructor
+
+        Parameters
+        ----------
+        classifier : array
+            Classifier of each score.
+        division : array
+            Division of each score.
+        hf : array
+            Hit factor of each score.
+        bad : array
+            Bad flag of each score.
+        """
+        self.classifier = np.asarray(classifier)
+        self.division = np.asarray(division)
+        self.hf = np.asarray(hf, dtype=float)
+        self.bad = np.asarray(bad, dtype=bool)
+
+    def _mask(self, query):
+        """Scores matched by a query"""
+        mask = np.ones(len(self.hf), dtype=bool)
+        for key, value in query.items():
+            if key == "$or":
+                mask_or = np.zeros(len(self.hf), dtype=bool)
+                for sub_query in value:
+                    mask_or |= self._mask(sub_query)
+                mask &= mask_or
+            elif key == "bad":
+                mask &= ~self.bad
+            elif key == "hf":
+                mask &= self.hf > value["$gt"]
+            else:
+                mask &= getattr(self, key) == value
+        return mask
+
+    def _documents(self, mask, fields):
+        """Decode matched scores into documents"""
+        for i in np.flatnonzero(mask):
+            item = {}
+            for field in fields:
+                item[field] = getattr(self, field)[i].item()
+            yield item
+
+    def find(self, query, projection=None, batch_size=0):
+        """Find scores"""
+        if projection is None:
+            fields = ["classifier", "division", "hf", "bad"]
+        else:
+            fields = [key for key, value in projection.items()
+                      if value and key != "_id"]
+        return self._documents(self._mask(query), fields)
+
+    def aggregate(self, query, **kwargs):
+        """Aggregate scores"""
+        mask = np.ones(len(self.hf), dtype=bool)
+        group = None
+        for stage in query:
+            if "$match" in stage:
+                mask &= self._mask(stage["$match"])
+            elif "$group" in stage:
+                group = stage["$group"]["_id"]
+                count = "n" in stage["$group"]
+        fields = ["classifier", "division", "hf", "bad"]
+        if group is None:
+            return self._documents(mask, fields)
+        return self._groups(mask, group, count)
+
+    def _groups(self, mask, group, count=False):
+        """Group matched hit factors"""
+        if isinstance(group, dict):
+            keys = list(zip(self.classifier[mask], self.division[mask]))
+        else:
+            keys = list(self.classifier[mask])
+        hf = self.hf[mask]
+        groups = {}
+        for key, value in zip(keys, hf.tolist()):
+            groups.setdefault(key, []).append(value)
+        for key, value in groups.items():
+            if isinstance(group, dict):
+                key = {"classifier": key[0], "division": key[1]}
+            if count:
+                yield {"_id": key, "n": len(value)}
+            else:
+                yield {"_id": key, "hf": value}
+
+
+def synthetic_scores(n_scores, n_classifiers=1, divisions=("co",), seed=123):
+    """Synthetic scores
+
+    Parameters
+    ----------
+    n_scores : int
+        Number of scores.
+    n_classifiers : int, optional
+        Number of classifiers, named "00-00", "00-01", ...
+        Defaults 1.
+    divisions : tuple of str, optional
+        Divisions.
+        Defaults ("co",).
+    seed : int, optional
+        Random seed.
+        Defaults 123.
+
+    Returns
+    -------
+    FakeScores
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"{i//100:02d}-{i%100:02d}" for i in range(n_classifiers)])
+    classifier = names[rng.integers(0, n_classifiers, n_scores)]
+    division = np.asarray(divisions)[rng.integers(0, len(divisions), n_scores)]
+    hf = 8 * rng.weibull(3.6, n_scores)
+    hf[rng.random(n_scores) < 0.01] = 0
+    bad = rng.random(n_scores) < 0.01
+    return FakeScores(classifier, division, hf, bad)
+
+
+class FakeMongo(uclass.database.mongo.Mongo):
+    """Mongo with the scores collection served by FakeScores"""
+    def __init__(self, scores):
+        """Constructor
+
+        Parameters
+        ----------
+        scores : FakeScores
+            The scores collection.
+        """
+        super().__init__()
+        self._fake_scores = scores
+
+    @property
+    def scores(self):
+        """The scores collection"""
+        return self._fake_scores
+
+
+class FakeAsyncScores:
+    """Asynchronous stand-in of the scores collection
+
+    Notes
+    -----
+    Wraps `FakeScores`, adding a fixed latency to each query
+    to mimic the round-trip to a server.
+    """
+    def __init__(self, scores, latency=0.005):
+        """Constructor
+
+        Parameters
+        ----------
+        scores : FakeScores
+            The scores.
+        latency : float, optional
+            Latency of each query in seconds.
+            Defaults 0.005.
+        """
+        self.scores = scores
+        self.latency = latency
+
+    def find(self, query, projection=None, batch_size=0):
+        """Find scores"""
+        return self._cursor(query, projection)
+
+    async def _cursor(self, query, projection):
+        """Asynchronous cursor"""
+        await asyncio.sleep(self.latency)
+        for item in self.scores.find(query, projection):
+            yield item
@@ -0,0 +1,361 @@
+"""Benchmark suite of the fitting, regression and data loading hot paths
+
+Each benchmark is timed at several sizes on synthetic data and the
+results, including throughput and peak traced memory, are written as
+JSON so they can be compared across commits and releases.
+
+Run from the repository root::
+
+    python -m benchmarks.suite -o results.json
+    python -m benchmarks.suite --scale large -k fit_weibull
+    python -m benchmarks.suite -o new.json --compare results.json
+
+The "small" scale runs in under a minute. The "large" scale adds
+1M and 10M scores and 5000 stages.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+import scipy
+
+import uclass.database.stage_data
+import uclass.database.snapshot
+import uclass.hhf_methods.bootstrap
+import uclass.hhf_methods.ppregress
+import uclass.hhf_methods.weibull5
+import uclass.hhf_pipeline.hhf_pipeline
+import uclass.hhf_pipeline.hhf_table
+import uclass.logger
+import uclass.statistics.weibull
+import uclass.statistics.weibull_mle
+from benchmarks.fake_mongo import FakeMongo, synthetic_scores
+from benchmarks.synthetic import (
+    synthetic_hf, synthetic_reference, synthetic_stages)
+
+
+BENCHMARKS = {}
+
+
+def benchmark(unit, small, large=()):
+    """Register a benchmark
+
+    Parameters
+    ----------
+    unit : str
+        What the size counts, e.g. "scores" or "stages".
+        Throughput is reported in units per second.
+    small : list of int
+        Sizes of the "small" scale.
+    large : list of int, optional
+        Additional sizes of the "large" scale.
+
+    Returns
+    -------
+    decorator
+        The decorated function takes the size and a temporary directory,
+        does the setup and returns the function to time.
+    """
+    def decorator(func):
+        BENCHMARKS[func.__name__] = {
+            "func": func, "unit": unit,
+            "sizes": {"small": list(small),
+                      "large": list(small) + list(large)}}
+        return func
+    return decorator
+
+
+@benchmark("scores", small=[1000, 100000], large=[1000000, 10000000])
+def weibull5_fit_weibull(size, tmpdir):
+    """Weibull5.fit_weibull of 1k to 10M scores"""
+    hf = synthetic_hf(size)
+    return lambda: uclass.hhf_methods.weibull5.Weibull5(hf).fit_weibull()
+
+
+@benchmark("scores", small=[1000, 100000], large=[1000000, 10000000])
+def weibull_nll(size, tmpdir):
+    """Weibull.nll of 1k to 10M scores"""
+    hf = synthetic_hf(size)
+    weibull = uclass.statistics.weibull.Weibull(8., 3.6)
+    return lambda: weibull.nll(hf)
+
+
+@benchmark("stages", small=[10, 500], large=[5000])
+def fit_weibull_batch(size, tmpdir):
+    """fit_weibull_batch of 10 to 5000 stages of 200 scores on average"""
+    list_hf, _ = synthetic_stages(size, 200*size)
+    return lambda: uclass.statistics.weibull_mle.fit_weibull_batch(list_hf)
+
+
+@benchmark("stages", small=[10, 100], large=[500])
+def ppregress_regress(size, tmpdir):
+    """PPRegress.regress on 10 to 500 reference stages of 500 scores"""
+    hf_sample, hhf_sample = synthetic_reference(size, 500*size)
+    return lambda: uclass.hhf_methods.ppregress.PPRegress(
+        None, hf_sample, hhf_sample).regress()
+
+
+@benchmark("stages", small=[10, 100], large=[500])
+def ppregress_regress_vectorized(size, tmpdir):
+    """PPRegress.regress, vectorized, on 10 to 500 reference stages"""
+    hf_sample, hhf_sample = synthetic_reference(size, 500*size)
+    return lambda: uclass.hhf_methods.ppregress.PPRegress(
+        None, hf_sample, hhf_sample, vectorized=True).regress()
+
+
+@benchmark("replicates", small=[100, 1000], large=[10000])
+def bootstrap_hhf(size, tmpdir):
+    """bootstrap_hhf of 3000 scores with 100 to 10k replicates"""
+    hf = synthetic_hf(3000)
+    return lambda: uclass.hhf_methods.bootstrap.bootstrap_hhf(
+        hf, n_resamples=size)
+
+
+@benchmark("scores", small=[1000, 100000], large=[1000000])
+def stage_data_get_hf_mongo(size, tmpdir):
+    """StageData.get_hf from a fake Mongo of 1k to 1M scores"""
+    mongo = FakeMongo(synthetic_scores(size))
+    return lambda: uclass.database.stage_data.StageData(
+        "00-00", "co", database=mongo).get_hf()
+
+
+@benchmark("scores", small=[1000, 100000], large=[1000000])
+def mongo_get_hf_all(size, tmpdir):
+    """Mongo.get_hf_all of 100 classifiers, 1k to 1M scores"""
+    mongo = FakeMongo(synthetic_scores(size, n_classifiers=100))
+    return lambda: mongo.get_hf_all("co")
+
+
+@benchmark("scores", small=[1000, 100000], large=[1000000, 10000000])
+def stage_data_get_hf_snapshot(size, tmpdir):
+    """StageData.get_hf from a snapshot of 1k to 10M scores"""
+    scores = synthetic_scores(size)
+    path = os.path.join(tmpdir, f"snapshot_{size}")
+    snapshot = uclass.database.snapshot.Snapshot.write(
+        path, scores.classifier, scores.division, scores.hf, scores.bad)
+    return lambda: uclass.database.stage_data.StageData(
+        "00-00", "co", database=snapshot).get_hf()
+
+
+@benchmark("stages", small=[100], large=[5000])
+def hhf_pipeline(size, tmpdir):
+    """HHFPipeline.run of 100 to 5000 stages of 200 scores"""
+    scores = synthetic_scores(200*size, n_classifiers=size)
+    path = os.path.join(tmpdir, f"pipeline_{size}")
+    snapshot = uclass.database.snapshot.Snapshot.write(
+        path, scores.classifier, scores.division, scores.hf, scores.bad)
+    pipeline = uclass.hhf_pipeline.hhf_pipeline.HHFPipeline(
+        snapshot, os.path.join(path, "hhf.csv"), divisions=["co"])
+    return lambda: pipeline.run(resume=False)
+
+
+@benchmark("lookups", small=[1000, 100000])
+def hhf_table_get_hhf(size, tmpdir):
+    """HHFTable.get_hhf, 1k to 100k lookups in a table of 100 stages"""
+    scores = synthetic_scores(200*100, n_classifiers=100)
+    path = os.path.join(tmpdir, f"table_{size}")
+    snapshot = uclass.database.snapshot.Snapshot.write(
+        path, scores.classifier, scores.division, scores.hf, scores.bad)
+    table = uclass.hhf_pipeline.hhf_table.HHFTable(
+        os.path.join(path, "hhf.npz"))
+    table.update(snapshot, divisions=["co"])
+    pairs = list(table.index)
+    pairs = [pairs[i % len(pairs)] for i in range(size)]
+    get_hhf = table.get_hhf
+    return lambda: [get_hhf(classifier, division)
+                    for classifier, division in pairs]
+
+
+@benchmark("stages", small=[100], large=[5000])
+def hhf_table_update_fresh(size, tmpdir):
+    """HHFTable.update of 100 to 5000 stages, all fresh"""
+    scores = synthetic_scores(200*size, n_classifiers=size)
+    path = os.path.join(tmpdir, f"table_fresh_{size}")
+    snapshot = uclass.database.snapshot.Snapshot.write(
+        path, scores.classifier, scores.division, scores.hf, scores.bad)
+    table = uclass.hhf_pipeline.hhf_table.HHFTable(
+        os.path.join(path, "hhf.npz"))
+    table.update(snapshot, divisions=["co"])
+    return lambda: table.update(snapshot, divisions=["co"])
+
+
+def measure(run, repeat=5, min_time=0.2):
+    """Time a function and measure its peak memory
+
+    Parameters
+    ----------
+    run : func
+        The function to time.
+    repeat : int, optional
+        Number of timings.
+        Defaults 5.
+    min_time : float, optional
+        Each timing calls `run` enough times to take at least this long.
+        Defaults 0.2.
+
+    Returns
+    -------
+    result : dict
+        "number": calls per timing,
+        "times": seconds per call of each timing,
+        "peak_memory": peak traced memory of a call in bytes.
+    """
+    run()  # Warm up.
+    timer = timeit.Timer(run)
+    number = 1
+    while True:
+        t = timer.timeit(number)
+        if t >= min_time or number >= 1000000:
+            break
+        number *= max(2, int(min_time / max(t, 1e-9)))
+    times = [t/number] + [
+        timer.timeit(number)/number for _ in range(repeat-1)]
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"number": number, "times": times, "peak_memory": peak-baseline}
+
+
+def metadata():
+    """Environment of the run"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(scale="small", pattern=None, repeat=5):
+    """Run the benchmarks
+
+    Parameters
+    ----------
+    scale : str, optional
+        "small" or "large".
+        Defaults "small".
+    pattern : str, optional
+        Only run benchmarks whose name matches this regular expression.
+        Defaults None, i.e. all benchmarks.
+    repeat : int, optional
+        Number of timings of each benchmark.
+        Defaults 5.
+
+    Returns
+    -------
+    results : dict
+        "metadata" and a list of "results".
+    """
+    # The pipeline logs its throughput on every call.
+    uclass.logger.logger.setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, bench in BENCHMARKS.items():
+            if pattern is not None and not re.search(pattern, name):
+                continue
+            for size in bench["sizes"][scale]:
+                run = bench["func"](size, tmpdir)
+                result = measure(run, repeat=repeat)
+                t = min(result["times"])
+                result.update({
+                    "name": name,
+                    "size": size,
+                    "unit": bench["unit"],
+                    "min": t,
+                    "median": float(np.median(result["times"])),
+                    "throughput": size / t,
+                })
+                results.append(result)
+                print(f"{name:>30} {size:>9}: {t*1e3:10.3f} ms, "
+                      f"{size/t:12.4g} {bench['unit']}/s, "
+                      f"peak {result['peak_memory']/2**20:8.2f} MiB",
+                      flush=True)
+    return {"metadata": metadata(), "results": results}
+
+
+def compare(baseline, results, threshold=0.1):
+    """Compare results with a baseline
+
+    Parameters
+    ----------
+    baseline : dict
+        Output of `run_suite`.
+    results : dict
+        Output of `run_suite`.
+    threshold : float, optional
+        Relative slowdown reported as a regression.
+        Defaults 0.1.
+
+    Returns
+    -------
+    regressions : list of tuple
+        (name, size, ratio) of the regressions,
+        ratio being the new over the baseline time.
+    """
+    times = {(result["name"], result["size"]): result["min"]
+             for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = (result["name"], result["size"])
+        if key not in times:
+            continue
+        ratio = result["min"] / times[key]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append((*key, ratio))
+        print(f"{key[0]:>30} {key[1]:>9}: {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "-s", "--scale", choices=["small", "large"], default="small")
+    parser.add_argument(
+        "-k", "--pattern", help="Only run benchmarks matching this regex")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Write results to JSON")
+    parser.add_argument(
+        "--compare", help="Compare with the results of a previous run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Relative slowdown reported as a regression")
+    options = parser.parse_args(args)
+
+    results = run_suite(options.scale, options.pattern, options.repeat)
+    if options.output is not None:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if options.compare is not None:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Synthetic hit factors for benchmarks"""
+import numpy as np
+
+
+def synthetic_hf(n_scores, lam=8., k=3.6, seed=123):
+    """Synthetic hit factors of a stage
+
+    Parameters
+    ----------
+    n_scores : int
+        Number of scores.
+    lam : float, optional
+        Weibull scale parameter.
+        Defaults 8.
+    k : float, optional
+        Weibull shape parameter.
+        Defaults 3.6.
+    seed : int, optional
+        Random seed.
+        Defaults 123.
+
+    Returns
+    -------
+    hf : array
+        Positive hit factors.
+    """
+    rng = np.random.default_rng(seed)
+    hf = lam * rng.weibull(k, n_scores)
+    hf[hf == 0] = lam * 1e-6
+    return hf
+
+
+def synthetic_stages(n_stages, n_scores, seed=123):
+    """Synthetic hit factors of many stages
+
+    Parameters
+    ----------
+    n_stages : int
+        Number of stages.
+    n_scores : int
+        Total number of scores.
+        Stage sizes are log-normally distributed, at least 10 scores.
+    seed : int, optional
+        Random seed.
+        Defaults 123.
+
+    Returns
+    -------
+    list_hf : list of array
+        Positive hit factors of each stage.
+    params : array
+        Array of shape (n_stages, 2), the true `[lam, k]` of each stage.
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.lognormal(0, 1, n_stages)
+    sizes = np.maximum(10, (n_scores * weights/weights.sum()).astype(int))
+    lam = rng.uniform(4, 12, n_stages)
+    k = rng.uniform(2.5, 5, n_stages)
+    list_hf = [lam_ * rng.weibull(k_, size)
+               for lam_, k_, size in zip(lam, k, sizes)]
+    for hf in list_hf:
+        hf[hf == 0] = 1e-6
+    return list_hf, np.column_stack([lam, k])
+
+
+def synthetic_reference(n_stages, n_scores, seed=123):
+    """Synthetic reference stages of PPRegress
+
+    Parameters
+    ----------
+    n_stages : int
+        Number of stages.
+    n_scores : int
+        Total number of scores.
+    seed : int, optional
+        Random seed.
+        Defaults 123.
+
+    Returns
+    -------
+    hf_sample : list of array
+        Hit factors of each stage.
+    hhf_sample : array
+        High hit factors, the Weibull 5 HHF of the true distribution
+        with 2% noise.
+    """
+    rng = np.random.default_rng(seed)
+    hf_sample, params = synthetic_stages(n_stages, n_scores, seed=seed)
+    lam, k = params.T
+    hhf = lam * (-np.log(0.05))**(1/k) / 0.85
+    hhf_sample = hhf * rng.lognormal(0, 0.02, n_stages)
+    return hf_sample, hhf_sample
@@ -0,0 +1,78 @@
+"""Test uclass.database.async_mongo"""
+import asyncio
+
+import numpy as np
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+if not hasattr(pymongo, "AsyncMongoClient"):
+    pytest.skip("pymongo>=4.9 is required.", allow_module_level=True)
+
+import uclass
+import uclass.database.async_mongo
+
+
+class FakeAsyncScores:
+    """In-process stand-in of the scores collection"""
+    def __init__(self, scores):
+        self.scores = scores
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def find(self, query, projection=None, batch_size=0):
+        return self._cursor(query)
+
+    async def _cursor(self, query):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        for item in self.scores:
+            if (item["classifier"] == query["classifier"]
+                    and item["division"] == query["division"]
+                    and not item.get("bad", False)):
+                yield {"hf": item["hf"]}
+        self.in_flight -= 1
+
+
+@pytest.fixture
+def scores():
+    """Scores of two classifiers"""
+    return FakeAsyncScores([
+        {"classifier": "23-01", "division": "co", "hf": 5.},
+        {"classifier": "23-01", "division": "co", "hf": 0.},
+        {"classifier": "23-01", "division": "co", "hf": 7., "bad": True},
+        {"classifier": "23-02", "division": "co", "hf": 8.},
+    ])
+
+
+@pytest.fixture
+def mongo(monkeypatch, scores):
+    """AsyncMongo with the scores collection served in-process"""
+    monkeypatch.setattr(
+        uclass.database.async_mongo.AsyncMongo, "scores",
+        property(lambda self: scores))
+    return uclass.database.async_mongo.AsyncMongo(connect=False)
+
+
+def test_get_hf_array(mongo):
+    """Test AsyncMongo.get_hf_array()"""
+    hf = asyncio.run(mongo.get_hf_array("23-01", "co", batch_size=1))
+    assert np.array_equal(np.sort(hf), [0., 5.])
+
+
+def test_get_hf_many(mongo, scores):
+    """Test AsyncMongo.get_hf_many()"""
+    pairs = [("23-01", "co"), ("23-02", "co"), ("23-03", "co")] * 4
+    hf = asyncio.run(mongo.get_hf_many(pairs, max_concurrency=3))
+    assert np.array_equal(hf["23-01", "co"], [5.])
+    assert np.array_equal(hf["23-02", "co"], [8.])
+    assert len(hf["23-03", "co"]) == 0
+    assert scores.max_in_flight == 3
+
+
+def test_aget_hf(mongo):
+    """Test StageData.aget_hf()"""
+    stage_data = uclass.StageData("23-01", "co", database=mongo)
+    hf = asyncio.run(stage_data.aget_hf())
+    assert np.array_equal(hf, [5.])
+    assert stage_data.cache.misses == 1
@@ -0,0 +1,107 @@
+"""Test uclass.database.mongo"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pymongo")
+mongomock = pytest.importorskip("mongomock")
+
+import uclass.database.mongo
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Mongo with the scores collection served by mongomock"""
+    scores = mongomock.MongoClient()["zeta"].scores
+    scores.insert_many([
+        {"classifier": "23-01", "division": "co", "hf": 5.},
+        {"classifier": "23-01", "division": "co", "hf": 6., "bad": False},
+        {"classifier": "23-01", "division": "co", "hf": 7., "bad": True},
+        {"classifier": "23-01", "division": "co", "hf": 0.},
+        {"classifier": "23-01", "division": "ltd", "hf": 4.},
+        {"classifier": "23-02", "division": "co", "hf": 8.},
+        {"classifier": "23-02", "division": "co", "hf": 9.},
+    ])
+    monkeypatch.setattr(
+        uclass.database.mongo.Mongo, "scores", property(lambda self: scores))
+    mongo = uclass.database.mongo.Mongo()
+    yield mongo
+    mongo.close()
+
+
+def test_get_hf(mongo):
+    """Test Mongo.get_hf()"""
+    hf = mongo.get_hf("23-01", "co")
+    assert sorted(hf) == [0., 5., 6.]
+
+
+def test_get_hf_many(mongo):
+    """Test Mongo.get_hf_many()"""
+    pairs = [("23-01", "co"), ("23-02", "co"), ("23-03", "co")]
+    for batch_size in [1, 3, 10000]:
+        hf = mongo.get_hf_many(pairs, batch_size=batch_size)
+        assert set(hf) == set(pairs)
+        assert np.array_equal(np.sort(hf["23-01", "co"]), [5., 6.])
+        assert np.array_equal(np.sort(hf["23-02", "co"]), [8., 9.])
+        assert len(hf["23-03", "co"]) == 0
+
+
+def test_get_hf_all(mongo):
+    """Test Mongo.get_hf_all()"""
+    hf = mongo.get_hf_all("co")
+    assert set(hf) == {"23-01", "23-02"}
+    assert np.array_equal(np.sort(hf["23-01"]), [5., 6.])
+    assert hf["23-02"].dtype == float
+
+    # Many groups growing their buffers over many batches.
+    mongo.scores.insert_many([
+        {"classifier": f"24-{i % 7:02d}", "division": "co", "hf": i + 1.}
+        for i in range(1000)])
+    hf = mongo.get_hf_all("co", batch_size=64)
+    for i in range(7):
+        assert np.array_equal(hf[f"24-{i:02d}"], np.arange(i, 1000, 7) + 1.)
+
+
+def test_get_hf_array(mongo):
+    """Test Mongo.get_hf_array()"""
+    for batch_size in [1, 2, 1000]:
+        hf = mongo.get_hf_array("23-01", "co", batch_size=batch_size)
+        assert hf.dtype == np.float64
+        assert np.array_equal(np.sort(hf), [0., 5., 6.])
+    assert len(mongo.get_hf_array("23-03", "co")) == 0
+
+
+def test_get_client():
+    """Test get_client()"""
+    mongo = uclass.database.mongo.get_client()
+    assert uclass.database.mongo.get_client() is mongo
+    assert uclass.database.mongo.get_client(maxPoolSize=4) is not mongo
+
+    stage_data = uclass.database.StageData("23-01", "co")
+    assert stage_data.database is mongo
+
+    # Forked children create their own clients.
+    uclass.database.mongo._reset_clients()
+    assert uclass.database.mongo.get_client() is not mongo
+    uclass.database.mongo.close_clients()
+    mongo.close()
+
+
+def test_get_counts(mongo):
+    """Test Mongo.get_counts()"""
+    assert mongo.get_counts("co") == {"23-01": 2, "23-02": 2}
+
+
+def test_truthy_bad(mongo):
+    """Test scores with a truthy "bad" flag are skipped by all queries"""
+    mongo.scores.insert_many([
+        {"classifier": "23-02", "division": "co", "hf": 10., "bad": 1},
+        {"classifier": "23-02", "division": "co", "hf": 11., "bad": "yes"},
+        {"classifier": "23-02", "division": "co", "hf": 12., "bad": 0},
+    ])
+    expected = [8., 9., 12.]
+    assert sorted(mongo.get_hf("23-02", "co")) == expected
+    assert sorted(mongo.get_hf_array("23-02", "co")) == expected
+    assert sorted(mongo.get_hf_many([("23-02", "co")])["23-02", "co"]) == (
+        expected)
+    assert sorted(mongo.get_hf_all("co")["23-02"]) == expected
+    assert mongo.get_counts("co")["23-02"] == 3
@@ -0,0 +1,71 @@
+"""Test uclass.database.snapshot"""
+import types
+
+import numpy as np
+import pytest
+
+import uclass
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Snapshot of a few scores"""
+    classifier = ["23-01", "23-02", "23-01", "23-01", "23-01", "23-02"]
+    division = ["co", "co", "co", "co", "ltd", "co"]
+    hf = [5., 8., 0., 7., 4., 9.]
+    bad = [False, False, False, True, False, False]
+    return uclass.Snapshot.write(
+        str(tmp_path / "snapshot"), classifier, division, hf, bad)
+
+
+def test_get_hf(snapshot):
+    """Test Snapshot.get_hf()"""
+    hf = snapshot.get_hf("23-01", "co")
+    assert np.array_equal(np.sort(hf), [0., 5.])
+    assert isinstance(hf, np.memmap)  # No copy.
+    assert len(snapshot.get_hf("23-03", "co")) == 0
+
+
+def test_get_hf_all(snapshot):
+    """Test Snapshot.get_hf_all() and Snapshot.get_hf_many()"""
+    hf = snapshot.get_hf_all("co")
+    assert set(hf) == {"23-01", "23-02"}
+    assert np.array_equal(hf["23-01"], [5.])
+    assert np.array_equal(np.sort(hf["23-02"]), [8., 9.])
+
+    hf = snapshot.get_hf_many([("23-01", "ltd"), ("23-03", "co")])
+    assert np.array_equal(hf["23-01", "ltd"], [4.])
+    assert len(hf["23-03", "co"]) == 0
+
+    assert snapshot.classifiers() == ["23-01", "23-02"]
+    assert snapshot.classifiers("ltd") == ["23-01"]
+
+
+def test_stage_data(snapshot):
+    """Test StageData() with a snapshot"""
+    stage_data = uclass.StageData(
+        "23-01", "co", database="snapshot", path=snapshot.path)
+    assert np.array_equal(stage_data.hf, [5.])
+    assert np.array_equal(
+        np.sort(stage_data.get_hf(include_zeros=True)), [0., 5.])
+
+    with pytest.raises(ValueError):
+        uclass.StageData("23-01", "co", database="snapshot")
+
+
+def test_from_mongo(tmp_path):
+    """Test Snapshot.from_mongo()"""
+    mongomock = pytest.importorskip("mongomock")
+    scores = mongomock.MongoClient()["zeta"].scores
+    scores.insert_many([
+        {"classifier": "23-01", "division": "co", "hf": 5.},
+        {"classifier": "23-01", "division": "co", "hf": 6., "bad": True},
+    ])
+    mongo = types.SimpleNamespace(scores=scores)
+    snapshot = uclass.Snapshot.from_mongo(mongo, str(tmp_path / "snapshot"))
+    assert np.array_equal(snapshot.get_hf("23-01", "co"), [5.])
+
+
+def test_get_counts(snapshot):
+    """Test Snapshot.get_counts()"""
+    assert snapshot.get_counts("co") == {"23-01": 1, "23-02": 2}
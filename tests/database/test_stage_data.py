@@ -0,0 +1,95 @@
+"""Test uclass.database.stage_data"""
+import asyncio
+import concurrent.futures
+import time
+
+import numpy as np
+
+import uclass
+
+
+class CountingDatabase:
+    """Database counting queries"""
+    def __init__(self):
+        self.queries = 0
+        self.hf = {("23-01", "co"): [5., 0., 6.], ("23-02", "co"): [7.]}
+
+    def get_hf_array(self, classifier, division):
+        self.queries += 1
+        return np.array(self.hf[classifier, division])
+
+
+def test_stage_data_cache():
+    """Test StageData() hit factor cache"""
+    database = CountingDatabase()
+    stage_data = uclass.StageData("23-01", "co", database=database)
+    assert stage_data.database is database
+    assert np.array_equal(stage_data.hf, [5., 6.])
+    assert len(stage_data.hf) == 2
+    assert database.queries == 1
+    assert (stage_data.cache.hits, stage_data.cache.misses) == (1, 1)
+
+    stage_data.get_hf(include_zeros=True)
+    assert database.queries == 2
+
+    stage_data.classifier = "23-02"
+    assert np.array_equal(stage_data.hf, [7.])
+    assert database.queries == 3
+
+    stage_data.refresh()
+    stage_data.hf
+    assert database.queries == 4
+
+
+def test_stage_data_get_hf_only():
+    """Test StageData() with a database without get_hf_array"""
+    class Database:
+        def get_hf(self, classifier, division):
+            return [5., 0., 6.]
+
+    stage_data = uclass.StageData("23-01", "co", database=Database())
+    hf = stage_data.get_hf()
+    assert hf.dtype == float
+    assert np.array_equal(hf, [5., 6.])
+    assert np.array_equal(asyncio.run(stage_data.aget_hf(True)), [5., 0., 6.])
+
+
+def test_stage_data_shared_cache():
+    """Test StageData() sharing a cache with a TTL"""
+    cache = uclass.HFCache(ttl=0.05)
+    stage_data = uclass.StageData(
+        "23-01", "co", database=CountingDatabase(), cache=cache)
+    stage_data_ = uclass.StageData(
+        "23-01", "co", database=CountingDatabase(), cache=cache)
+    stage_data.hf
+    stage_data_.hf
+    assert stage_data_.database.queries == 0
+    time.sleep(0.1)
+    stage_data_.hf
+    assert stage_data_.database.queries == 1
+
+
+def test_hf_cache_threads():
+    """Test HFCache() shared by many threads"""
+    cache = uclass.HFCache(maxsize=3)
+
+    def work(i):
+        for j in range(1000):
+            key = ("23-01", str((i+j) % 5), False)
+            if cache.get(key) is None:
+                cache.set(key, np.zeros(1))
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        list(executor.map(work, range(8)))
+    assert cache.hits + cache.misses == 8000
+    assert len(cache) == 3
+
+
+def test_aget_hf():
+    """Test StageData.aget_hf() with a synchronous database"""
+    database = CountingDatabase()
+    stage_data = uclass.StageData("23-01", "co", database=database)
+    hf = asyncio.run(stage_data.aget_hf())
+    assert np.array_equal(hf, [5., 6.])
+    assert stage_data.hf is hf
+    assert database.queries == 1
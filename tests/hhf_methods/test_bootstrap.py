@@ -0,0 +1,46 @@
+"""Test uclass.hhf_methods.bootstrap"""
+import numpy as np
+
+import uclass
+import uclass.hhf_methods.bootstrap
+
+
+hf = np.loadtxt("tests/data/co_23-01.txt")
+
+
+def test_bootstrap_hhf():
+    """Test bootstrap_hhf() against sequential Weibull5 fits"""
+    result = uclass.hhf_methods.bootstrap.bootstrap_hhf(
+        hf, n_resamples=20, chunk_size=8, rng=123)
+    hhf = result["bootstrap_distribution"]
+    assert hhf.shape == (20,)
+
+    # Same indices as the chunks, fitted one by one.
+    seeds = np.random.SeedSequence(123).spawn(3)
+    hhf_true = []
+    for seed, size in zip(seeds, [8, 8, 4]):
+        indices = np.random.default_rng(seed).integers(
+            len(hf), size=(size, len(hf)))
+        hhf_true += [uclass.Weibull5(hf[i]).get_hhf() for i in indices]
+    assert np.allclose(hhf, hhf_true)
+
+
+def test_bootstrap_hhf_workers():
+    """Test bootstrap_hhf() is reproducible across worker counts"""
+    kwargs = {"n_resamples": 40, "chunk_size": 10, "rng": 1}
+    result = uclass.hhf_methods.bootstrap.bootstrap_hhf(
+        hf, max_workers=1, **kwargs)
+    result_pool = uclass.hhf_methods.bootstrap.bootstrap_hhf(
+        hf, max_workers=2, **kwargs)
+    assert np.array_equal(
+        result["bootstrap_distribution"],
+        result_pool["bootstrap_distribution"])
+
+
+def test_get_hhf_interval():
+    """Test Weibull5.get_hhf_interval()"""
+    weibull5 = uclass.Weibull5(hf)
+    result = weibull5.get_hhf_interval(n_resamples=200)
+    low, high = result["confidence_interval"]
+    assert low < weibull5.get_hhf() < high
+    assert 0 < result["standard_error"] < high - low
@@ -0,0 +1,56 @@
+"""Test uclass.hhf_methods.fit_cache"""
+import pickle
+
+import numpy as np
+
+import uclass
+
+
+def test_fit_cache(tmp_path):
+    """Test FitCache()"""
+    path = str(tmp_path / "fit_cache.sqlite")
+    cache = uclass.FitCache(maxsize=2, path=path)
+    keys = [
+        uclass.hhf_methods.fit_cache.make_key("weibull", np.arange(i+1))
+        for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, [i, i+1])
+
+    assert len(cache) == 2  # The first key is evicted from memory.
+    assert np.allclose(cache.get(keys[0]), [0, 1])  # But is on disk.
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    cache = uclass.FitCache(path=path)
+    assert np.allclose(cache.get(keys[2]), [2, 3])
+
+
+def test_make_key():
+    """Test make_key()"""
+    make_key = uclass.hhf_methods.fit_cache.make_key
+    x = np.array([1., 2., 3.])
+    assert make_key("weibull", x) == make_key("weibull", list(x))
+    assert make_key("weibull", x) != make_key("weibull", x[::-1])
+    assert make_key("weibull", x, k0=3.6) != make_key("weibull", x, k0=3)
+
+
+def test_ppregress_cache():
+    """Test PPRegress() with a fit cache"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+
+    cache = uclass.FitCache()
+    hhf = uclass.PPRegress(hf, hf_sample, hhf_sample, cache=cache).get_hhf()
+    misses = cache.misses
+    hhf_cached = uclass.PPRegress(
+        hf, hf_sample, hhf_sample, cache=cache).get_hhf()
+
+    assert np.isclose(hhf, 10.85615024)
+    assert np.isclose(hhf_cached, hhf)
+    assert cache.misses == misses  # Second call is fully cached.
+    # The reference Weibulls, the regression and the Weibull of hf.
+    assert cache.hits == len(hhf_sample) + 2
@@ -0,0 +1,51 @@
+"""Test LogitNormal5 method"""
+import numpy as np
+import scipy.special
+
+import uclass
+
+
+def test_logitnormal5():
+    """Test logitnormal5"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    logitnormal5 = uclass.LogitNormal5(hf)
+    hhf = logitnormal5.get_hhf(.95, .85)
+
+    logit = scipy.special.logit(hf / (1.1*hf.max()))
+    assert np.isclose(logitnormal5.logitnormal.mu, np.mean(logit))
+    assert np.isclose(logitnormal5.logitnormal.sigma, np.std(logit))
+    # Cross-check against Weibull5.
+    assert np.isclose(hhf, uclass.Weibull5(hf).get_hhf(), rtol=0.05)
+
+
+def test_logitnormal5_clip():
+    """Test clipping is robust to an outlier and lowers the HHF"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    hf_outlier = np.append(hf, 100*hf.max())
+    hhf = uclass.LogitNormal5(hf).get_hhf()
+    hhf_clip = uclass.LogitNormal5(hf, clip=True).get_hhf()
+    # About 3% lower than the unclipped fit.
+    assert 0.95*hhf < hhf_clip < hhf
+    hhf_clip_outlier = uclass.LogitNormal5(hf_outlier, clip=True).get_hhf()
+    assert np.isclose(hhf_clip_outlier, hhf_clip, rtol=0.01)
+    # Without clipping, the outlier shifts the fit.
+    assert uclass.LogitNormal5(hf_outlier).get_hhf() > 1.2*hhf
+
+    # The scale follows the hit factors.
+    logitnormal5 = uclass.LogitNormal5(hf)
+    assert logitnormal5.scale == 1.1*hf.max()
+    logitnormal5.hf = hf_outlier
+    assert logitnormal5.scale == 1.1*hf_outlier.max()
+
+
+def test_logitnormal5_cache():
+    """Test logitnormal5 with a fit cache"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    cache = uclass.FitCache()
+    hhf = uclass.LogitNormal5(hf, cache=cache).get_hhf()
+    hhf_cached = uclass.LogitNormal5(hf, cache=cache).get_hhf()
+    assert hhf == hhf_cached
+    assert cache.hits == 1
+    hhf_scaled = uclass.LogitNormal5(hf, scale=20, cache=cache).get_hhf()
+    assert hhf_scaled != hhf
+    assert cache.hits == 1
@@ -0,0 +1,67 @@
+"""Test OnlineWeibull5 method"""
+import numpy as np
+import pytest
+
+import uclass
+
+
+def test_online_weibull5():
+    """Test online updates match a full fit"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    online = uclass.OnlineWeibull5()
+    for batch in np.array_split(hf, 50):
+        online.update(batch)
+    weibull = uclass.Weibull5(hf).fit_weibull()
+    assert online.n == len(hf)
+    assert np.isclose(online.weibull.lam, weibull.lam, rtol=1e-9)
+    assert np.isclose(online.weibull.k, weibull.k, rtol=1e-9)
+    assert np.isclose(online.get_hhf(), 10.5804297)
+
+
+def test_online_weibull5_reanchor():
+    """Test re-anchoring when the shape parameter drifts"""
+    rng = np.random.default_rng(123)
+    hf = np.concatenate([0.5 + rng.random(100), 5*rng.weibull(1.2, 5000)])
+    online = uclass.OnlineWeibull5(hf[:100])
+    online.update(np.zeros(10))
+    assert online.n == 100
+    for batch in np.array_split(hf[100:], 20):
+        online.update(batch)
+    weibull = uclass.Weibull5(hf).fit_weibull()
+    assert online.n_reanchor > 0
+    assert np.isclose(online.weibull.k, weibull.k, rtol=1e-9)
+    assert np.allclose(online.hf, hf)
+
+
+def test_online_hhf():
+    """Test OnlineHHF"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    online_hhf = uclass.OnlineHHF()
+    online_hhf.update("23-01", "co", hf[:1000])
+    hhf = online_hhf.update("23-01", "co", hf[1000:])
+    assert np.isclose(hhf, 10.5804297)
+    assert list(online_hhf.estimators) == [("23-01", "co")]
+
+
+def test_online_weibull5_single_scores():
+    """Test streaming single scores from an empty state"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    hf = hf[hf > 0][:200]
+    for online in [uclass.OnlineWeibull5(), uclass.OnlineWeibull5([5.]),
+                   uclass.OnlineWeibull5([5., 5.])]:
+        assert online.weibull is None
+        with pytest.raises(ValueError):
+            online.get_hhf()
+        seen = list(online.hf) if online.n else []
+        for hf_ in hf:
+            weibull = online.update([hf_])
+            seen.append(hf_)
+            if weibull is None:
+                assert len(set(seen)) == 1
+        weibull5 = uclass.Weibull5(np.array(seen))
+        assert np.isclose(online.get_hhf(), weibull5.get_hhf())
+
+    online_hhf = uclass.OnlineHHF()
+    assert online_hhf.update("23-01", "co", [5.]) is None
+    assert online_hhf.update("23-01", "co", [5.]) is None
+    assert np.isfinite(online_hhf.update("23-01", "co", [6.]))
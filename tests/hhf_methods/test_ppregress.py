@@ -4,6 +4,7 @@ import pickle
 import numpy as np
 
 import uclass
+import uclass.instrumentation
 
 
 def test_ppregress():
@@ -19,3 +20,166 @@ def test_ppregress():
     hhf_true = 10.85615024
     
     assert np.isclose(hhf, hhf_true)
+
+
+def test_ppregress_vectorized():
+    """Test PPRegress() with vectorized cost evaluation"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+
+    ppregress = uclass.PPRegress(hf, hf_sample, hhf_sample, vectorized=True)
+    hhf = ppregress.get_hhf()
+    hhf_true = 10.85615024
+
+    assert np.isclose(hhf, hhf_true)
+
+
+def test_regression_cost():
+    """Test regression_cost() over a population of parameters"""
+    rng = np.random.default_rng(123)
+    log_lam = np.log(rng.uniform(4, 10, 50))
+    inv_k = 1 / rng.uniform(2, 5, 50)
+    log_hhf = np.log(rng.uniform(8, 14, 50))
+    population = rng.uniform(0.5, 0.99, (2, 16))
+
+    error = uclass.hhf_methods.ppregress.regression_cost(
+        population, log_lam, inv_k, log_hhf)
+    assert error.shape == (16,)
+    for i in range(16):
+        error_i = uclass.hhf_methods.ppregress.regression_cost(
+            population[:, i], log_lam, inv_k, log_hhf)
+        assert np.ndim(error_i) == 0
+        assert np.isclose(error[i], error_i)
+
+
+def test_ppregress_workers():
+    """Test PPRegress() with parallel population evaluation"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+
+    params = uclass.PPRegress(
+        None, hf_sample, hhf_sample, workers=2).regress()
+    params_map = uclass.PPRegress(
+        None, hf_sample, hhf_sample, workers=map).regress()
+
+    assert np.allclose(params, params_map)
+
+
+def test_regress_divisions():
+    """Test regress_divisions()"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    hf_samples = {"co": hf_sample, "ltd": hf_sample[:40]}
+    hhf_samples = {"co": hhf_sample, "ltd": hhf_sample[:40]}
+
+    results = uclass.hhf_methods.ppregress.regress_divisions(
+        hf_samples, hhf_samples, max_workers=2)
+    results_serial = uclass.hhf_methods.ppregress.regress_divisions(
+        hf_samples, hhf_samples, max_workers=1)
+
+    for division in ["co", "ltd"]:
+        assert np.allclose(results[division], results_serial[division])
+
+    # Each division has its own seed, and a dict overrides them.
+    seeds = [
+        int(seed.generate_state(1)[0])
+        for seed in np.random.SeedSequence(123).spawn(2)]
+    assert seeds[0] != seeds[1]
+    results_dict = uclass.hhf_methods.ppregress.regress_divisions(
+        hf_samples, hhf_samples, max_workers=1, rng={"co": 123, "ltd": 7})
+    for division, seed, rng in zip(["co", "ltd"], seeds, [123, 7]):
+        params = uclass.PPRegress(
+            None, hf_samples[division], hhf_samples[division],
+            rng=seed).regress()
+        assert np.allclose(results[division], params)
+        params = uclass.PPRegress(
+            None, hf_samples[division], hhf_samples[division],
+            rng=rng).regress()
+        assert np.allclose(results_dict[division], params)
+
+
+def test_cross_validate():
+    """Test PPRegress.cross_validate()"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)[:20]
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)[:20]
+
+    ppregress = uclass.PPRegress(None, hf_sample, hhf_sample)
+    with uclass.instrumentation.collect() as report:
+        results = ppregress.cross_validate()
+    # The stages are fitted once, for the full-data regression too.
+    assert report.to_dict()["counters"]["fit_weibull_batch_stages"] == 20
+    assert results["hhf"].shape == (20,)
+    assert np.allclose(
+        results["error"], results["hhf"]/np.array(hhf_sample) - 1)
+
+    # The held-out stage is not part of its fold's regression.
+    mask = np.arange(20) != 3
+    ppregress_fold = uclass.PPRegress(
+        None, [hf_sample[i] for i in np.flatnonzero(mask)],
+        np.array(hhf_sample)[mask])
+    assert np.allclose(
+        results["params"][3], ppregress_fold.regress(), rtol=1e-3)
+
+    results_local = ppregress.cross_validate(method="local", max_workers=2)
+    assert np.allclose(results_local["hhf"], results["hhf"], rtol=1e-2)
+    assert results_local["nfev"].sum() < results["nfev"].sum()
+
+
+def test_regression_cost_grad():
+    """Test regression_cost_grad() against finite differences"""
+    rng = np.random.default_rng(123)
+    args = (np.log(rng.uniform(4, 10, 50)), 1/rng.uniform(2, 5, 50),
+            np.log(rng.uniform(8, 14, 50)))
+    params = np.array([0.9, 0.8])
+    error, grad = uclass.hhf_methods.ppregress.regression_cost_grad(
+        params, *args)
+    assert np.isclose(
+        error, uclass.hhf_methods.ppregress.regression_cost(params, *args))
+    for i in range(2):
+        step = np.zeros(2)
+        step[i] = 1e-6
+        error_step = uclass.hhf_methods.ppregress.regression_cost(
+            params+step, *args)
+        assert np.isclose(grad[i], (error_step-error)/1e-6, rtol=1e-4)
+
+
+def test_recalibrate():
+    """Test PPRegress.recalibrate() after adding reference stages"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    n = len(hhf_sample) - 5
+    ppregress = uclass.PPRegress(None, hf_sample[:n], hhf_sample[:n])
+    x0 = ppregress.regress()
+
+    ppregress.hf_sample = hf_sample
+    ppregress.hhf_sample = hhf_sample
+    results = ppregress.recalibrate()
+    params = uclass.PPRegress(None, hf_sample, hhf_sample).regress()
+    assert np.allclose(results["params"], params, rtol=1e-4)
+    assert (ppregress.percentile, ppregress.percentage) == tuple(
+        results["params"])
+    assert results["nfev"] < 50
+
+    results_de = ppregress.recalibrate(x0=x0, method="de")
+    assert np.allclose(results_de["params"], params, rtol=1e-4)
+    assert results_de["bounds"][0][1] - results_de["bounds"][0][0] < 0.2
+
+    # The bounds are widened when the optimum is outside.
+    with uclass.instrumentation.collect() as report:
+        results_far = ppregress.recalibrate(x0=[0.8, 0.7], method="de")
+    assert np.allclose(results_far["params"], params, rtol=1e-4)
+    # The evaluations of all the rounds are counted.
+    counters = report.to_dict()["counters"]
+    assert counters["recalibrate_nfev{method=de}"] == results_far["nfev"]
+    assert counters["recalibrate_nit{method=de}"] == results_far["nit"]
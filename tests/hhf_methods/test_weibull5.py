@@ -1,5 +1,6 @@
 """Test Weibull5 method"""
 import numpy as np
+import scipy.optimize
 
 import uclass
 
@@ -11,3 +12,22 @@ def test_weibull5():
     hhf = weibull5.get_hhf(.95, .85)
     hhf_true = 10.5804297
     assert np.isclose(hhf, hhf_true)
+
+
+def test_weibull5_nelder_mead():
+    """Test weibull5 with the Nelder-Mead fallback"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    weibull5 = uclass.Weibull5(hf)
+    weibull = weibull5.fit_weibull(method="nelder-mead")
+    weibull_newton = uclass.Weibull5(hf).fit_weibull(method="newton")
+    assert np.isclose(weibull.lam, weibull_newton.lam, rtol=1e-4)
+    assert np.isclose(weibull.k, weibull_newton.k, rtol=1e-4)
+
+    # Same as the legacy Nelder-Mead over the untransformed parameters.
+    def nll(params, x):
+        lam, k = params
+        return -np.mean(np.log(uclass.Weibull(lam, k).pdf(x)))
+    lam0 = np.median(hf) / np.log(2)**(1/3.6)
+    res = scipy.optimize.minimize(
+        nll, x0=[lam0, 3.6], args=hf, method="nelder-mead")
+    assert np.allclose([weibull.lam, weibull.k], res.x, rtol=1e-12)
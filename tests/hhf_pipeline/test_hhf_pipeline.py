@@ -0,0 +1,132 @@
+"""Test uclass.hhf_pipeline.hhf_pipeline"""
+import csv
+import pickle
+
+import numpy as np
+import pytest
+
+import uclass
+import uclass.clitools.uclass_hhf
+import uclass.hhf_pipeline
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Snapshot of 10 classifiers in two divisions"""
+    rng = np.random.default_rng(123)
+    classifier, division, hf = [], [], []
+    for i in range(10):
+        for division_, n in [("co", 200), ("ltd", 100)]:
+            classifier += [f"23-{i:02d}"] * n
+            division += [division_] * n
+            hf += list((5+i) * rng.weibull(3.6, n))
+    classifier += ["23-99"] * 5
+    division += ["co"] * 5
+    hf += [5.] * 5
+    return uclass.Snapshot.write(
+        str(tmp_path / "snapshot"), classifier, division, hf)
+
+
+def read_output(path):
+    """Rows of the output file keyed by stage"""
+    with open(path, newline="") as f:
+        return {(row["classifier"], row["division"]): row
+                for row in csv.DictReader(f)}
+
+
+def test_hhf_pipeline(snapshot, tmp_path):
+    """Test HHFPipeline.run() against Weibull5"""
+    output = str(tmp_path / "hhf.csv")
+    pipeline = uclass.hhf_pipeline.HHFPipeline(
+        snapshot, output, divisions=["co", "ltd"], chunk_size=3)
+    report = pipeline.run()
+    assert report["n_stages"] == 20
+    assert report["n_skipped"] == 1  # 23-99 has too few scores.
+    assert report["n_scores"] == 3000
+
+    rows = read_output(output)
+    assert len(rows) == 20
+    for (classifier, division), row in rows.items():
+        hf = snapshot.get_hf(classifier, division)
+        hhf = uclass.Weibull5(hf).get_hhf()
+        assert np.isclose(float(row["hhf"]), hhf)
+
+
+def test_hhf_pipeline_resume(snapshot, tmp_path):
+    """Test resuming a crashed run"""
+    output = str(tmp_path / "hhf.csv")
+    pipeline = uclass.hhf_pipeline.HHFPipeline(
+        snapshot, output, divisions=["co", "ltd"], chunk_size=3)
+    pipeline.run()
+    rows = read_output(output)
+
+    # Crash after a few stages, in the middle of writing a row.
+    with open(output) as f:
+        lines = f.readlines()
+    with open(output, "w") as f:
+        f.writelines(lines[:6])
+        f.write(lines[6][:10])
+
+    report = pipeline.run()
+    assert report["n_stages"] == 15
+    rows_resumed = read_output(output)
+    assert set(rows_resumed) == set(rows)
+    for stage, row in rows.items():
+        assert np.isclose(
+            float(rows_resumed[stage]["hhf"]), float(row["hhf"]))
+
+    report = pipeline.run()
+    assert report["n_stages"] == 0
+    report = pipeline.run(resume=False)
+    assert report["n_stages"] == 20
+
+
+def test_hhf_pipeline_resume_mismatch(snapshot, tmp_path):
+    """Test resuming with other settings is refused"""
+    output = str(tmp_path / "hhf.csv")
+    pipeline = uclass.hhf_pipeline.HHFPipeline(
+        snapshot, output, divisions=["co", "ltd"])
+    pipeline.run()
+    with open(output) as f:
+        text = f.read()
+    with open(output, "w") as f:
+        f.write(text.replace(",weibull5,", ",ppregress,"))
+    with pytest.raises(ValueError):
+        pipeline.run()
+    report = pipeline.run(resume=False)
+    assert report["n_stages"] == 20
+
+
+def test_hhf_pipeline_not_converged(tmp_path):
+    """Test stages whose fit does not converge are not written"""
+    hf = list(8 * np.random.default_rng(123).weibull(3.6, 50))
+    snapshot = uclass.Snapshot.write(
+        str(tmp_path / "snapshot"), ["23-01"]*50 + ["23-02"]*20,
+        ["co"]*70, hf + [5.]*20)
+    output = str(tmp_path / "hhf.csv")
+    pipeline = uclass.hhf_pipeline.HHFPipeline(
+        snapshot, output, divisions=["co"])
+    report = pipeline.run()
+    assert report["n_stages"] == 1
+    assert report["n_failed"] == 1
+    assert list(read_output(output)) == [("23-01", "co")]
+
+
+def test_hhf_pipeline_ppregress(tmp_path):
+    """Test the ppregress method against PPRegress"""
+    with open("tests/data/co_hf_sample.pkl", "rb") as f:
+        hf_sample = pickle.load(f)
+    with open("tests/data/co_hhf_sample.pkl", "rb") as f:
+        hhf_sample = pickle.load(f)
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    snapshot = uclass.Snapshot.write(
+        str(tmp_path / "snapshot"), ["23-01"]*len(hf), ["co"]*len(hf), hf)
+
+    output = str(tmp_path / "hhf.csv")
+    uclass.clitools.uclass_hhf.main([
+        "--snapshot", str(tmp_path / "snapshot"), "-o", output,
+        "-m", "ppregress", "--reference", "tests/data"])
+    rows = read_output(output)
+    assert list(rows) == [("23-01", "co")]
+    hhf = uclass.PPRegress(hf, hf_sample, hhf_sample).get_hhf()
+    assert np.isclose(float(rows["23-01", "co"]["hhf"]), hhf)
@@ -0,0 +1,84 @@
+"""Test uclass.hhf_pipeline.hhf_table"""
+import os
+
+import numpy as np
+import pytest
+
+import uclass
+import uclass.hhf_pipeline
+
+
+def write_snapshot(path, n_scores):
+    """Snapshot of 5 classifiers in two divisions"""
+    rng = np.random.default_rng(123)
+    classifier, division, hf = [], [], []
+    for i, n in enumerate(n_scores):
+        for division_ in ["co", "ltd"]:
+            classifier += [f"23-{i:02d}"] * n
+            division += [division_] * n
+            hf += list((5+i) * rng.weibull(3.6, n))
+    return uclass.Snapshot.write(path, classifier, division, hf)
+
+
+def test_hhf_table(tmp_path):
+    """Test HHFTable.update() and lookups"""
+    snapshot = write_snapshot(str(tmp_path / "s1"), [100, 200, 50, 80, 5])
+    path = str(tmp_path / "hhf.npz")
+    table = uclass.hhf_pipeline.HHFTable(path)
+    assert len(table) == 0
+    report = table.update(snapshot, divisions=["co", "ltd"], chunk_size=3)
+    assert report["n_updated"] == 8  # 23-04 has too few scores.
+    assert ("23-04", "co") not in table
+
+    table = uclass.hhf_pipeline.HHFTable(path)
+    assert len(table) == 8
+    for classifier in ["23-00", "23-01", "23-02", "23-03"]:
+        hhf = uclass.Weibull5(snapshot.get_hf(classifier, "co")).get_hhf()
+        assert np.isclose(table.get_hhf(classifier, "co"), hhf)
+    row = table.get("23-01", "ltd")
+    assert row["n_scores"] == 200
+    assert row["method"] == "weibull5"
+    assert row["updated"] > 0
+    assert table.get("23-09", "co") is None
+    with pytest.raises(KeyError):
+        table.get_hhf("23-09", "co")
+
+    # Only the classifiers whose score count changed are refitted.
+    snapshot = write_snapshot(str(tmp_path / "s2"), [100, 210, 50, 5, 20])
+    report = table.update(snapshot, divisions=["co", "ltd"])
+    assert report["n_updated"] == 4  # 23-01 and 23-04.
+    assert report["n_fresh"] == 4
+    assert report["n_removed"] == 2  # 23-03.
+    assert table.get("23-01", "co")["n_scores"] == 210
+    assert ("23-03", "co") not in table
+    assert ("23-04", "ltd") in table
+    assert table.is_stale("23-00", "co", 100) is False
+    assert table.is_stale("23-00", "co", 100, percentile=0.9) is True
+
+    report = table.update(snapshot, divisions=["co", "ltd"], force=True)
+    assert report["n_updated"] == 8
+    assert list(table.data["division"]) == ["co"]*4 + ["ltd"]*4
+
+
+def test_hhf_table_not_converged(tmp_path):
+    """Test stages whose fit does not converge keep their row"""
+    rng = np.random.default_rng(123)
+    hf = list(8 * rng.weibull(3.6, 50))
+    snapshot = uclass.Snapshot.write(
+        str(tmp_path / "s1"), ["23-01"]*50 + ["23-02"]*20, ["co"]*70,
+        hf + list(5 * rng.weibull(3.6, 20)))
+    path = str(tmp_path / "hhf.npz")
+    table = uclass.hhf_pipeline.HHFTable(path)
+    table.update(snapshot, divisions=["co"])
+    row = table.get("23-02", "co")
+
+    snapshot = uclass.Snapshot.write(
+        str(tmp_path / "s2"), ["23-01"]*50 + ["23-02"]*30 + ["23-03"]*20,
+        ["co"]*100, hf + [5.]*30 + [6.]*20)
+    report = table.update(snapshot, divisions=["co"])
+    assert report["n_failed"] == 2
+    assert report["n_updated"] == 0
+    assert table.get("23-02", "co") == row
+    assert ("23-03", "co") not in table
+    assert [name for name in os.listdir(tmp_path)
+            if name.startswith(".")] == []
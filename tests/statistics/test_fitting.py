@@ -0,0 +1,79 @@
+"""Test uclass.statistics.fitting"""
+import numpy as np
+import pytest
+
+import uclass.statistics.distribution
+import uclass.statistics.fitting
+import uclass.statistics.logitnormal
+import uclass.statistics.weibull
+
+
+class Exponential(uclass.statistics.distribution.Distribution):
+    """Exponential distribution without an analytic gradient"""
+    param_transforms = ("log",)
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    @property
+    def params(self):
+        return (self.rate,)
+
+    def logpdf(self, x):
+        return np.log(self.rate) - self.rate*np.asarray(x)
+
+
+hf = np.loadtxt("tests/data/co_23-01.txt")
+
+
+def test_fit_distribution_weibull():
+    """Test fit_distribution() with Weibull"""
+    Weibull = uclass.statistics.weibull.Weibull
+    res_mle = uclass.statistics.fitting.fit_distribution(
+        Weibull, hf, [6, 3.6])
+    for method in ["BFGS", "L-BFGS-B", "Nelder-Mead"]:
+        res = uclass.statistics.fitting.fit_distribution(
+            Weibull, hf, [6, 3.6], method=method)
+        assert res.success
+        assert np.allclose(res.x, res_mle.x, rtol=1e-4)
+
+
+def test_fit_distribution_logitnormal():
+    """Test fit_distribution() with LogitNormal"""
+    x = hf / (1.1*hf.max())
+    res = uclass.statistics.fitting.fit_distribution(
+        uclass.statistics.logitnormal.LogitNormal, x, [1, 0])
+    logit = np.log(x/(1-x))
+    assert res.success
+    assert np.allclose(res.x, [np.std(logit), np.mean(logit)], rtol=1e-4)
+
+
+def test_fit_distribution_numerical_gradient():
+    """Test fit_distribution() without an analytic gradient"""
+    x = np.random.default_rng(123).exponential(0.5, 10000)
+    res = uclass.statistics.fitting.fit_distribution(Exponential, x, [1])
+    assert np.isclose(res.x[0], 1/np.mean(x), rtol=1e-4)
+
+
+def test_fit_distribution_batch():
+    """Test fit_distribution_batch()"""
+    list_x = [hf[:1000], hf[1000:], hf]
+    params_mle, success = uclass.statistics.fitting.fit_distribution_batch(
+        uclass.statistics.weibull.Weibull, list_x, [6, 3.6])
+    assert success.all()
+    params, success = uclass.statistics.fitting.fit_distribution_batch(
+        uclass.statistics.weibull.Weibull, list_x, [6, 3.6], method="BFGS")
+    assert success.all()
+    assert np.allclose(params, params_mle, rtol=1e-4)
+
+
+def test_fit_distribution_invalid_method():
+    """Test fit_distribution() rejects unsupported methods"""
+    x = [0.2, 0.5, 0.7]
+    with pytest.raises(ValueError):
+        uclass.statistics.fitting.fit_distribution(
+            uclass.statistics.logitnormal.LogitNormal, x, [1., 0.],
+            method="newton")
+    with pytest.raises(ValueError):
+        uclass.statistics.fitting.fit_distribution(
+            Exponential, x, [1.], method="mle")
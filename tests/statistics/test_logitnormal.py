@@ -0,0 +1,57 @@
+"""Test uclass.statistics.logitnormal"""
+import numpy as np
+import scipy.integrate
+import scipy.special
+
+import uclass.statistics.logitnormal
+
+
+logitnormal = uclass.statistics.logitnormal.LogitNormal(sigma=0.7, mu=0.3)
+
+
+def test_pdf():
+    """Test pdf integrates to cdf"""
+    integral, _ = scipy.integrate.quad(logitnormal.pdf, 0, 0.6)
+    assert np.isclose(integral, logitnormal.cdf(0.6))
+
+
+def test_logpdf():
+    """Test logpdf, logcdf, logsf and nll"""
+    x = np.linspace(0.01, 0.99, 99)
+    assert np.allclose(logitnormal.logpdf(x), np.log(logitnormal.pdf(x)))
+    assert np.allclose(logitnormal.logcdf(x), np.log(logitnormal.cdf(x)))
+    assert np.allclose(logitnormal.logsf(x), np.log(1-logitnormal.cdf(x)))
+    assert np.isclose(
+        logitnormal.nll(x), -np.mean(np.log(logitnormal.pdf(x))))
+    assert np.isfinite(logitnormal.logcdf(1e-30))
+
+
+def test_array_params():
+    """Test array-valued parameters"""
+    sigmas = np.array([[0.5], [0.7]])
+    mus = np.array([[0.], [0.3]])
+    logitnormals = uclass.statistics.logitnormal.LogitNormal(sigmas, mus)
+    x = np.linspace(0.01, 0.99, 99)
+    assert logitnormals.logpdf(x).shape == (2, 99)
+    assert np.allclose(logitnormals.logcdf(x)[1], logitnormal.logcdf(x))
+    assert np.allclose(logitnormals.nll(x)[1], logitnormal.nll(x))
+
+
+def test_mle():
+    """Test closed-form maximum likelihood fits"""
+    rng = np.random.default_rng(123)
+    list_x = [scipy.special.expit(rng.normal(mu, 0.7, n))
+              for mu, n in [(0.3, 1000), (-0.5, 10), (0., 5000)]]
+    params, success = (
+        uclass.statistics.logitnormal.LogitNormal._mle_batch(list_x))
+    assert success.all()
+    for x, params_i in zip(list_x, params):
+        res = uclass.statistics.logitnormal.LogitNormal._mle(x)
+        assert np.allclose(res.x, params_i)
+        logit = scipy.special.logit(x)
+        assert np.allclose(res.x, [np.std(logit), np.mean(logit)])
+
+
+def test_quantile():
+    """Test quantile inverts cdf"""
+    assert np.isclose(logitnormal.cdf(logitnormal.quantile(0.95)), 0.95)
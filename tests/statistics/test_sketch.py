@@ -0,0 +1,70 @@
+"""Test uclass.statistics.sketch"""
+import types
+
+import numpy as np
+import pytest
+
+import uclass
+import uclass.statistics.sketch
+
+
+rng = np.random.default_rng(123)
+x = 6.5 * rng.weibull(3.3, 200000)
+
+
+def test_quantile():
+    """Test quantile and cdf rank error"""
+    sketch = uclass.statistics.sketch.QuantileSketch(rng=123)
+    for batch in np.array_split(x, 20):
+        sketch.update(batch)
+    assert sketch.n == len(x)
+    assert sketch.size < 1000
+    q = np.linspace(0.01, 0.99, 99)
+    assert np.allclose(sketch.cdf(np.quantile(x, q)), q, atol=0.03)
+    assert np.allclose(np.mean(x <= sketch.quantile(q)[:, None], axis=1),
+                       q, atol=0.03)
+
+
+def test_merge():
+    """Test merging shards and serialization"""
+    QuantileSketch = uclass.statistics.sketch.QuantileSketch
+    shards = [QuantileSketch(rng=i) for i in range(4)]
+    for shard, batch in zip(shards, np.array_split(x, 4)):
+        shard.update(batch)
+    sketch = QuantileSketch.from_bytes(shards[0].to_bytes())
+    assert np.array_equal(sketch.items()[0], shards[0].items()[0])
+    for shard in shards[1:]:
+        sketch.merge(QuantileSketch.from_bytes(shard.to_bytes()))
+    assert sketch.n == len(x)
+    assert np.isclose(sketch.quantile(0.5), np.median(x), rtol=0.02)
+
+
+def test_fit_weibull():
+    """Test the weighted Weibull fit of a sketch"""
+    sketch = uclass.statistics.sketch.QuantileSketch(rng=123)
+    sketch.update(x)
+    weibull = uclass.Weibull5(x).fit_weibull()
+    weibull5 = uclass.Weibull5.from_sketch(sketch)
+    assert np.isclose(weibull5.weibull.lam, weibull.lam, rtol=0.02)
+    assert np.isclose(weibull5.weibull.k, weibull.k, rtol=0.05)
+    assert np.isclose(
+        weibull5.get_hhf(), uclass.Weibull5(x).get_hhf(), rtol=0.02)
+
+
+def test_from_mongo():
+    """Test sketching a stage from a Mongo stream"""
+    mongomock = pytest.importorskip("mongomock")
+    scores = mongomock.MongoClient()["zeta"].scores
+    scores.insert_many(
+        [{"classifier": "23-01", "division": "co", "hf": hf} for hf in x[:500]]
+        + [{"classifier": "23-01", "division": "co", "hf": 0.},
+           {"classifier": "23-01", "division": "co", "hf": 99., "bad": True},
+           {"classifier": "23-01", "division": "co", "hf": 99., "bad": 1},
+           {"classifier": "23-01", "division": "co", "hf": 99., "bad": "yes"},
+           {"classifier": "23-02", "division": "co", "hf": 99.}])
+
+    mongo = types.SimpleNamespace(scores=scores)
+    sketch = uclass.statistics.sketch.QuantileSketch.from_mongo(
+        mongo, "23-01", "co", k=1000, batch_size=64)
+    assert sketch.n == 500
+    assert np.array_equal(sketch.items()[0], np.sort(x[:500]))
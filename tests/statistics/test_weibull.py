@@ -74,3 +74,57 @@ def test_quantile():
     x = weibull.quantile(0.5)
     x_true = 4.516009
     assert np.isclose(x, x_true)
+
+
+def test_logpdf():
+    """Test logpdf, logcdf, logsf and nll"""
+    x = np.linspace(0.1, 10, 1024)
+    assert np.allclose(weibull.logpdf(x), np.log(weibull.pdf(x)))
+    assert np.allclose(weibull.logcdf(x), np.log(weibull.cdf(x)))
+    assert np.allclose(weibull.logsf(x), np.log(1-weibull.cdf(x)))
+    assert np.isclose(weibull.nll(x), -np.mean(np.log(weibull.pdf(x))))
+
+    # No underflow in the far tail.
+    assert np.isclose(weibull.logsf(100.), -(100/lam)**k)
+    assert np.isfinite(weibull.logpdf(100.))
+
+    out = np.empty_like(x)
+    assert weibull.logpdf(x, out=out) is out
+
+
+def test_array_params():
+    """Test array-valued parameters"""
+    lams = np.array([4., 5., 6.])
+    ks = np.array([2., 3.6, 5.])
+    weibulls = uclass.statistics.weibull.Weibull(lam=lams, k=ks)
+    for name in ["mean", "mode", "median", "variance", "std",
+                 "skewness", "kurtosis"]:
+        values = getattr(weibulls, name)
+        assert values.shape == (3,)
+        for i in range(3):
+            weibull_ = uclass.statistics.weibull.Weibull(lams[i], ks[i])
+            assert np.isclose(values[i], getattr(weibull_, name))
+
+    assert weibulls.quantile(0.95).shape == (3,)
+
+    # Parameters of shape (m, 1) against samples of shape (n,).
+    weibulls = uclass.statistics.weibull.Weibull(
+        lam=lams[:, None], k=ks[:, None])
+    x = np.linspace(0.1, 10, 64)
+    for name in ["pdf", "cdf", "logpdf", "logcdf", "logsf"]:
+        values = getattr(weibulls, name)(x)
+        assert values.shape == (3, 64)
+        weibull_ = uclass.statistics.weibull.Weibull(lams[1], ks[1])
+        assert np.allclose(values[1], getattr(weibull_, name)(x))
+    nll = weibulls.nll(x)
+    assert nll.shape == (3,)
+    assert np.isclose(
+        nll[1], uclass.statistics.weibull.Weibull(lams[1], ks[1]).nll(x))
+
+
+def test_pdf_no_side_effects():
+    """Test pdf and cdf do not modify the parameters"""
+    weibull_ = uclass.statistics.weibull.Weibull(lam=lam, k=k)
+    weibull_.pdf(1., lam=2., k=3.)
+    weibull_.cdf(1., lam=2., k=3.)
+    assert (weibull_.lam, weibull_.k) == (lam, k)
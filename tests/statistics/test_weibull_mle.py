@@ -0,0 +1,121 @@
+"""Test uclass.statistics.weibull_mle"""
+import numpy as np
+import pytest
+
+import uclass.statistics.weibull_mle
+
+
+def test_fit_weibull_mle():
+    """Test fit_weibull_mle()"""
+    rng = np.random.default_rng(123)
+    x = 5 * rng.weibull(3.6, size=100000)
+    res = uclass.statistics.weibull_mle.fit_weibull_mle(x)
+    lam, k = res.x
+    assert res.success
+    assert np.isclose(lam, 5, rtol=1e-2)
+    assert np.isclose(k, 3.6, rtol=2e-2)
+
+    # The profile likelihood score vanishes at the solution.
+    g, _, _ = uclass.statistics.weibull_mle.profile_score(k, np.log(x))
+    assert np.isclose(g, 0, atol=1e-10)
+
+
+def test_fit_weibull_mle_initial_guess():
+    """Test fit_weibull_mle() with far initial guesses"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    res = uclass.statistics.weibull_mle.fit_weibull_mle(hf)
+    for k0 in [0.1, 50]:
+        res_ = uclass.statistics.weibull_mle.fit_weibull_mle(hf, k0=k0)
+        assert res_.success
+        assert np.allclose(res_.x, res.x)
+
+
+def test_fit_weibull_mle_nonpositive():
+    """Test fit_weibull_mle() with non-positive samples"""
+    with pytest.raises(ValueError):
+        uclass.statistics.weibull_mle.fit_weibull_mle([1., 0., 2.])
+
+
+def test_fit_weibull_batch():
+    """Test fit_weibull_batch()"""
+    rng = np.random.default_rng(123)
+    list_x = [
+        lam * rng.weibull(k, size=n)
+        for lam, k, n in [(5, 3.6, 1000), (8, 2., 10), (3, 6., 5000)]]
+    params, converged = uclass.statistics.weibull_mle.fit_weibull_batch(
+        list_x)
+    assert params.shape == (3, 2)
+    assert converged.all()
+    for x, params_ in zip(list_x, params):
+        res = uclass.statistics.weibull_mle.fit_weibull_mle(x)
+        assert np.allclose(params_, res.x)
+
+    # The same fits in blocks of one set and without the loop.
+    for block_size, loop_size in [(1, 10000), (10000, 10000), (1, 1)]:
+        params_, converged_ = (
+            uclass.statistics.weibull_mle.fit_weibull_batch(
+                list_x, block_size=block_size, loop_size=loop_size))
+        assert np.allclose(params_, params)
+        assert converged_.all()
+
+
+def test_fit_weibull_weighted():
+    """Test fit_weibull_weighted() against repeated samples"""
+    rng = np.random.default_rng(123)
+    x = 5 * rng.weibull(3.6, size=500)
+    weights = rng.integers(3, size=(4, 500))
+    weights[3] = 0
+    weights[3, :5] = 1  # Far from the others, refitted without expansion.
+    k_ref = uclass.statistics.weibull_mle.fit_weibull_mle(x).x[1]
+    params, converged = uclass.statistics.weibull_mle.fit_weibull_weighted(
+        x, weights)
+    params_expanded, converged_expanded = (
+        uclass.statistics.weibull_mle.fit_weibull_weighted(
+            x, weights, k0=k_ref, order=12))
+    assert converged.all() and converged_expanded.all()
+    assert np.allclose(params_expanded, params)
+    for weights_, params_ in zip(weights, params):
+        res = uclass.statistics.weibull_mle.fit_weibull_mle(
+            np.repeat(x, weights_))
+        assert np.allclose(params_, res.x)
+
+
+def test_fit_weibull_mle_degenerate():
+    """Test fits of equal samples do not report convergence"""
+    weibull_mle = uclass.statistics.weibull_mle
+    for x in [[5.], [5., 5., 5.]]:
+        res = weibull_mle.fit_weibull_mle(x)
+        assert not res.success
+        assert res.x[0] == 5. and np.isinf(res.x[1])
+    res = weibull_mle.fit_weibull_mle([5., 6., 5.], weights=[1., 0., 2.])
+    assert not res.success
+
+    rng = np.random.default_rng(123)
+    x = 8 * rng.weibull(3.6, 100)
+    params, converged = weibull_mle.fit_weibull_batch([x, [5.], [5., 5.]])
+    assert list(converged) == [True, False, False]
+    assert np.allclose(params[1:], [[5., np.inf], [5., np.inf]])
+    assert np.allclose(params[0], weibull_mle.fit_weibull_mle(x).x)
+
+    # The second set only weighs the first sample.
+    weights = np.ones((3, 100))
+    weights[1, 1:] = 0
+    weights[2, 2:] = 0
+    weights[2, 1] = 3
+    for order in [None, 12]:
+        params, converged = weibull_mle.fit_weibull_weighted(
+            x, weights, order=order)
+        assert list(converged) == [True, False, True]
+        assert params[1, 0] == x[0] and np.isinf(params[1, 1])
+        assert np.isfinite(params[2]).all()
+
+
+def test_fit_weibull_mle_maxiter():
+    """Test fits without iterations return the initial guess"""
+    weibull_mle = uclass.statistics.weibull_mle
+    x = 8 * np.random.default_rng(123).weibull(3.6, 100)
+    res = weibull_mle.fit_weibull_mle(x, maxiter=0)
+    assert not res.success
+    assert res.nit == 0 and res.x[1] == 3.6
+    params, converged = weibull_mle.fit_weibull_batch([x], maxiter=0)
+    assert not converged[0] and params[0, 1] == 3.6
@@ -0,0 +1,68 @@
+"""Test uclass.instrumentation"""
+import numpy as np
+
+import uclass
+import uclass.instrumentation
+
+
+def test_disabled():
+    """Test nothing is recorded when disabled"""
+    assert not uclass.instrumentation.is_enabled()
+    uclass.instrumentation.reset()
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    uclass.Weibull5(hf).get_hhf()
+    report = uclass.instrumentation.report()
+    assert report == {"timers": {}, "counters": {}}
+
+
+def test_collect_fit():
+    """Test collect() with a Weibull5 fit"""
+    hf = np.loadtxt("tests/data/co_23-01.txt")
+    with uclass.instrumentation.collect() as report:
+        uclass.Weibull5(hf).get_hhf()
+    report = report.to_dict()
+    assert report["timers"]["fit_weibull"]["count"] == 1
+    assert report["timers"]["fit_distribution"]["total"] > 0
+    nit = report["counters"][
+        "fit_distribution_nit{distribution=Weibull,method=mle}"]
+    nfev = report["counters"][
+        "fit_distribution_nfev{distribution=Weibull,method=mle}"]
+    assert 0 < nit <= nfev
+
+
+def test_collect_query(tmp_path):
+    """Test collect() with rows fetched and cache hits"""
+    snapshot = uclass.Snapshot.write(
+        str(tmp_path / "snapshot"), ["23-01"]*3, ["co"]*3, [5., 0., 6.],
+        [False]*3)
+    stage_data = uclass.StageData("23-01", "co", database=snapshot)
+    with uclass.instrumentation.collect() as outer:
+        stage_data.get_hf()
+        with uclass.instrumentation.collect() as inner:
+            stage_data.get_hf()
+    counters = outer.to_dict()["counters"]
+    assert counters["rows_fetched{query=get_hf,source=snapshot}"] == 3
+    assert counters["cache_misses{cache=hf}"] == 1
+    assert counters["cache_hits{cache=hf}"] == 1
+    assert outer.to_dict()["timers"]["get_hf"]["count"] == 2
+    # The inner collector only sees the cache hit.
+    assert inner.to_dict()["counters"] == {"cache_hits{cache=hf}": 1}
+
+
+def test_enable_prometheus():
+    """Test the process-wide report and its Prometheus text"""
+    uclass.instrumentation.enable()
+    try:
+        uclass.instrumentation.reset()
+        uclass.instrumentation.count("rows_fetched", 10, source="mongo")
+        uclass.instrumentation.count("rows_fetched", 5, source="mongo")
+        with uclass.instrumentation.timer("query", source="mongo"):
+            pass
+    finally:
+        uclass.instrumentation.disable()
+    text = uclass.instrumentation.prometheus_text()
+    assert "# TYPE uclass_rows_fetched_total counter\n" in text
+    assert 'uclass_rows_fetched_total{source="mongo"} 15\n' in text
+    assert 'uclass_query_seconds_count{source="mongo"} 1\n' in text
+    uclass.instrumentation.reset()
+    assert uclass.instrumentation.report()["counters"] == {}
@@ -0,0 +1,45 @@
+"""Test lazy loading of the uclass package"""
+import subprocess
+import sys
+
+import pytest
+
+import uclass
+
+
+def test_import_uclass_is_lazy():
+    """Test import uclass does not import the heavy dependencies"""
+    code = ("import sys, logging, uclass; "
+            "print(sorted(m for m in ('numpy', 'scipy', 'pandas', 'pymongo', "
+            "'uclass.statistics', 'uclass.database') if m in sys.modules)); "
+            "print(len(logging.getLogger('uclass').handlers))")
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        check=True).stdout.split("\n")
+    assert out[0] == "[]"
+    assert out[1] == "0"
+
+
+def test_lazy_attributes():
+    """Test names and subpackages load on first use"""
+    import uclass.statistics.weibull
+    assert uclass.Weibull is uclass.statistics.weibull.Weibull
+    assert uclass.statistics.Weibull is uclass.Weibull
+    assert "Weibull5" in dir(uclass)
+    assert "Weibull5" in uclass.__all__
+    with pytest.raises(AttributeError):
+        uclass.NotAName
+
+
+def test_top_level_exports():
+    """Test the top-level map matches the subpackage exports"""
+    import uclass.database
+    import uclass.hhf_methods
+    import uclass.statistics
+    names = set()
+    for subpackage in [uclass.statistics, uclass.database,
+                       uclass.hhf_methods]:
+        for name in subpackage.__all__:
+            assert getattr(uclass, name) is getattr(subpackage, name)
+        names.update(subpackage.__all__)
+    assert set(uclass.__all__) == names
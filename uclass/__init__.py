@@ -1,3 +1,38 @@
-from .statistics import *
-from .database import *
-from .hhf_methods import *
+import uclass.lazy
+
+
+# Names of the subpackages are loaded on first use, see uclass.lazy.
+# The map is written out, so that import uclass does not import the
+# subpackages, and checked against their exports by tests/test_lazy.py.
+__getattr__, __dir__, __all__ = uclass.lazy.attach(
+    __name__,
+    {
+        "Distribution": "statistics",
+        "Weibull": "statistics",
+        "LogitNormal": "statistics",
+        "profile_score": "statistics",
+        "profile_scale": "statistics",
+        "fit_weibull_mle": "statistics",
+        "fit_weibull_batch": "statistics",
+        "fit_weibull_weighted": "statistics",
+        "negative_log_likelihood": "statistics",
+        "fit_distribution": "statistics",
+        "fit_distribution_batch": "statistics",
+        "QuantileSketch": "statistics",
+        "StageData": "database",
+        "Snapshot": "database",
+        "HFCache": "database",
+        "Weibull5": "hhf_methods",
+        "regression_cost": "hhf_methods",
+        "regression_cost_grad": "hhf_methods",
+        "PPRegress": "hhf_methods",
+        "regress_divisions": "hhf_methods",
+        "FIT_VERSION": "hhf_methods",
+        "make_key": "hhf_methods",
+        "FitCache": "hhf_methods",
+        "LogitNormal5": "hhf_methods",
+        "OnlineWeibull5": "hhf_methods",
+        "OnlineHHF": "hhf_methods",
+        "bootstrap_hhf": "hhf_methods",
+    },
+    submodules=["statistics", "database", "hhf_methods"])
@@ -0,0 +1,73 @@
+import argparse
+
+
+def parser():
+    parser = argparse.ArgumentParser(
+        description="Compute the high hit factors of all classifier stages")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--snapshot", type=str,
+        help="Directory of a local snapshot, no database needed")
+    source.add_argument(
+        "--uri", type=str, default="mongodb://localhost:27017",
+        help="uri of the MongoDB instance (default: %(default)s)")
+    parser.add_argument(
+        "-o", "--output", type=str, required=True,
+        help="Output CSV file, also the checkpoint of resumed runs")
+    parser.add_argument(
+        "--parquet", type=str,
+        help="Also write the results to this Parquet file")
+    parser.add_argument(
+        "-m", "--method", choices=["weibull5", "ppregress"],
+        default="weibull5", help="HHF method (default: %(default)s)")
+    parser.add_argument(
+        "--reference", type=str,
+        help="Directory of {division}_hf_sample.pkl and "
+             "{division}_hhf_sample.pkl reference stages for ppregress")
+    parser.add_argument(
+        "-d", "--divisions", nargs="+",
+        help="Divisions (default: all divisions)")
+    parser.add_argument(
+        "-j", "--max-workers", type=int, default=1,
+        help="Number of processes, 0 for all CPU cores (default: 1)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=64,
+        help="Number of stages fitted per task (default: %(default)s)")
+    parser.add_argument(
+        "--min-scores", type=int, default=10,
+        help="Skip stages with fewer positive hit factors "
+             "(default: %(default)s)")
+    parser.add_argument(
+        "--no-resume", action="store_true",
+        help="Overwrite the output file instead of resuming")
+    return parser
+
+
+def main(args=None):
+
+    from uclass.hhf_pipeline.hhf_pipeline import HHFPipeline, load_reference
+
+    options = parser().parse_args(args)
+
+    if options.snapshot is not None:
+        from uclass.database.snapshot import Snapshot
+        database = Snapshot(options.snapshot)
+    else:
+        from uclass.database.mongo import get_client
+        database = get_client(options.uri)
+
+    reference = None
+    if options.method == "ppregress":
+        if options.reference is None:
+            parser().error("--reference is required by ppregress")
+        reference = load_reference(options.reference, options.divisions)
+
+    pipeline = HHFPipeline(
+        database, options.output, method=options.method,
+        reference=reference, divisions=options.divisions,
+        chunk_size=options.chunk_size,
+        max_workers=options.max_workers or None,
+        min_scores=options.min_scores)
+    pipeline.run(resume=not options.no_resume)
+    if options.parquet is not None:
+        pipeline.to_parquet(options.parquet)
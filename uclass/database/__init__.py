@@ -1 +1,12 @@
-from .stage_data import *
+import uclass.lazy
+
+
+__getattr__, __dir__, __all__ = uclass.lazy.attach(
+    __name__,
+    {
+        "StageData": "stage_data",
+        "Snapshot": "snapshot",
+        "HFCache": "hf_cache",
+    },
+    submodules=["stage_data", "snapshot", "hf_cache", "mongo",
+                "async_mongo"])
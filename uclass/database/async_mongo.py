@@ -0,0 +1,119 @@
+"""Asynchronous Mongo database class"""
+import asyncio
+
+import numpy as np
+import pymongo
+
+import uclass.database.mongo
+import uclass.instrumentation
+
+
+class AsyncMongo(pymongo.AsyncMongoClient):
+    """Asynchronous Mongo database class
+
+    Notes
+    -----
+    Requires pymongo>=4.9.
+    """
+    def __init__(self, uri="mongodb://localhost:27017", **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        uri : str
+            uri address of the mongodb instance
+            Default "mongodb://localhost:27017"
+        **kwargs
+            Keyword arguments passed to `pymongo.AsyncMongoClient`,
+            e.g. `maxPoolSize`.
+        """
+        super().__init__(uri, **kwargs)
+        self.uri = uri
+
+    @property
+    def uri(self):
+        """uri"""
+        return self._uri
+
+    @uri.setter
+    def uri(self, _uri):
+        """uri.setter"""
+        self._uri = _uri
+
+    @property
+    def scores(self):
+        """The scores collection"""
+        return self["zeta"].scores  #FIXME hardcoded "zeta"
+
+    async def get_hf_array(self, classifier, division, batch_size=10000):
+        """Get hit factors as an array
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+        batch_size : int, optional
+            Number of documents per cursor batch,
+            which is also the initial size of the array buffer.
+            Defaults 10000.
+
+        Returns
+        -------
+        hf : array
+            Hit factors, excluding bad ones.
+            See `uclass.database.mongo.Mongo.get_hf_array`.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive.")
+        query = {
+            "classifier": classifier,
+            "division": division,
+            "bad": uclass.database.mongo.NOT_BAD,
+        }
+        cursor = self.scores.find(
+            query, projection={"_id": 0, "hf": 1}, batch_size=batch_size)
+
+        hf = np.empty(batch_size)
+        n = 0
+        async for item in cursor:
+            if n == len(hf):
+                hf.resize(2*len(hf), refcheck=False)
+            hf[n] = item["hf"]
+            n += 1
+        hf.resize(n, refcheck=False)
+        uclass.instrumentation.count(
+            "rows_fetched", n, source="mongo", query="get_hf_array_async")
+        return hf
+
+    async def get_hf_many(self, pairs, max_concurrency=16):
+        """Get positive hit factors of many classifiers concurrently
+
+        Parameters
+        ----------
+        pairs : list of tuple
+            The (classifier, division) pairs, e.g. [("23-01", "co")].
+        max_concurrency : int, optional
+            Maximum number of queries in flight.
+            Defaults 16.
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each (classifier, division) pair.
+            Bad and zero hit factors are excluded.
+        """
+        pairs = [tuple(pair) for pair in pairs]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def get_hf(classifier, division):
+            """Positive hit factors of a pair"""
+            async with semaphore:
+                hf = await self.get_hf_array(classifier, division)
+            return hf[hf>0]
+
+        list_hf = await asyncio.gather(
+            *(get_hf(classifier, division) for classifier, division in pairs))
+        return dict(zip(pairs, list_hf))
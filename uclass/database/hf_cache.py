@@ -0,0 +1,131 @@
+"""Cache of hit factors"""
+import collections
+import threading
+import time
+
+import uclass.instrumentation
+
+
+class HFCache:
+    """Cache of hit factors
+
+    Notes
+    -----
+    Hit factors are keyed by classifier, division and options,
+    so changing the stage of a `StageData` never returns stale data.
+    A cache can be shared by many `StageData` instances
+    reading from the same database, from many threads.
+    """
+    def __init__(self, ttl=None, maxsize=None):
+        """Constructor
+
+        Parameters
+        ----------
+        ttl : float, optional
+            Time to live of cached hit factors in seconds.
+            Defaults None, i.e. never expire.
+        maxsize : int, optional
+            Maximum number of cached entries.
+            The least recently used entries are evicted.
+            Defaults None, i.e. unlimited.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        """Time to live in seconds"""
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, _ttl):
+        """ttl.setter"""
+        self._ttl = _ttl
+
+    @property
+    def maxsize(self):
+        """Maximum number of cached entries"""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, _maxsize):
+        """maxsize.setter"""
+        self._maxsize = _maxsize
+
+    def get(self, key):
+        """Get cached hit factors
+
+        Parameters
+        ----------
+        key : tuple
+            The cache key.
+
+        Returns
+        -------
+        hf : array or None
+            The cached hit factors, None if not cached or expired.
+        """
+        with self._lock:
+            hf = None
+            entry = self._entries.get(key)
+            if entry is not None:
+                timestamp, hf = entry
+                if (self.ttl is None
+                        or time.monotonic() - timestamp < self.ttl):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    del self._entries[key]
+                    hf = None
+            if hf is None:
+                self.misses += 1
+        if hf is None:
+            uclass.instrumentation.count("cache_misses", cache="hf")
+        else:
+            uclass.instrumentation.count("cache_hits", cache="hf")
+        return hf
+
+    def set(self, key, hf):
+        """Cache hit factors
+
+        Parameters
+        ----------
+        key : tuple
+            The cache key.
+        hf : array
+            The hit factors.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), hf)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def invalidate(self, classifier=None, division=None):
+        """Remove cached hit factors
+
+        Parameters
+        ----------
+        classifier : str, optional
+            Only remove entries of this classifier.
+            Defaults None, i.e. all classifiers.
+        division : str, optional
+            Only remove entries of this division.
+            Defaults None, i.e. all divisions.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if classifier is not None and key[0] != classifier:
+                    continue
+                if division is not None and key[1] != division:
+                    continue
+                del self._entries[key]
+
+    def __len__(self):
+        """Number of cached entries"""
+        return len(self._entries)
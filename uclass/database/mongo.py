@@ -1,12 +1,84 @@
 """Mongo database class"""
+import itertools
+import operator
+import os
+import threading
+
 import pymongo.mongo_client
-import pandas
 import numpy as np
 
+import uclass.instrumentation
+
+
+# Filter of scores not flagged bad, i.e. without a truthy "bad" field,
+# as `Mongo.get_hf` skips them.
+NOT_BAD = {"$in": [None, False, 0, ""]}
+
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+def get_client(uri="mongodb://localhost:27017", **kwargs):
+    """Get the shared Mongo client of a uri
+
+    Parameters
+    ----------
+    uri : str, optional
+        uri address of the mongodb instance
+        Default "mongodb://localhost:27017"
+    **kwargs
+        Keyword arguments passed to `Mongo`,
+        e.g. `maxPoolSize` and `minPoolSize`.
+        `connect` defaults False, i.e. connect on the first operation.
+
+    Returns
+    -------
+    mongo : Mongo
+        The client, created on the first call with the same arguments
+        in this process and reused afterwards.
+
+    Notes
+    -----
+    MongoClient is not fork-safe. Clients created in a parent process
+    are not reused by forked children, e.g. process pool workers,
+    which create their own.
+    """
+    global _clients_pid
+    kwargs.setdefault("connect", False)
+    key = (uri, tuple(sorted(kwargs.items())))
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if key not in _clients:
+            _clients[key] = Mongo(uri, **kwargs)
+        return _clients[key]
+
+
+def close_clients():
+    """Close and forget all shared Mongo clients"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _reset_clients():
+    """Forget clients inherited from the parent process"""
+    global _clients_lock, _clients_pid
+    _clients_lock = threading.Lock()
+    _clients.clear()
+    _clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
+
 
 class Mongo(pymongo.mongo_client.MongoClient):
     """Mongo database class"""
-    def __init__(self, uri="mongodb://localhost:27017"):
+    def __init__(self, uri="mongodb://localhost:27017", **kwargs):
         """Constructor
 
         Parameters
@@ -14,8 +86,11 @@ class Mongo(pymongo.mongo_client.MongoClient):
         uri : str
             uri address of the mongodb instance
             Default "mongodb://localhost:27017"
+        **kwargs
+            Keyword arguments passed to `pymongo.MongoClient`,
+            e.g. `maxPoolSize`.
         """
-        super().__init__(uri)
+        super().__init__(uri, **kwargs)
         self.uri = uri
 
     @property
@@ -27,7 +102,13 @@ class Mongo(pymongo.mongo_client.MongoClient):
     def uri(self, _uri):
         """uri.setter"""
         self._uri = _uri
+
+    @property
+    def scores(self):
+        """The scores collection"""
+        return self["zeta"].scores  #FIXME hardcoded "zeta"
     
+    @uclass.instrumentation.timed("query", source="mongo", query="get_hf")
     def get_hf(self, classifier, division):
         """Get hit factors
         
@@ -44,7 +125,7 @@ class Mongo(pymongo.mongo_client.MongoClient):
         hf : list
             Hit factors.
         """
-        db = self["zeta"].scores  #FIXME hardcoded "zeta"
+        db = self.scores
         query = [{'$match': {'classifier': classifier}},
                  {'$match': {'division': division}}]
 
@@ -55,8 +136,235 @@ class Mongo(pymongo.mongo_client.MongoClient):
                     continue
             hf.append(item["hf"])
 
+        uclass.instrumentation.count(
+            "rows_fetched", len(hf), source="mongo", query="get_hf")
         return hf
-    
+
+    @uclass.instrumentation.timed(
+        "query", source="mongo", query="get_hf_array")
+    def get_hf_array(self, classifier, division, batch_size=10000):
+        """Get hit factors as an array, streaming the cursor
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+        batch_size : int, optional
+            Number of documents per cursor batch,
+            which is also the initial size of the array buffer.
+            Defaults 10000.
+
+        Returns
+        -------
+        hf : array
+            Hit factors.
+
+        Notes
+        -----
+        Same hit factors as `get_hf`, but the documents are consumed
+        in batches and written into a growing float64 buffer,
+        without materializing lists of documents or hit factors.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive.")
+        query = {
+            "classifier": classifier,
+            "division": division,
+            "bad": NOT_BAD,
+        }
+        cursor = self.scores.find(
+            query, projection={"_id": 0, "hf": 1}, batch_size=batch_size)
+        values = (item["hf"] for item in cursor)
+
+        hf = np.empty(batch_size)
+        n = 0
+        while True:
+            batch = np.fromiter(
+                itertools.islice(values, batch_size), dtype=np.float64)
+            if n + len(batch) > len(hf):
+                hf.resize(2*len(hf), refcheck=False)
+            hf[n:n+len(batch)] = batch
+            n += len(batch)
+            if len(batch) < batch_size:
+                break
+        hf.resize(n, refcheck=False)
+        uclass.instrumentation.count(
+            "rows_fetched", n, source="mongo", query="get_hf_array")
+        return hf
+
+    @uclass.instrumentation.timed(
+        "query", source="mongo", query="get_hf_many")
+    def get_hf_many(self, pairs, batch_size=10000):
+        """Get positive hit factors of many classifiers in one query
+
+        Parameters
+        ----------
+        pairs : list of tuple
+            The (classifier, division) pairs, e.g. [("23-01", "co")].
+        batch_size : int, optional
+            Number of documents per cursor batch.
+            Defaults 10000.
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each (classifier, division) pair.
+            Bad and zero hit factors are excluded.
+        """
+        pairs = [tuple(pair) for pair in pairs]
+        hf = {pair: np.empty(0) for pair in pairs}
+        if not pairs:
+            return hf
+        match = {
+            "$or": [
+                {"classifier": classifier, "division": division}
+                for classifier, division in pairs],
+            "bad": NOT_BAD,
+            "hf": {"$gt": 0},
+        }
+        hf.update(self._group_hf(
+            match, operator.itemgetter("classifier", "division"),
+            batch_size))
+        uclass.instrumentation.count(
+            "rows_fetched", sum(len(hf_) for hf_ in hf.values()),
+            source="mongo", query="get_hf_many")
+        return hf
+
+    @uclass.instrumentation.timed(
+        "query", source="mongo", query="get_hf_all")
+    def get_hf_all(self, division, batch_size=10000):
+        """Get positive hit factors of all classifiers of a division
+
+        Parameters
+        ----------
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+        batch_size : int, optional
+            Number of documents per cursor batch.
+            Defaults 10000.
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each classifier.
+            Bad and zero hit factors are excluded.
+        """
+        match = {
+            "division": division,
+            "bad": NOT_BAD,
+            "hf": {"$gt": 0},
+        }
+        hf = self._group_hf(
+            match, operator.itemgetter("classifier"), batch_size)
+        uclass.instrumentation.count(
+            "rows_fetched", sum(len(hf_) for hf_ in hf.values()),
+            source="mongo", query="get_hf_all")
+        return hf
+
+    @uclass.instrumentation.timed(
+        "query", source="mongo", query="get_counts")
+    def get_counts(self, division):
+        """Count positive hit factors of all classifiers of a division
+
+        Parameters
+        ----------
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+
+        Returns
+        -------
+        counts : dict
+            Number of hit factors of each classifier,
+            as in `get_hf_all` but without fetching them.
+        """
+        query = [
+            {"$match": {
+                "division": division,
+                "bad": NOT_BAD,
+                "hf": {"$gt": 0},
+            }},
+            {"$group": {"_id": "$classifier", "n": {"$sum": 1}}},
+        ]
+        counts = {}
+        for item in self.scores.aggregate(query, allowDiskUse=True):
+            counts[item["_id"]] = item["n"]
+        return counts
+
+    def _group_hf(self, match, key, batch_size):
+        """Stream hit factors and group them client-side
+
+        Parameters
+        ----------
+        match : dict
+            The filter of the scores.
+        key : func
+            The group key of a score document,
+            e.g. `operator.itemgetter("classifier")`.
+        batch_size : int
+            Number of documents per cursor batch.
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each group.
+
+        Notes
+        -----
+        Grouping server-side with `$group` and `$push` builds one
+        document per group, which exceeds the 16 MB BSON limit for
+        stages of about a million scores.
+        As in `get_hf_array`, the documents are consumed in batches and
+        the hit factors of each group written into a growing float64
+        buffer.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive.")
+        cursor = self.scores.find(
+            match, projection={"_id": 0, "classifier": 1, "division": 1,
+                               "hf": 1},
+            batch_size=batch_size)
+        get_hf = operator.itemgetter("hf")
+        codes = {}
+        buffers = []
+        counts = []
+        while True:
+            docs = list(itertools.islice(cursor, batch_size))
+            if not docs:
+                break
+            # Mapped C functions, no Python code runs per document.
+            values = np.fromiter(
+                map(get_hf, docs), dtype=np.float64, count=len(docs))
+            keys = list(map(key, docs))
+            for group in set(keys).difference(codes):
+                codes[group] = len(codes)
+            batch_codes = np.fromiter(
+                map(codes.__getitem__, keys), dtype=np.intp, count=len(keys))
+            while len(buffers) < len(codes):
+                buffers.append(np.empty(16))
+                counts.append(0)
+            order = np.argsort(batch_codes, kind="stable")
+            batch_codes = batch_codes[order]
+            values = values[order]
+            bounds = np.concatenate([
+                [0], np.flatnonzero(np.diff(batch_codes)) + 1, [len(docs)]])
+            for code, start, stop in zip(
+                    batch_codes[bounds[:-1]].tolist(), bounds[:-1].tolist(),
+                    bounds[1:].tolist()):
+                hf, n = buffers[code], counts[code]
+                m = n + stop - start
+                if m > len(hf):
+                    hf.resize(max(2*len(hf), m), refcheck=False)
+                hf[n:m] = values[start:stop]
+                counts[code] = m
+        for hf, n in zip(buffers, counts):
+            hf.resize(n, refcheck=False)
+        return {group: buffers[code] for group, code in codes.items()}
+
     def ping(self):
         """pings hitfactor.info mongo database to check connection"""
         try:
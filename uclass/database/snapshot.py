@@ -0,0 +1,260 @@
+"""Local columnar snapshot of the scores"""
+import json
+import os
+
+import numpy as np
+
+import uclass.instrumentation
+
+
+class Snapshot:
+    """Local columnar snapshot of the scores
+
+    Notes
+    -----
+    The snapshot is a directory of NumPy arrays, one per column
+    ("classifier", "division", "hf", "bad"), and an index.
+    Rows are sorted by classifier and division, and within each
+    (classifier, division) by positive, zero and bad hit factors,
+    so the hit factors of a stage are contiguous slices of
+    the memory-mapped "hf" column and are returned without copying.
+    """
+    columns = ["classifier", "division", "hf", "bad"]
+
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            Directory of the snapshot.
+        """
+        self.path = path
+        self.data = {
+            column: np.load(
+                os.path.join(path, f"{column}.npy"), mmap_mode="r")
+            for column in self.columns}
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+        self.index = {
+            (classifier, division): tuple(bounds)
+            for classifier, division, *bounds in index}
+
+    @property
+    def path(self):
+        """Directory of the snapshot"""
+        return self._path
+
+    @path.setter
+    def path(self, _path):
+        """path.setter"""
+        self._path = _path
+
+    @staticmethod
+    def write(path, classifier, division, hf, bad=None):
+        """Write a snapshot
+
+        Parameters
+        ----------
+        path : str
+            Directory of the snapshot. Created if it does not exist.
+        classifier : array-like
+            Classifier of each score.
+        division : array-like
+            Division of each score.
+        hf : array-like
+            Hit factor of each score.
+        bad : array-like, optional
+            Whether each score is bad.
+            Defaults None, i.e. no bad scores.
+
+        Returns
+        -------
+        Snapshot
+        """
+        classifier = np.asarray(classifier, dtype=str)
+        division = np.asarray(division, dtype=str)
+        hf = np.asarray(hf, dtype=np.float64)
+        if bad is None:
+            bad = np.zeros(len(hf), dtype=bool)
+        bad = np.asarray(bad, dtype=bool)
+
+        # 0: positive, 1: zero, 2: bad.
+        category = np.where(bad, 2, np.where(hf > 0, 0, 1))
+        order = np.lexsort((category, division, classifier))
+        data = {
+            "classifier": classifier[order],
+            "division": division[order],
+            "hf": hf[order],
+            "bad": bad[order],
+        }
+        category = category[order]
+
+        os.makedirs(path, exist_ok=True)
+        for column in Snapshot.columns:
+            np.save(os.path.join(path, f"{column}.npy"), data[column])
+
+        # Each entry is [classifier, division, start, stop of positive,
+        # stop of good, stop].
+        n = len(hf)
+        new_stage = np.ones(n, dtype=bool)
+        new_stage[1:] = (
+            (data["classifier"][1:] != data["classifier"][:-1])
+            | (data["division"][1:] != data["division"][:-1]))
+        starts = np.flatnonzero(new_stage)
+        stops = np.append(starts[1:], n)
+        index = []
+        for start, stop in zip(starts, stops):
+            stop_positive, stop_good = start + np.searchsorted(
+                category[start:stop], [1, 2])
+            index.append([
+                str(data["classifier"][start]), str(data["division"][start]),
+                int(start), int(stop_positive), int(stop_good), int(stop)])
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump(index, f)
+
+        return Snapshot(path)
+
+    @staticmethod
+    def from_mongo(mongo, path, batch_size=10000):
+        """Snapshot the scores of a Mongo database
+
+        Parameters
+        ----------
+        mongo : uclass.database.mongo.Mongo
+            The Mongo database.
+        path : str
+            Directory of the snapshot. Created if it does not exist.
+        batch_size : int, optional
+            Number of documents per cursor batch.
+            Defaults 10000.
+
+        Returns
+        -------
+        Snapshot
+        """
+        projection = {"_id": 0, "classifier": 1, "division": 1,
+                      "hf": 1, "bad": 1}
+        cursor = mongo.scores.find(
+            {}, projection=projection, batch_size=batch_size)
+        data = {column: [] for column in Snapshot.columns}
+        for item in cursor:
+            data["classifier"].append(item["classifier"])
+            data["division"].append(item["division"])
+            data["hf"].append(item["hf"])
+            data["bad"].append(bool(item.get("bad", False)))
+        return Snapshot.write(path, **data)
+
+    def classifiers(self, division=None):
+        """Classifiers in the snapshot
+
+        Parameters
+        ----------
+        division : str, optional
+            Only classifiers with scores in this division.
+            Defaults None, i.e. all divisions.
+
+        Returns
+        -------
+        classifiers : list of str
+        """
+        classifiers = {
+            classifier for classifier, division_ in self.index
+            if division is None or division_ == division}
+        return sorted(classifiers)
+
+    def get_hf(self, classifier, division):
+        """Get hit factors
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+
+        Returns
+        -------
+        hf : array
+            Hit factors, excluding bad ones.
+            A read-only view of the snapshot.
+        """
+        start, _, stop_good, _ = self.index.get(
+            (classifier, division), (0, 0, 0, 0))
+        uclass.instrumentation.count(
+            "rows_fetched", stop_good-start, source="snapshot",
+            query="get_hf")
+        return self.data["hf"][start:stop_good]
+
+    def get_hf_array(self, classifier, division):
+        """Get hit factors, same as `get_hf`"""
+        return self.get_hf(classifier, division)
+
+    def get_hf_many(self, pairs):
+        """Get positive hit factors of many classifiers
+
+        Parameters
+        ----------
+        pairs : list of tuple
+            The (classifier, division) pairs, e.g. [("23-01", "co")].
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each (classifier, division) pair.
+            Bad and zero hit factors are excluded.
+        """
+        hf = {}
+        for pair in pairs:
+            pair = tuple(pair)
+            start, stop_positive, _, _ = self.index.get(pair, (0, 0, 0, 0))
+            hf[pair] = self.data["hf"][start:stop_positive]
+        uclass.instrumentation.count(
+            "rows_fetched", sum(len(hf_) for hf_ in hf.values()),
+            source="snapshot", query="get_hf_many")
+        return hf
+
+    def get_hf_all(self, division):
+        """Get positive hit factors of all classifiers of a division
+
+        Parameters
+        ----------
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+
+        Returns
+        -------
+        hf : dict
+            Hit factors (array) of each classifier.
+            Bad and zero hit factors are excluded.
+        """
+        hf = {}
+        for (classifier, division_), bounds in self.index.items():
+            if division_ == division and bounds[1] > bounds[0]:
+                hf[classifier] = self.data["hf"][bounds[0]:bounds[1]]
+        uclass.instrumentation.count(
+            "rows_fetched", sum(len(hf_) for hf_ in hf.values()),
+            source="snapshot", query="get_hf_all")
+        return hf
+
+    def get_counts(self, division):
+        """Count positive hit factors of all classifiers of a division
+
+        Parameters
+        ----------
+        division : str
+            The division, choose from
+            ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
+
+        Returns
+        -------
+        counts : dict
+            Number of hit factors of each classifier,
+            as in `get_hf_all` but without reading them.
+        """
+        return {
+            classifier: bounds[1] - bounds[0]
+            for (classifier, division_), bounds in self.index.items()
+            if division_ == division and bounds[1] > bounds[0]}
@@ -1,10 +1,18 @@
 """Stage data class"""
+import asyncio
+import inspect
+
 import numpy as np
 
+import uclass.database.hf_cache
+import uclass.database.snapshot
+import uclass.instrumentation
+
 
 class StageData:
     """Stage data"""
-    def __init__(self, classifier, division, database="MongoDB"):
+    def __init__(self, classifier, division, database="MongoDB", path=None,
+                 cache=None, uri="mongodb://localhost:27017"):
         """Constructor
 
         Parameters
@@ -14,20 +22,44 @@ class StageData:
         division : str
             The division, choose from
             ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"].
-        database : str
+        database : str or object
             Database to be used.
-            Choose from ["MongoDB", "USPSA"].
+            Choose from ["MongoDB", "snapshot"],
+            or a database instance, e.g. `uclass.database.mongo.Mongo`,
+            with a `get_hf_array` or `get_hf` method.
+            "MongoDB" uses the shared client of `uri`, which is
+            created on the first query.
             Default "MongoDB".
+        path : str, optional
+            Directory of the snapshot if `database` is "snapshot".
+            See `uclass.database.snapshot.Snapshot`.
+        cache : uclass.database.hf_cache.HFCache, optional
+            Cache of hit factors, which can be shared by instances
+            reading from the same database.
+            Defaults None, i.e. a new cache private to this instance.
+        uri : str, optional
+            uri address of the mongodb instance if `database` is "MongoDB".
+            Default "mongodb://localhost:27017"
         """
         self.classifier = classifier
         self.division = division
+        self.uri = uri
 
-        if database == "MongoDB":
-            import uclass.database.mongo
-            self.database = uclass.database.mongo.Mongo()
+        if not isinstance(database, str):
+            self.database = database
+        elif database == "MongoDB":
+            self.database = None  # Shared client, see database.
+        elif database == "snapshot":
+            if path is None:
+                raise ValueError("path of the snapshot is required.")
+            self.database = uclass.database.snapshot.Snapshot(path)
         else:
             raise ValueError(f"Database {database} not supported.")
 
+        if cache is None:
+            cache = uclass.database.hf_cache.HFCache()
+        self.cache = cache
+
     @property
     def classifier(self):
         """Classifier"""
@@ -50,7 +82,7 @@ class StageData:
 
     @property
     def hf(self):
-        """Hit factors"""
+        """Hit factors, cached"""
         return self.get_hf()
 
     # @hf.setter
@@ -58,9 +90,22 @@ class StageData:
     #     """hf.setter"""
     #     self._hf = _hf
 
+    @property
+    def uri(self):
+        """uri address of the mongodb instance"""
+        return self._uri
+
+    @uri.setter
+    def uri(self, _uri):
+        """uri.setter"""
+        self._uri = _uri
+
     @property
     def database(self):
         """Database"""
+        if self._database is None:
+            import uclass.database.mongo
+            self._database = uclass.database.mongo.get_client(self.uri)
         return self._database
 
     @database.setter
@@ -68,6 +113,17 @@ class StageData:
         """database.setter"""
         self._database = _database
 
+    @property
+    def cache(self):
+        """Cache of hit factors"""
+        return self._cache
+
+    @cache.setter
+    def cache(self, _cache):
+        """cache.setter"""
+        self._cache = _cache
+
+    @uclass.instrumentation.timed("get_hf")
     def get_hf(self, include_zeros=False):
         """Get hit factors
         
@@ -76,10 +132,90 @@ class StageData:
         include_zeros : bool, optional
             Include zero hit factor.
             Default False.
+
+        Returns
+        -------
+        hf : array
+            Hit factors. Read-only, as it is shared with the cache.
+        """
+        key = (self.classifier, self.division, include_zeros)
+        hf = self.cache.get(key)
+        if hf is not None:
+            return hf
+
+        hf = self._get_hf_array()(self.classifier, self.division)
+        if not include_zeros:
+            hf = hf[hf>0]
+        hf.flags.writeable = False
+        self.cache.set(key, hf)
+        return hf
+
+    async def aget_hf(self, include_zeros=False):
+        """Get hit factors asynchronously
+
+        Parameters
+        ----------
+        include_zeros : bool, optional
+            Include zero hit factor.
+            Default False.
+
+        Returns
+        -------
+        hf : array
+            Hit factors. Read-only, as it is shared with the cache.
+
+        Notes
+        -----
+        Databases with a coroutine `get_hf_array`,
+        e.g. `uclass.database.async_mongo.AsyncMongo`, are awaited.
+        Others are queried in a thread of the default executor.
         """
-        hf = self.database.get_hf(self.classifier, self.division)
-        hf = np.array(hf)
+        key = (self.classifier, self.division, include_zeros)
+        hf = self.cache.get(key)
+        if hf is not None:
+            return hf
+
+        get_hf_array = self._get_hf_array()
+        if inspect.iscoroutinefunction(get_hf_array):
+            hf = await get_hf_array(self.classifier, self.division)
+        else:
+            loop = asyncio.get_running_loop()
+            hf = await loop.run_in_executor(
+                None, get_hf_array, self.classifier, self.division)
         if not include_zeros:
             hf = hf[hf>0]
+        hf.flags.writeable = False
+        self.cache.set(key, hf)
         return hf
 
+    def _get_hf_array(self):
+        """Hit factor query of the database
+
+        Returns
+        -------
+        get_hf_array : func
+            `get_hf_array(classifier, division)` of the database,
+            or of its `get_hf` if it has no `get_hf_array`,
+            returning a float array.
+        """
+        get_hf_array = getattr(self.database, "get_hf_array", None)
+        if get_hf_array is not None:
+            return get_hf_array
+        get_hf = self.database.get_hf
+
+        def get_hf_array(classifier, division):
+            # A copy, the database may hold on to its hit factors.
+            return np.array(get_hf(classifier, division), dtype=float)
+        return get_hf_array
+
+    def refresh(self):
+        """Discard cached hit factors of this stage
+
+        Returns
+        -------
+        hf : array
+            Hit factors queried from the database.
+        """
+        self.cache.invalidate(self.classifier, self.division)
+        return self.get_hf()
+
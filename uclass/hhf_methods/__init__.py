@@ -1,2 +1,21 @@
-from .weibull5 import *
-from .ppregress import *
+import uclass.lazy
+
+
+__getattr__, __dir__, __all__ = uclass.lazy.attach(
+    __name__,
+    {
+        "Weibull5": "weibull5",
+        "regression_cost": "ppregress",
+        "regression_cost_grad": "ppregress",
+        "PPRegress": "ppregress",
+        "regress_divisions": "ppregress",
+        "FIT_VERSION": "fit_cache",
+        "make_key": "fit_cache",
+        "FitCache": "fit_cache",
+        "LogitNormal5": "logitnormal5",
+        "OnlineWeibull5": "online_weibull5",
+        "OnlineHHF": "online_weibull5",
+        "bootstrap_hhf": "bootstrap",
+    },
+    submodules=["weibull5", "ppregress", "fit_cache", "logitnormal5",
+                "online_weibull5", "bootstrap"])
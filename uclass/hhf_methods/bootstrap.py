@@ -0,0 +1,119 @@
+"""Bootstrap confidence intervals of high hit factors"""
+import concurrent.futures
+
+import numpy as np
+
+import uclass.instrumentation
+import uclass.statistics.weibull
+import uclass.statistics.weibull_mle
+
+
+@uclass.instrumentation.timed("bootstrap_hhf")
+def bootstrap_hhf(hf, percentile=0.95, percentage=0.85, n_resamples=1000,
+                  confidence=0.95, chunk_size=100, max_workers=1, rng=123,
+                  k0=3.6):
+    """Bootstrap confidence interval of the Weibull 5 high hit factor
+
+    Parameters
+    ----------
+    hf : array-like
+        List of hit factors.
+    percentile : float, optional
+        The percentile to match a certain hit factor percentage.
+        Defaults 0.95.
+    percentage : float, optional
+        The hit factor percentage (in fraction) of the percentile.
+        Defaults 0.85.
+    n_resamples : int, optional
+        Number of bootstrap replicates.
+        Defaults 1000.
+    confidence : float, optional
+        Confidence level of the interval.
+        Defaults 0.95.
+    chunk_size : int, optional
+        Number of replicates resampled and fitted at once.
+        Memory scales with `chunk_size * len(hf)`.
+        Defaults 100.
+    max_workers : int, optional
+        Number of processes the chunks are spread over.
+        The chunks are processed in this process if it is 1.
+        None means the number of CPU cores.
+        Defaults 1.
+    rng : int, optional
+        Seed of the resampling.
+        Each chunk is seeded by a child of `numpy.random.SeedSequence(rng)`,
+        so the result does not depend on `max_workers`.
+        Defaults 123.
+    k0 : float, optional
+        Initial guess of the shape parameter.
+        Defaults 3.6.
+
+    Returns
+    -------
+    result : dict
+        "confidence_interval": (low, high) percentile interval of the HHF.
+        "standard_error": standard error of the HHF.
+        "bootstrap_distribution": HHF of each replicate,
+        NaN if the fit did not converge.
+
+    Notes
+    -----
+    A resample only changes how many times each hit factor is counted,
+    so the resample indices of a chunk are generated as one matrix,
+    reduced to counts, and the replicates are fitted at once with
+    `uclass.statistics.weibull_mle.fit_weibull_weighted`,
+    expanding the power sums around the fit to all hit factors.
+    """
+    hf = np.asarray(hf, dtype=float).ravel()
+    # The replicates are expanded around the fit to all hit factors.
+    k_hat = uclass.statistics.weibull_mle.fit_weibull_mle(hf, k0=k0).x[1]
+    sizes = [chunk_size] * (n_resamples//chunk_size)
+    if n_resamples % chunk_size:
+        sizes.append(n_resamples % chunk_size)
+    seeds = np.random.SeedSequence(rng).spawn(len(sizes))
+    tasks = [
+        (hf, seed, size, percentile, percentage, k_hat)
+        for seed, size in zip(seeds, sizes)]
+
+    if max_workers == 1:
+        results = list(map(_bootstrap_chunk, tasks))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(_bootstrap_chunk, tasks))
+    hhf = np.concatenate(results)
+
+    alpha = (1-confidence) / 2
+    low, high = np.nanquantile(hhf, [alpha, 1-alpha])
+    result = {
+        "confidence_interval": (float(low), float(high)),
+        "standard_error": float(np.nanstd(hhf, ddof=1)),
+        "bootstrap_distribution": hhf,
+    }
+    return result
+
+
+def _bootstrap_chunk(task):
+    """High hit factors of a chunk of replicates, for process pools
+
+    Parameters
+    ----------
+    task : tuple
+        (hf, seed, size, percentile, percentage, k_hat).
+
+    Returns
+    -------
+    hhf : array
+        The high hit factor of each replicate.
+    """
+    hf, seed, size, percentile, percentage, k_hat = task
+    rng = np.random.default_rng(seed)
+    n = len(hf)
+    indices = rng.integers(n, size=(size, n))
+    indices += n * np.arange(size)[:, np.newaxis]
+    counts = np.bincount(indices.ravel(), minlength=size*n).reshape(size, n)
+    params, converged = uclass.statistics.weibull_mle.fit_weibull_weighted(
+        hf, counts, k0=k_hat, order=12)
+    weibull = uclass.statistics.weibull.Weibull(params[:, 0], params[:, 1])
+    hhf = weibull.quantile(percentile) / percentage
+    hhf[~converged] = np.nan
+    return hhf
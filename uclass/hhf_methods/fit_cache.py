@@ -0,0 +1,171 @@
+"""Cache of fitted parameters"""
+import collections
+import hashlib
+import sqlite3
+
+import numpy as np
+
+import uclass.instrumentation
+
+
+# Bump when a change of the fitting methods changes their results,
+# so that parameters cached by older versions are not reused.
+FIT_VERSION = 2
+
+
+def make_key(kind, *arrays, **options):
+    """Make a cache key from the content of arrays and options
+
+    Parameters
+    ----------
+    kind : str
+        The kind of the cached values, e.g. "weibull".
+    *arrays : array-like
+        The data, e.g. hit factors.
+    **options
+        Options that change the cached values, e.g. the fitting method.
+
+    Returns
+    -------
+    key : str
+        The cache key.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{kind}:{FIT_VERSION}".encode())
+    for key in sorted(options):
+        h.update(f":{key}={options[key]!r}".encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        h.update(f":{array.shape}".encode())
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+class FitCache:
+    """Cache of fitted parameters
+
+    Notes
+    -----
+    Values are arrays of floats, e.g. `[lam, k]` of a Weibull fit.
+    Recently used values are kept in memory.
+    If a path is given, values are also stored in an SQLite database
+    so they persist across processes and sessions.
+    """
+    def __init__(self, maxsize=4096, path=None):
+        """Constructor
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of values kept in memory.
+            Defaults 4096.
+        path : str, optional
+            Path of the SQLite database file.
+            Defaults None, i.e. memory only.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fit_cache "
+                "(key TEXT PRIMARY KEY, value BLOB)")
+            self._connection.commit()
+
+    @property
+    def maxsize(self):
+        """Maximum number of values kept in memory"""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, _maxsize):
+        """maxsize.setter"""
+        self._maxsize = _maxsize
+
+    @property
+    def path(self):
+        """Path of the SQLite database file"""
+        return self._path
+
+    @path.setter
+    def path(self, _path):
+        """path.setter"""
+        self._path = _path
+
+    def get(self, key):
+        """Get cached values
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        values : array or None
+            The cached values, None if not cached.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            uclass.instrumentation.count("cache_hits", cache="fit")
+            return self._memory[key].copy()
+        if self._connection is not None:
+            row = self._connection.execute(
+                "SELECT value FROM fit_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                values = np.frombuffer(row[0], dtype=float)
+                self._remember(key, values)
+                self.hits += 1
+                uclass.instrumentation.count("cache_hits", cache="fit")
+                return values.copy()
+        self.misses += 1
+        uclass.instrumentation.count("cache_misses", cache="fit")
+        return None
+
+    def set(self, key, values):
+        """Cache values
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        values : array-like
+            The values to cache.
+        """
+        values = np.array(values, dtype=float).ravel()
+        self._remember(key, values)
+        if self._connection is not None:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO fit_cache (key, value) VALUES (?, ?)",
+                (key, values.tobytes()))
+            self._connection.commit()
+
+    def clear(self):
+        """Remove all cached values"""
+        self._memory.clear()
+        if self._connection is not None:
+            self._connection.execute("DELETE FROM fit_cache")
+            self._connection.commit()
+
+    def close(self):
+        """Close the SQLite database"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        """Number of values kept in memory"""
+        return len(self._memory)
+
+    def _remember(self, key, values):
+        """Keep values in memory, evicting the least recently used"""
+        self._memory[key] = values
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
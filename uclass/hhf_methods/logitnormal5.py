@@ -0,0 +1,196 @@
+"""Logit-normal 5 method"""
+import numpy as np
+
+import uclass.hhf_methods.fit_cache
+import uclass.statistics.fitting
+import uclass.statistics.logitnormal
+
+
+class LogitNormal5:
+    """Logit-normal 5
+
+    Notes
+    -----
+    This method fits a logit-normal distribution to the hit factors
+    normalized by `scale`, i.e. `hf / scale` in (0, 1).
+    The maximum likelihood fit is in closed form, the mean and
+    standard deviation of the logit of the normalized hit factors,
+    so it is a single vectorized pass over the data and
+    a cheap cross-check of `uclass.hhf_methods.weibull5.Weibull5`.
+    The high hit factor is then defined as
+    `scale * logitnormal.quantile(percentile) / percentage`,
+    with default `percentile = 0.95` and `percentage = 0.85`,
+    i.e. Top 5 percent shooters are at least M class.
+
+    The default `scale` is 1.1 times the maximum hit factor,
+    so a single outlier shifts the fit. With `clip`, the hit factors
+    are clipped to their 99th percentile, which is robust to outliers
+    but lowers the fitted spread, and so the high hit factor.
+    """
+    def __init__(self, hf, percentile=0.95, percentage=0.85, scale=None,
+                 cache=None, clip=False):
+        """Constructor
+
+        Parameters
+        ----------
+        hf : array-like
+            List of hit factors.
+        percentile : float, optional
+            The percentile to match a certain hit factor percentage.
+            Defaults 0.95.
+        percentage : float, optional
+            The hit factor percentage (in fraction) of the percentile.
+            Defaults 0.85.
+        scale : float, optional
+            The hit factors are normalized by this scale,
+            which must be larger than all (clipped) hit factors.
+            Defaults None, i.e. 1.1 times the maximum (clipped) hit factor.
+        cache : uclass.hhf_methods.fit_cache.FitCache, optional
+            Cache of the fitted logit-normal parameters.
+            Defaults None.
+        clip : bool, optional
+            Clip the hit factors to their 99th percentile before the fit.
+            Defaults False.
+        """
+        self.hf = hf
+        self.percentile = percentile
+        self.percentage = percentage
+        self.scale = scale
+        self.cache = cache
+        self.clip = clip
+        self.logitnormal = None
+
+    @property
+    def hf(self):
+        """list of hit factor"""
+        return self._hf
+
+    @hf.setter
+    def hf(self, _hf):
+        """hf.setter"""
+        self._hf = _hf
+        self._hf_max = None
+
+    @property
+    def percentile(self):
+        """Percentile to match"""
+        return self._percentile
+
+    @percentile.setter
+    def percentile(self, _percentile):
+        """percentile.setter"""
+        self._percentile = _percentile
+
+    @property
+    def percentage(self):
+        """Percentage of the percentile"""
+        return self._percentage
+
+    @percentage.setter
+    def percentage(self, _percentage):
+        """percentage.setter"""
+        self._percentage = _percentage
+
+    @property
+    def scale(self):
+        """Normalization of the hit factors"""
+        if self._scale is None:
+            return 1.1 * self.hf_max
+        return self._scale
+
+    @scale.setter
+    def scale(self, _scale):
+        """scale.setter"""
+        self._scale = _scale
+
+    @property
+    def cache(self):
+        """Cache of the fitted logit-normal parameters"""
+        return self._cache
+
+    @cache.setter
+    def cache(self, _cache):
+        """cache.setter"""
+        self._cache = _cache
+
+    @property
+    def clip(self):
+        """Clip the hit factors to their 99th percentile"""
+        return self._clip
+
+    @clip.setter
+    def clip(self, _clip):
+        """clip.setter"""
+        self._clip = _clip
+        self._hf_max = None
+
+    @property
+    def hf_max(self):
+        """Maximum (clipped) hit factor, computed once"""
+        if self._hf_max is None:
+            if self.clip:
+                self._hf_max = float(np.quantile(self.hf, 0.99))
+            else:
+                self._hf_max = float(np.max(self.hf))
+        return self._hf_max
+
+    def get_hhf(self, percentile=None, percentage=None):
+        """Get high hit factor from match percentile and percentage
+
+        Parameters
+        ----------
+        Percentile : float
+            The percentile to match
+        Percentage : float
+            The hit factor percentage (in fraction) of the percentile.
+
+        Returns
+        -------
+        hhf : float
+            The high hit factor
+        """
+        if percentile is not None:
+            self.percentile = percentile
+        if percentage is not None:
+            self.percentage = percentage
+        percentile = self.percentile
+        percentage = self.percentage
+        if self.logitnormal is None:
+            self.fit_logitnormal()
+        percentile_hf = self.scale * self.logitnormal.quantile(percentile)
+        hhf = percentile_hf / percentage
+        return hhf
+
+    def fit_logitnormal(self):
+        """Fit logit-normal to the normalized hit factors
+
+        Returns
+        -------
+        logitnormal : uclass.statistics.logitnormal.LogitNormal
+        """
+        scale = self.scale
+        samples = np.asarray(self.hf, dtype=float)
+        if self.clip:
+            samples = np.minimum(samples, self.hf_max)
+        samples = samples / scale
+
+        params = None
+        if self.cache is not None:
+            key = uclass.hhf_methods.fit_cache.make_key(
+                "logitnormal", self.hf, scale=float(scale), clip=bool(self.clip))
+            params = self.cache.get(key)
+
+        if params is None:
+            res = uclass.statistics.fitting.fit_distribution(
+                uclass.statistics.logitnormal.LogitNormal, samples, [1, 0],
+                method="mle")
+            params = res.x
+            if self.cache is not None:
+                self.cache.set(key, params)
+
+        sigma, mu = params
+        logitnormal = uclass.statistics.logitnormal.LogitNormal(sigma, mu)
+
+        self.logitnormal = logitnormal
+
+        return logitnormal
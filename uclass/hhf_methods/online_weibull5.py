@@ -0,0 +1,378 @@
+"""Online Weibull 5 method"""
+import math
+
+import numpy as np
+
+import uclass.statistics.weibull
+
+
+class OnlineWeibull5:
+    """Online Weibull 5
+
+    Notes
+    -----
+    Same high hit factor as `uclass.hhf_methods.weibull5.Weibull5`,
+    updated incrementally as new scores arrive.
+
+    The Weibull maximum likelihood equations only depend on
+    the power sums `A_j(k) = sum(x**k * log(x)**j)`, j = 0...3.
+    Around a reference shape parameter `k_ref`, they are expanded as
+
+        A_j(k) = sum_m (k-k_ref)**m / m! * S_(m+j),
+        S_m = sum(x**k_ref * log(x)**m),
+
+    so appending a batch of scores only adds the batch's contribution
+    to `S_0...S_(order+3)`, and the shape parameter is re-solved with
+    Halley iterations warm-started from the previous fit,
+    at a cost independent of the number of scores seen.
+    The logarithms of the hit factors are kept, so that the expansion
+    is re-anchored at the current `k` (a full pass) when `k` drifts
+    too far from `k_ref` for the expansion to be accurate.
+
+    The likelihood has no maximum until two distinct hit factors are
+    seen, so there is no fit (`weibull` is None) before.
+    """
+    def __init__(self, hf=None, percentile=0.95, percentage=0.85, k0=3.6,
+                 order=16, tol=1e-10, maxiter=100):
+        """Constructor
+
+        Parameters
+        ----------
+        hf : array-like, optional
+            Initial list of hit factors.
+            Defaults None.
+        percentile : float, optional
+            The percentile to match a certain hit factor percentage.
+            Defaults 0.95.
+        percentage : float, optional
+            The hit factor percentage (in fraction) of the percentile.
+            Defaults 0.85.
+        k0 : float, optional
+            Initial guess of the shape parameter.
+            Defaults 3.6.
+        order : int, optional
+            Order of the expansion of the power sums.
+            Defaults 16.
+        tol : float, optional
+            Relative tolerance of the shape parameter.
+            Defaults 1e-10.
+        maxiter : int, optional
+            Maximum number of Halley iterations per update.
+            Defaults 100.
+        """
+        self.percentile = percentile
+        self.percentage = percentage
+        self.k0 = k0
+        self.order = order
+        self.tol = tol
+        self.maxiter = maxiter
+        self.weibull = None
+        self.n_reanchor = 0
+        self._logx = np.empty(1024)
+        self._n = 0
+        self._shift = None
+        self._k_ref = float(k0)
+        self._dmax = 0.
+        self._logx_min = np.inf
+        self._logx_max = -np.inf
+        self._logx_sum = 0.
+        self._power_sums = np.zeros(order+4)
+        if hf is not None:
+            self.update(hf)
+
+    @property
+    def percentile(self):
+        """Percentile to match"""
+        return self._percentile
+
+    @percentile.setter
+    def percentile(self, _percentile):
+        """percentile.setter"""
+        self._percentile = _percentile
+
+    @property
+    def percentage(self):
+        """Percentage of the percentile"""
+        return self._percentage
+
+    @percentage.setter
+    def percentage(self, _percentage):
+        """percentage.setter"""
+        self._percentage = _percentage
+
+    @property
+    def k0(self):
+        """Initial guess of the shape parameter"""
+        return self._k0
+
+    @k0.setter
+    def k0(self, _k0):
+        """k0.setter"""
+        self._k0 = _k0
+
+    @property
+    def order(self):
+        """Order of the expansion of the power sums"""
+        return self._order
+
+    @order.setter
+    def order(self, _order):
+        """order.setter"""
+        self._order = _order
+
+    @property
+    def tol(self):
+        """Relative tolerance of the shape parameter"""
+        return self._tol
+
+    @tol.setter
+    def tol(self, _tol):
+        """tol.setter"""
+        self._tol = _tol
+
+    @property
+    def maxiter(self):
+        """Maximum number of Halley iterations per update"""
+        return self._maxiter
+
+    @maxiter.setter
+    def maxiter(self, _maxiter):
+        """maxiter.setter"""
+        self._maxiter = _maxiter
+
+    @property
+    def n(self):
+        """Number of hit factors seen"""
+        return self._n
+
+    @property
+    def hf(self):
+        """Hit factors seen"""
+        return np.exp(self._logx[:self._n] + self._shift)
+
+    def update(self, hf):
+        """Append new hit factors and update the fit
+
+        Parameters
+        ----------
+        hf : array-like
+            New hit factors.
+            Zero (and negative) hit factors are ignored.
+
+        Returns
+        -------
+        weibull : uclass.statistics.weibull.Weibull
+            The updated fit.
+            None until two distinct hit factors are seen.
+        """
+        hf = np.asarray(hf, dtype=float).ravel()
+        hf = hf[hf > 0]
+        if len(hf) > 0:
+            logx = np.log(hf)
+            if self._shift is None:
+                # Logarithms are stored relative to the first batch,
+                # which keeps x**k_ref well scaled.
+                self._shift = float(np.mean(logx))
+            logx -= self._shift
+            self._append(logx)
+            self._logx_sum += logx.sum()
+            self._dmax = max(self._dmax, float(np.max(np.abs(logx))))
+            self._logx_min = min(self._logx_min, float(np.min(logx)))
+            self._logx_max = max(self._logx_max, float(np.max(logx)))
+            self._power_sums += self._batch_power_sums(logx, self._k_ref)
+        if self._logx_max > self._logx_min:
+            self.fit_weibull()
+        return self.weibull
+
+    def get_hhf(self, percentile=None, percentage=None):
+        """Get high hit factor from match percentile and percentage
+
+        Parameters
+        ----------
+        Percentile : float
+            The percentile to match
+        Percentage : float
+            The hit factor percentage (in fraction) of the percentile.
+
+        Returns
+        -------
+        hhf : float
+            The high hit factor
+        """
+        if percentile is not None:
+            self.percentile = percentile
+        if percentage is not None:
+            self.percentage = percentage
+        if self.weibull is None:
+            raise ValueError(
+                "Fewer than two distinct hit factors. Call update() first.")
+        percentile_hf = self.weibull.quantile(self.percentile)
+        hhf = percentile_hf / self.percentage
+        return hhf
+
+    def fit_weibull(self):
+        """Fit weibull, warm-started from the previous fit
+
+        Returns
+        -------
+        weibull : uclass.statistics.weibull.Weibull
+        """
+        if not self._logx_max > self._logx_min:
+            raise ValueError(
+                "Cannot fit a Weibull distribution to fewer than "
+                "two distinct hit factors.")
+        if self.weibull is None:
+            k = float(self.k0)
+        else:
+            k = float(self.weibull.k)
+        lower, upper = 0., np.inf
+        for _ in range(self.maxiter):
+            g, dg, d2g = self._profile_score(k)
+            if g > 0:
+                upper = k
+            else:
+                lower = k
+            step = g / dg
+            denominator = 1 - 0.5*step*d2g/dg
+            if denominator > 0.5:
+                step /= denominator
+            if abs(step) <= self.tol*k:
+                k -= step
+                break
+            k_new = k - step
+            if not lower < k_new < upper:
+                if np.isinf(upper):
+                    k_new = 2 * k
+                else:
+                    k_new = 0.5 * (lower+upper)
+            k = k_new
+
+        a0 = self._expand(k, 0)
+        lam = np.exp(self._shift + np.log(a0/self._n)/k)
+        self.weibull = uclass.statistics.weibull.Weibull(lam, k)
+        return self.weibull
+
+    def _append(self, logx):
+        """Append to the buffer of log hit factors"""
+        n = self._n + len(logx)
+        if n > len(self._logx):
+            self._logx.resize(max(n, 2*len(self._logx)), refcheck=False)
+        self._logx[self._n:n] = logx
+        self._n = n
+
+    def _batch_power_sums(self, logx, k_ref):
+        """S_m = sum(x**k_ref * log(x)**m) of a batch"""
+        power_sums = np.empty(len(self._power_sums))
+        term = np.exp(k_ref*logx)
+        for m in range(len(power_sums)):
+            power_sums[m] = term.sum()
+            term *= logx
+        return power_sums
+
+    def _reanchor(self, k):
+        """Recompute the power sums around k"""
+        self._k_ref = k
+        self._power_sums = self._batch_power_sums(
+            self._logx[:self._n], self._k_ref)
+        self.n_reanchor += 1
+
+    def _expand(self, k, j):
+        """A_j(k) = sum(x**k * log(x)**j) from the expansion"""
+        delta = k - self._k_ref
+        coefficients = np.empty(self.order+1)
+        coefficients[0] = 1.
+        for m in range(1, self.order+1):
+            coefficients[m] = coefficients[m-1] * delta / m
+        return coefficients @ self._power_sums[j:j+self.order+1]
+
+    def _profile_score(self, k):
+        """Profile likelihood score, see `uclass.statistics.weibull_mle`"""
+        # The remainder of the expansion is bounded by
+        # (|k-k_ref|*max|log(x)|)**(order+1) / (order+1)!,
+        # compared in log space as it overflows far from k_ref.
+        distance = abs(k-self._k_ref) * self._dmax
+        if distance > 0:
+            log_error = ((self.order+1)*math.log(distance)
+                         - math.lgamma(self.order+2))
+            if log_error > math.log(1e-13):
+                self._reanchor(k)
+        a0, a1, a2, a3 = (self._expand(k, j) for j in range(4))
+        m1 = a1 / a0
+        var = a2/a0 - m1**2
+        mu3 = a3/a0 - 3*m1*a2/a0 + 2*m1**3
+        g = m1 - 1/k - self._logx_sum/self._n
+        dg = var + 1/k**2
+        d2g = mu3 - 2/k**3
+        return g, dg, d2g
+
+
+class OnlineHHF:
+    """Online high hit factors of many stages
+
+    Notes
+    -----
+    Keeps an `OnlineWeibull5` per (classifier, division),
+    created on the first update of the stage.
+    """
+    def __init__(self, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        **kwargs
+            Keyword arguments passed to `OnlineWeibull5`.
+        """
+        self.kwargs = kwargs
+        self.estimators = {}
+
+    @property
+    def kwargs(self):
+        """Keyword arguments of the estimators"""
+        return self._kwargs
+
+    @kwargs.setter
+    def kwargs(self, _kwargs):
+        """kwargs.setter"""
+        self._kwargs = _kwargs
+
+    def update(self, classifier, division, hf):
+        """Append new hit factors of a stage
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+        hf : array-like
+            New hit factors.
+
+        Returns
+        -------
+        hhf : float
+            The updated high hit factor.
+            None until two distinct hit factors of the stage are seen.
+        """
+        key = (classifier, division)
+        if key not in self.estimators:
+            self.estimators[key] = OnlineWeibull5(**self.kwargs)
+        if self.estimators[key].update(hf) is None:
+            return None
+        return self.get_hhf(classifier, division)
+
+    def get_hhf(self, classifier, division):
+        """Get the high hit factor of a stage
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+
+        Returns
+        -------
+        hhf : float
+            The high hit factor.
+        """
+        return self.estimators[(classifier, division)].get_hhf()
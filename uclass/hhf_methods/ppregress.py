@@ -1,8 +1,78 @@
 """Percentile-percentage regression method"""
+import concurrent.futures
+import time
+
 import numpy as np
 import scipy.optimize
 
+import uclass.hhf_methods.bootstrap
+import uclass.hhf_methods.fit_cache
 import uclass.hhf_methods.weibull5
+import uclass.instrumentation
+import uclass.statistics.weibull_mle
+
+
+def regression_cost(params, log_lam, inv_k, log_hhf):
+    """Cost function of the percentile-percentage regression
+
+    Parameters
+    ----------
+    params : array
+        The percentile and percentage.
+        Either of shape (2,) or (2, S) for S sets of parameters.
+    log_lam : array
+        Logarithm of the Weibull scale parameters of the stages.
+    inv_k : array
+        Reciprocal of the Weibull shape parameters of the stages.
+    log_hhf : array
+        Logarithm of the known high hit factors of the stages.
+
+    Returns
+    -------
+    error : float or array
+        Mean squared log error of the high hit factor estimates.
+        An array of shape (S,) if `params` has shape (2, S).
+    """
+    percentile, percentage = params
+    percentile = np.asarray(percentile)[..., np.newaxis]
+    percentage = np.asarray(percentage)[..., np.newaxis]
+    # log(weibull.quantile(percentile) / percentage)
+    log_hhf_estimate = (log_lam + inv_k*np.log(-np.log1p(-percentile))
+                        - np.log(percentage))
+    error = np.mean((log_hhf_estimate-log_hhf)**2, axis=-1)
+    return error
+
+
+def regression_cost_grad(params, log_lam, inv_k, log_hhf):
+    """Cost function of the regression and its gradient
+
+    Parameters
+    ----------
+    params : array
+        The percentile and percentage, of shape (2,).
+    log_lam : array
+        Logarithm of the Weibull scale parameters of the stages.
+    inv_k : array
+        Reciprocal of the Weibull shape parameters of the stages.
+    log_hhf : array
+        Logarithm of the known high hit factors of the stages.
+
+    Returns
+    -------
+    error : float
+        Mean squared log error, see `regression_cost`.
+    grad : array
+        The derivatives with respect to the percentile and percentage.
+    """
+    percentile, percentage = params
+    log_survival = -np.log1p(-percentile)  # -log(1-percentile)
+    residual = (log_lam + inv_k*np.log(log_survival) - np.log(percentage)
+                - log_hhf)
+    error = np.mean(residual**2)
+    dpercentile = (2 * np.mean(residual*inv_k)
+                   / ((1-percentile)*log_survival))
+    dpercentage = -2 * np.mean(residual) / percentage
+    return error, np.array([dpercentile, dpercentage])
 
 
 class PPRegress:
@@ -15,7 +85,8 @@ class PPRegress:
     regression of the percentile and percentage of the
     Weibull5 method.
     """
-    def __init__(self, hf, hf_sample, hhf_sample):
+    def __init__(self, hf, hf_sample, hhf_sample, vectorized=False,
+                 workers=1, rng=123, cache=None):
         """Constructor
 
         Parameters
@@ -27,10 +98,35 @@ class PPRegress:
             Each row is historical hit factors of a classifier stage.
         hhf_sample : array-like
             The known high hit factors.
+        vectorized : bool, optional
+            Evaluate the cost of the whole differential evolution
+            population in one call.
+            Note that this uses deferred population updates,
+            so the solution differs slightly from the default.
+            Defaults False.
+        workers : int or map-like callable, optional
+            Evaluate the differential evolution population in parallel.
+            An int is the number of processes, -1 for all CPU cores.
+            A map-like callable, e.g. `concurrent.futures.Executor.map`,
+            is used to evaluate the population.
+            Values other than 1 use deferred population updates.
+            Ignored if `vectorized` is True.
+            Defaults 1.
+        rng : int, optional
+            Seed of the differential evolution.
+            Defaults 123.
+        cache : uclass.hhf_methods.fit_cache.FitCache, optional
+            Cache of the fitted Weibull parameters of the stages
+            and of the regressed percentile and percentage.
+            Defaults None.
         """
         self.hf = hf
         self.hf_sample = hf_sample
         self.hhf_sample = hhf_sample
+        self.vectorized = vectorized
+        self.workers = workers
+        self.rng = rng
+        self.cache = cache
         self.percentile = None
         self.percentage = None
         
@@ -64,6 +160,83 @@ class PPRegress:
         """hhf_sample.setter"""
         self._hhf_sample = _hhf_sample
 
+    @property
+    def vectorized(self):
+        """Evaluate the cost of the whole population at once"""
+        return self._vectorized
+
+    @vectorized.setter
+    def vectorized(self, _vectorized):
+        """vectorized.setter"""
+        self._vectorized = _vectorized
+
+    @property
+    def workers(self):
+        """Parallel workers of the differential evolution"""
+        return self._workers
+
+    @workers.setter
+    def workers(self, _workers):
+        """workers.setter"""
+        self._workers = _workers
+
+    @property
+    def rng(self):
+        """Seed of the differential evolution"""
+        return self._rng
+
+    @rng.setter
+    def rng(self, _rng):
+        """rng.setter"""
+        self._rng = _rng
+
+    @property
+    def cache(self):
+        """Cache of fitted parameters"""
+        return self._cache
+
+    @cache.setter
+    def cache(self, _cache):
+        """cache.setter"""
+        self._cache = _cache
+
+    def fit_weibull_sample(self):
+        """Fit weibulls to the past hit factors
+
+        Returns
+        -------
+        params : array
+            Array of shape (n_stages, 2). Each row is `[lam, k]`.
+        """
+        hf_sample = self.hf_sample[:len(self.hhf_sample)]
+        if self.cache is None:
+            params, _ = uclass.statistics.weibull_mle.fit_weibull_batch(
+                hf_sample)
+            return params
+
+        # Same keys as Weibull5.fit_weibull() with default options.
+        keys = [
+            uclass.hhf_methods.fit_cache.make_key(
+                "weibull", hf, method="newton", lam0=None, k0=3.6)
+            for hf in hf_sample]
+        params = np.empty((len(hf_sample), 2))
+        missing = []
+        for i, key in enumerate(keys):
+            params_ = self.cache.get(key)
+            if params_ is None:
+                missing.append(i)
+            else:
+                params[i] = params_
+        if missing:
+            params_missing, _ = (
+                uclass.statistics.weibull_mle.fit_weibull_batch(
+                    [hf_sample[i] for i in missing]))
+            for i, params_ in zip(missing, params_missing):
+                params[i] = params_
+                self.cache.set(keys[i], params_)
+        return params
+
+    @uclass.instrumentation.timed("regress")
     def regress(self):
         """Find best fit percentile and percentage
 
@@ -74,46 +247,188 @@ class PPRegress:
         percentage : float
             Percentage.
         """
-        # Fit list of weibulls to historical hit factors
-        list_weibull = []
-        hf_sample = self.hf_sample
+        # Fit weibulls to historical hit factors
+        params = self.fit_weibull_sample()
+        return self._regress(params)
+
+    def _regress(self, params):
+        """Find best fit percentile and percentage given the stage fits
+
+        Parameters
+        ----------
+        params : array
+            Array of shape (n_stages, 2). Each row is `[lam, k]`,
+            see `fit_weibull_sample`.
+
+        Returns
+        -------
+        percentile : float
+            Percentile.
+        percentage : float
+            Percentage.
+        """
         hhf_sample = self.hhf_sample
-        for i in range(len(hhf_sample)):
-            weibull5 = uclass.hhf_methods.weibull5.Weibull5(hf_sample[i])
-            weibull = weibull5.fit_weibull()
-            list_weibull.append(weibull)
+        lam, k = params.T
+
+        self._weibull_params = params  # For debug.
+
+        if self.vectorized:
+            updating = "deferred"
+            workers = 1
+        else:
+            workers = self.workers
+            if workers == 1:
+                updating = "immediate"
+            else:
+                updating = "deferred"
+
+        # The regression is only reproducible with a fixed seed.
+        key = None
+        if self.cache is not None and isinstance(self.rng, (int, np.integer)):
+            key = uclass.hhf_methods.fit_cache.make_key(
+                "ppregress", params, hhf_sample,
+                rng=int(self.rng), updating=updating)
+            result = self.cache.get(key)
+            if result is not None:
+                percentile, percentage = result
+                self.percentile = percentile
+                self.percentage = percentage
+                return percentile, percentage
 
-        self._list_weibull = list_weibull  # For debug.
-        
-        # cost
-        def cost(params, list_weibull, hhf_sample):
-            """Cost function"""
-            percentile, percentage = params
-            
-            hhf_estimate = []
-
-            for weibull in list_weibull:
-                hhf = weibull.quantile(percentile) / percentage
-                hhf_estimate.append(hhf)
-
-            hhf_estimate = np.array(hhf_estimate)
-            hhf_sample = np.array(hhf_sample)
-            error = np.mean(np.abs(np.log(hhf_estimate/hhf_sample))**2)
-
-            return error
-        
         # Regress
+        args = (np.log(lam), 1/k, np.log(hhf_sample))
         bounds = [(1e-6, 1-1e-6), (1e-6, 1-1e-6)]
         res = scipy.optimize.differential_evolution(
-            cost, bounds=bounds, args=(list_weibull, hhf_sample), rng=123)
+            regression_cost, bounds=bounds, args=args, rng=self.rng,
+            updating=updating, vectorized=self.vectorized, workers=workers)
+        uclass.instrumentation.record_optimize("regress", res)
 
         percentile, percentage = res.x
+        if key is not None:
+            self.cache.set(key, res.x)
 
         self.percentile = percentile
         self.percentage = percentage
 
         return percentile, percentage
 
+    @uclass.instrumentation.timed("recalibrate")
+    def recalibrate(self, x0=None, method="local", shrink=0.05, tol=None,
+                    maxiter=100, popsize=5):
+        """Regress again starting from a previous solution
+
+        Meant for updates of `hf_sample` and `hhf_sample` with
+        a few new stages, which barely move the optimum.
+
+        Parameters
+        ----------
+        x0 : array-like, optional
+            The previous (percentile, percentage).
+            Defaults None, i.e. the current `percentile` and `percentage`.
+        method : str, optional
+            "local" minimizes the cost from `x0` with
+            `scipy.optimize.minimize` ("L-BFGS-B") and the analytic
+            gradient `regression_cost_grad`.
+            "de" runs the differential evolution of `regress` with
+            `x0` in a small initial population, within bounds shrunk
+            around it, and polishes the best member.
+            Defaults "local".
+        shrink : float, optional
+            Half-width of the "de" bounds around `x0`.
+            The bounds are doubled and the evolution is continued
+            whenever the solution is on a shrunk bound.
+            None means the full bounds of `regress`.
+            Defaults 0.05.
+        tol : float, optional
+            Convergence tolerance, `ftol` of "local" and
+            the relative `tol` of the population energies of "de".
+            Defaults None, i.e. 1e-12 for "local" and 0.01 for "de".
+        maxiter : int, optional
+            Maximum number of iterations, or generations of "de".
+            Defaults 100.
+        popsize : int, optional
+            Population size multiplier of "de".
+            Defaults 5, i.e. 10 members.
+
+        Returns
+        -------
+        results : dict
+            "params": the (percentile, percentage).
+            "cost": the cost at the solution, see `regression_cost`.
+            "nfev": number of cost evaluations.
+            "nit": number of iterations, or generations of "de".
+            "bounds": the bounds of the last optimization.
+            "elapsed": total time in seconds.
+        """
+        if method not in ("de", "local"):
+            raise ValueError(f"Method {method} not supported.")
+        if x0 is None:
+            if self.percentage is None or self.percentile is None:
+                raise ValueError(
+                    "No previous solution, run regress() or pass x0.")
+            x0 = (self.percentile, self.percentage)
+        t0 = time.perf_counter()
+        params = self.fit_weibull_sample()
+        lam, k = params.T
+        args = (np.log(lam), 1/k, np.log(self.hhf_sample))
+        lower, upper = 1e-6, 1-1e-6
+        x0 = np.clip(np.asarray(x0, dtype=float), lower, upper)
+
+        nfev = nit = 0
+        if method == "local":
+            bounds = [(lower, upper), (lower, upper)]
+            res = scipy.optimize.minimize(
+                regression_cost_grad, x0=x0, args=args, jac=True,
+                bounds=bounds, method="L-BFGS-B",
+                options={"ftol": 1e-12 if tol is None else tol,
+                         "maxiter": maxiter})
+            nfev, nit = res.nfev, res.nit
+        else:
+            if self.vectorized:
+                updating = "deferred"
+            else:
+                updating = "immediate"
+            width = np.inf if shrink is None else shrink
+            while True:
+                bounds = [
+                    (float(max(lower, x0_-width)), float(min(upper, x0_+width)))
+                    for x0_ in x0]
+                res = scipy.optimize.differential_evolution(
+                    regression_cost, bounds=bounds, args=args, x0=x0,
+                    rng=self.rng, updating=updating,
+                    vectorized=self.vectorized,
+                    tol=0.01 if tol is None else tol, maxiter=maxiter,
+                    popsize=popsize)
+                nfev += res.nfev
+                nit += res.nit
+                # Continue in wider bounds if the optimum may be outside.
+                on_bound = any(
+                    (np.isclose(x_, low, rtol=0, atol=1e-3*width)
+                     and low > lower)
+                    or (np.isclose(x_, high, rtol=0, atol=1e-3*width)
+                        and high < upper)
+                    for x_, (low, high) in zip(res.x, bounds))
+                if not on_bound:
+                    break
+                x0 = res.x
+                width *= 2
+        # Count the evaluations of all the rounds, not only the last.
+        uclass.instrumentation.record_optimize(
+            "recalibrate", scipy.optimize.OptimizeResult(nit=nit, nfev=nfev),
+            method=method)
+
+        percentile, percentage = res.x
+        self.percentile = percentile
+        self.percentage = percentage
+        return {
+            "params": np.array([percentile, percentage]),
+            "cost": float(res.fun),
+            "nfev": nfev,
+            "nit": nit,
+            "bounds": bounds,
+            "elapsed": time.perf_counter() - t0,
+        }
+
     def get_hhf(self):
         """Get high hit factor
         
@@ -127,7 +442,8 @@ class PPRegress:
             self.regress()
 
         # Fit weibull for hfs.
-        weibull5 = uclass.hhf_methods.weibull5.Weibull5(self.hf)
+        weibull5 = uclass.hhf_methods.weibull5.Weibull5(
+            self.hf, cache=self.cache)
         weibull = weibull5.fit_weibull()
         
         self._weibull = weibull  # For debug.
@@ -136,4 +452,223 @@ class PPRegress:
 
         return hhf
 
+    def get_hhf_interval(self, confidence=0.95, n_resamples=1000,
+                         max_workers=1, rng=123, **kwargs):
+        """Bootstrap confidence interval of the high hit factor
+
+        The hit factors are resampled with the regressed
+        percentile and percentage held fixed.
+
+        Parameters
+        ----------
+        confidence : float, optional
+            Confidence level of the interval.
+            Defaults 0.95.
+        n_resamples : int, optional
+            Number of bootstrap replicates.
+            Defaults 1000.
+        max_workers : int, optional
+            Number of processes.
+            Defaults 1.
+        rng : int, optional
+            Seed of the resampling.
+            Defaults 123.
+        **kwargs
+            Keyword arguments passed to
+            `uclass.hhf_methods.bootstrap.bootstrap_hhf`,
+            e.g. `chunk_size`.
+
+        Returns
+        -------
+        result : dict
+            See `uclass.hhf_methods.bootstrap.bootstrap_hhf`.
+        """
+        if self.percentage is None or self.percentile is None:
+            self.regress()
+        return uclass.hhf_methods.bootstrap.bootstrap_hhf(
+            self.hf, percentile=self.percentile, percentage=self.percentage,
+            n_resamples=n_resamples, confidence=confidence,
+            max_workers=max_workers, rng=rng, **kwargs)
+
+    @uclass.instrumentation.timed("cross_validate")
+    def cross_validate(self, method="de", max_workers=1):
+        """Leave-one-out cross-validation of the regression
+
+        Each stage of `hhf_sample` is held out in turn, the percentile
+        and percentage are regressed on the other stages and
+        the high hit factor of the held-out stage is predicted.
+        The Weibull distributions of the stages are fitted once and
+        shared by all folds, and each fold's optimizer is warm-started
+        from the regression on all stages.
+
+        Parameters
+        ----------
+        method : str, optional
+            The optimizer of each fold.
+            "de" runs the differential evolution of `regress` with
+            the full-data solution in the initial population.
+            "local" polishes the full-data solution with
+            `scipy.optimize.minimize` ("L-BFGS-B"), which is much faster
+            since holding out a single stage barely moves the optimum.
+            Defaults "de".
+        max_workers : int, optional
+            Number of processes the folds are spread over.
+            The folds run in this process if it is 1.
+            None means the number of CPU cores.
+            Defaults 1.
 
+        Returns
+        -------
+        results : dict
+            "hhf": predicted high hit factor of each held-out stage.
+            "hhf_sample": the known high hit factors.
+            "error": relative error of each prediction.
+            "params": (percentile, percentage) of each fold.
+            "nfev": number of cost evaluations of each fold.
+            "elapsed": total time in seconds.
+        """
+        if method not in ("de", "local"):
+            raise ValueError(f"Method {method} not supported.")
+        t0 = time.perf_counter()
+        params = self.fit_weibull_sample()
+        if self.percentage is None or self.percentile is None:
+            self._regress(params)
+        x0 = np.array([self.percentile, self.percentage])
+
+        lam, k = params.T
+        log_lam = np.log(lam)
+        inv_k = 1 / k
+        log_hhf = np.log(self.hhf_sample)
+        options = {
+            "vectorized": self.vectorized,
+            "updating": "deferred" if self.vectorized else "immediate",
+        }
+        tasks = [
+            (log_lam, inv_k, log_hhf, i, x0, method, self.rng, options)
+            for i in range(len(log_hhf))]
+
+        if max_workers == 1:
+            results = list(map(_cross_validate_fold, tasks))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers) as executor:
+                results = list(executor.map(_cross_validate_fold, tasks))
+
+        fold_params = np.array([result[0] for result in results])
+        nfev = np.array([result[1] for result in results])
+        percentile, percentage = fold_params.T
+        log_hhf_estimate = (log_lam + inv_k*np.log(-np.log1p(-percentile))
+                            - np.log(percentage))
+        hhf = np.exp(log_hhf_estimate)
+        hhf_sample = np.asarray(self.hhf_sample, dtype=float)
+        return {
+            "hhf": hhf,
+            "hhf_sample": hhf_sample,
+            "error": hhf/hhf_sample - 1,
+            "params": fold_params,
+            "nfev": nfev,
+            "elapsed": time.perf_counter() - t0,
+        }
+
+
+def _cross_validate_fold(task):
+    """Regress without a held-out stage, for process pools
+
+    Parameters
+    ----------
+    task : tuple
+        (log_lam, inv_k, log_hhf, i, x0, method, rng, options).
+
+    Returns
+    -------
+    params : array
+        The percentile and percentage.
+    nfev : int
+        Number of cost evaluations.
+    """
+    log_lam, inv_k, log_hhf, i, x0, method, rng, options = task
+    mask = np.ones(len(log_hhf), dtype=bool)
+    mask[i] = False
+    args = (log_lam[mask], inv_k[mask], log_hhf[mask])
+    bounds = [(1e-6, 1-1e-6), (1e-6, 1-1e-6)]
+    if method == "de":
+        res = scipy.optimize.differential_evolution(
+            regression_cost, bounds=bounds, args=args, rng=rng, x0=x0,
+            **options)
+    else:
+        res = scipy.optimize.minimize(
+            regression_cost, x0=x0, args=args, bounds=bounds,
+            method="L-BFGS-B")
+    return res.x, res.nfev
+
+
+def regress_divisions(hf_samples, hhf_samples, max_workers=None, rng=123,
+                      **kwargs):
+    """Regress the percentile and percentage of many divisions concurrently
+
+    Parameters
+    ----------
+    hf_samples : dict
+        Past hit factors of stages with known high hit factors,
+        keyed by division.
+        See `PPRegress.hf_sample`.
+    hhf_samples : dict
+        The known high hit factors, keyed by division.
+    max_workers : int, optional
+        Number of processes.
+        The divisions are regressed in this process if it is 1.
+        Defaults None, i.e. the number of CPU cores.
+    rng : int or dict, optional
+        Seed of the differential evolution of each division.
+        An int seeds each division, in the order of `hhf_samples`,
+        with an int drawn from a child of
+        `numpy.random.SeedSequence(rng)`, so the divisions are seeded
+        independently and the result does not depend on `max_workers`.
+        A dict gives the seed of each division, e.g. to reproduce
+        a standalone `PPRegress`.
+        Defaults 123.
+    **kwargs
+        Keyword arguments passed to `PPRegress`, e.g. `vectorized`.
+
+    Returns
+    -------
+    results : dict
+        The (percentile, percentage) of each division.
+    """
+    divisions = list(hhf_samples)
+    if isinstance(rng, dict):
+        seeds = [rng[division] for division in divisions]
+    else:
+        seeds = [
+            int(seed.generate_state(1)[0])
+            for seed in np.random.SeedSequence(rng).spawn(len(divisions))]
+    tasks = [
+        (hf_samples[division], hhf_samples[division], seed, kwargs)
+        for division, seed in zip(divisions, seeds)]
+
+    if max_workers == 1:
+        results = map(_regress_division, tasks)
+        return dict(zip(divisions, results))
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        results = executor.map(_regress_division, tasks)
+        return dict(zip(divisions, results))
+
+
+def _regress_division(task):
+    """Regress a single division, for process pools
+
+    Parameters
+    ----------
+    task : tuple
+        (hf_sample, hhf_sample, rng, kwargs).
+
+    Returns
+    -------
+    percentile : float
+        Percentile.
+    percentage : float
+        Percentage.
+    """
+    hf_sample, hhf_sample, rng, kwargs = task
+    ppregress = PPRegress(None, hf_sample, hhf_sample, rng=rng, **kwargs)
+    return ppregress.regress()
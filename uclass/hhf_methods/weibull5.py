@@ -1,7 +1,10 @@
 """Weibull 5 method"""
 import numpy as np
-import scipy.optimize
 
+import uclass.hhf_methods.bootstrap
+import uclass.hhf_methods.fit_cache
+import uclass.instrumentation
+import uclass.statistics.fitting
 import uclass.statistics.weibull
 
 
@@ -16,7 +19,7 @@ class Weibull5:
     with default `percentile = 0.95` and `percentage = 0.85`,
     i.e. Top 5 percent shooters are at least M class.
     """
-    def __init__(self, hf, percentile=0.95, percentage=0.85):
+    def __init__(self, hf, percentile=0.95, percentage=0.85, cache=None):
         """Constructor
 
         Parameters
@@ -30,10 +33,14 @@ class Weibull5:
         percentage : float, optional
             The hit factor percentage (in fraction) of the percentile.
             Defaults 0.85.
+        cache : uclass.hhf_methods.fit_cache.FitCache, optional
+            Cache of the fitted Weibull parameters.
+            Defaults None.
         """
         self.hf = hf
         self.percentile = percentile
         self.percentage = percentage
+        self.cache = cache
         self.weibull = None
 
     @property
@@ -66,6 +73,16 @@ class Weibull5:
         """percentage.setter"""
         self._percentage = _percentage
 
+    @property
+    def cache(self):
+        """Cache of the fitted Weibull parameters"""
+        return self._cache
+
+    @cache.setter
+    def cache(self, _cache):
+        """cache.setter"""
+        self._cache = _cache
+
     def get_hhf(self, percentile=None, percentage=None):
         """Get high hit factor from match percentile and percentage
 
@@ -93,55 +110,125 @@ class Weibull5:
         hhf = percentile_hf / percentage
         return hhf
 
-    def fit_weibull(self, lam0=None, k0=3.6):
+    def get_hhf_interval(self, confidence=0.95, n_resamples=1000,
+                         max_workers=1, rng=123, **kwargs):
+        """Bootstrap confidence interval of the high hit factor
+
+        Parameters
+        ----------
+        confidence : float, optional
+            Confidence level of the interval.
+            Defaults 0.95.
+        n_resamples : int, optional
+            Number of bootstrap replicates.
+            Defaults 1000.
+        max_workers : int, optional
+            Number of processes.
+            Defaults 1.
+        rng : int, optional
+            Seed of the resampling.
+            Defaults 123.
+        **kwargs
+            Keyword arguments passed to
+            `uclass.hhf_methods.bootstrap.bootstrap_hhf`,
+            e.g. `chunk_size`.
+
+        Returns
+        -------
+        result : dict
+            See `uclass.hhf_methods.bootstrap.bootstrap_hhf`.
+        """
+        return uclass.hhf_methods.bootstrap.bootstrap_hhf(
+            self.hf, percentile=self.percentile, percentage=self.percentage,
+            n_resamples=n_resamples, confidence=confidence,
+            max_workers=max_workers, rng=rng, **kwargs)
+
+    @staticmethod
+    def from_sketch(sketch, percentile=0.95, percentage=0.85, k0=3.6):
+        """Weibull 5 from a quantile sketch of the hit factors
+
+        The Weibull distribution is fitted to the weighted items of
+        the sketch, which approximates the fit to all hit factors
+        in memory independent of the number of scores.
+
+        Parameters
+        ----------
+        sketch : uclass.statistics.sketch.QuantileSketch
+            Sketch of the hit factors.
+        percentile : float, optional
+            The percentile to match a certain hit factor percentage.
+            Defaults 0.95.
+        percentage : float, optional
+            The hit factor percentage (in fraction) of the percentile.
+            Defaults 0.85.
+        k0 : float, optional
+            Initial guess of the shape parameter
+            Defaults 3.6
+
+        Returns
+        -------
+        weibull5 : Weibull5
+            With the fitted `weibull`. `hf` is None.
+        """
+        weibull5 = Weibull5(
+            None, percentile=percentile, percentage=percentage)
+        weibull5.weibull = sketch.fit_weibull(k0=k0)
+        return weibull5
+
+    @uclass.instrumentation.timed("fit_weibull")
+    def fit_weibull(self, lam0=None, k0=3.6, method="newton"):
         """Fit weibull
 
         Parameters
         ----------
         lam0 : float, Optional.
             Initial guess of the scale parameter
-            Defaults to be the mean of the samples.
+            Defaults to `median(hf) / log(2)**(1/k0)`.
+            Not used by the "newton" method.
         k0 : float, optional
             Initial guess of the shape parameter
             Defaults 3.6
+        method : str, optional
+            The fitting method.
+            "newton" solves the profile likelihood equation of the
+            shape parameter with Halley iterations and
+            gets the scale parameter in closed form.
+            Other methods minimize the negative log likelihood
+            over both parameters with `scipy.optimize.minimize`,
+            e.g. "nelder-mead" (the legacy method) or "BFGS",
+            in the untransformed parameters as the legacy method did.
+            See `uclass.statistics.fitting.fit_distribution`.
+            Defaults "newton".
         
         Returns
         -------
         weibull : uclass.statistics.weibull.Weibull
         """
-        # TODO Consider putting this function elsewhere.
-        def nll(params, x):
-            """Negative log likelihood
-
-            Parameters
-            ----------
-            params : array
-                Parameters of the PDF.
-            x : array-like
-                Observed values of the random variable.
-            pdf : func(x, *params) -> float
-            """
-            lam, k = params
-            weibull = uclass.statistics.weibull.Weibull(lam=lam, k=k)
-            likelihood = weibull.pdf(x)
-            nll_ = -np.mean(np.log(likelihood))
-            return nll_
-
         samples = self.hf
-        
-        if lam0 is None:
-            # lam0 = np.mean(samples)
-            lam0 = np.median(samples) / np.log(2)**(1/k0)
-        x0 = [lam0, k0]
 
-        res = scipy.optimize.minimize(
-            nll, x0=x0, args=samples, method="nelder-mead")
+        params = None
+        if self.cache is not None:
+            key = uclass.hhf_methods.fit_cache.make_key(
+                "weibull", samples, method=method, lam0=lam0, k0=k0)
+            params = self.cache.get(key)
+
+        if params is None:
+            if method == "newton":
+                fitting_method = "mle"
+            else:
+                fitting_method = method
+            if lam0 is None and method != "newton":
+                lam0 = np.median(samples) / np.log(2)**(1/k0)
+            res = uclass.statistics.fitting.fit_distribution(
+                uclass.statistics.weibull.Weibull, samples, [lam0, k0],
+                method=fitting_method, transforms=["identity", "identity"])
+            params = res.x
+            if self.cache is not None:
+                self.cache.set(key, params)
         
-        lam, k = res.x
+        lam, k = params
         weibull = uclass.statistics.weibull.Weibull(lam, k)
 
         self.weibull = weibull
 
         return weibull
-        
-        
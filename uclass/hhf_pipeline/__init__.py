@@ -0,0 +1,2 @@
+from .hhf_pipeline import *
+from .hhf_table import *
@@ -0,0 +1,462 @@
+"""High hit factor batch pipeline"""
+import concurrent.futures
+import csv
+import os
+import pickle
+import time
+
+import numpy as np
+
+import uclass.hhf_methods.ppregress
+import uclass.instrumentation
+import uclass.logger
+import uclass.statistics.weibull
+import uclass.statistics.weibull_mle
+
+
+DIVISIONS = ["opn", "lo", "co", "ltd", "pcc", "prod", "ss", "l10", "rev"]
+
+
+class HHFPipeline:
+    """High hit factor batch pipeline
+
+    Notes
+    -----
+    The pipeline enumerates the classifiers of each division,
+    bulk-loads their positive hit factors with `get_hf_all`,
+    fits Weibull distributions to chunks of stages in a process pool,
+    and appends the high hit factors to a CSV file as chunks complete.
+    The CSV file is also the checkpoint: stages already in it are
+    skipped when the pipeline is run again, provided they were fitted
+    with the same method, percentile and percentage.
+    Stages whose fit does not converge, e.g. all hit factors equal,
+    are not written.
+
+    The "weibull5" method uses the percentile and percentage of
+    `uclass.hhf_methods.weibull5.Weibull5`. The "ppregress" method
+    regresses them once per division with
+    `uclass.hhf_methods.ppregress.PPRegress` from reference stages,
+    so the HHF of every stage is identical to that of the methods.
+    The "elapsed" column is the fitting time per stage,
+    i.e. the time of its chunk divided by the chunk size.
+    """
+    fields = ["classifier", "division", "method", "n_scores", "lam", "k",
+              "percentile", "percentage", "hhf", "elapsed"]
+
+    def __init__(self, database, output, method="weibull5", reference=None,
+                 divisions=None, chunk_size=64, max_workers=1,
+                 min_scores=10):
+        """Constructor
+
+        Parameters
+        ----------
+        database : object
+            The hit factor database, e.g.
+            `uclass.database.snapshot.Snapshot` or
+            `uclass.database.mongo.Mongo`.
+            Must have a `get_hf_all(division)` method.
+        output : str
+            Path of the output CSV file.
+        method : str, optional
+            The HHF method, "weibull5" or "ppregress".
+            Defaults "weibull5".
+        reference : dict, optional
+            Reference stages of each division for "ppregress",
+            `{division: (hf_sample, hhf_sample)}`.
+            See `load_reference`.
+            Divisions without reference stages are skipped.
+            Defaults None.
+        divisions : list of str, optional
+            The divisions.
+            Defaults None, i.e. `DIVISIONS`.
+        chunk_size : int, optional
+            Number of stages fitted per task.
+            Defaults 64.
+        max_workers : int, optional
+            Number of processes.
+            The chunks are fitted in this process if it is 1.
+            None means the number of CPU cores.
+            Defaults 1.
+        min_scores : int, optional
+            Stages with fewer positive hit factors are skipped.
+            Defaults 10.
+        """
+        self.database = database
+        self.output = output
+        self.method = method
+        self.reference = reference
+        self.divisions = divisions
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.min_scores = min_scores
+
+    @property
+    def database(self):
+        """The hit factor database"""
+        return self._database
+
+    @database.setter
+    def database(self, _database):
+        """database.setter"""
+        self._database = _database
+
+    @property
+    def output(self):
+        """Path of the output CSV file"""
+        return self._output
+
+    @output.setter
+    def output(self, _output):
+        """output.setter"""
+        self._output = _output
+
+    @property
+    def method(self):
+        """The HHF method"""
+        return self._method
+
+    @method.setter
+    def method(self, _method):
+        """method.setter"""
+        if _method not in ("weibull5", "ppregress"):
+            raise ValueError(f"Method {_method} not supported.")
+        self._method = _method
+
+    @property
+    def reference(self):
+        """Reference stages of each division"""
+        return self._reference
+
+    @reference.setter
+    def reference(self, _reference):
+        """reference.setter"""
+        self._reference = _reference
+
+    @property
+    def divisions(self):
+        """The divisions"""
+        if self._divisions is None:
+            return DIVISIONS
+        return self._divisions
+
+    @divisions.setter
+    def divisions(self, _divisions):
+        """divisions.setter"""
+        self._divisions = _divisions
+
+    @property
+    def chunk_size(self):
+        """Number of stages fitted per task"""
+        return self._chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, _chunk_size):
+        """chunk_size.setter"""
+        self._chunk_size = _chunk_size
+
+    @property
+    def max_workers(self):
+        """Number of processes"""
+        return self._max_workers
+
+    @max_workers.setter
+    def max_workers(self, _max_workers):
+        """max_workers.setter"""
+        self._max_workers = _max_workers
+
+    @property
+    def min_scores(self):
+        """Minimum number of positive hit factors of a stage"""
+        return self._min_scores
+
+    @min_scores.setter
+    def min_scores(self, _min_scores):
+        """min_scores.setter"""
+        self._min_scores = _min_scores
+
+    def get_percentiles(self):
+        """Percentile and percentage of each division
+
+        Returns
+        -------
+        percentiles : dict
+            The (percentile, percentage) of each division.
+        """
+        if self.method == "weibull5":
+            return {division: (0.95, 0.85) for division in self.divisions}
+
+        reference = self.reference or {}
+        divisions = [
+            division for division in self.divisions if division in reference]
+        for division in self.divisions:
+            if division not in reference:
+                uclass.logger.logger.warning(
+                    f"No reference stages for {division}, skipped.")
+        hf_samples = {division: reference[division][0]
+                      for division in divisions}
+        hhf_samples = {division: reference[division][1]
+                       for division in divisions}
+        return uclass.hhf_methods.ppregress.regress_divisions(
+            hf_samples, hhf_samples, max_workers=self.max_workers)
+
+    def completed(self):
+        """Stages already in the output file
+
+        Returns
+        -------
+        completed : dict
+            The (method, percentile, percentage) of each
+            (classifier, division) pair.
+        """
+        if not os.path.exists(self.output):
+            return {}
+        completed = {}
+        with open(self.output, newline="") as f:
+            for row in csv.DictReader(f):
+                # A crash can leave an incomplete last row.
+                if None in row.values() or None in row:
+                    continue
+                completed[row["classifier"], row["division"]] = (
+                    row["method"], float(row["percentile"]),
+                    float(row["percentage"]))
+        return completed
+
+    def check_completed(self, completed, percentiles):
+        """Check the settings of the stages in the output file
+
+        Parameters
+        ----------
+        completed : dict
+            See `completed`.
+        percentiles : dict
+            See `get_percentiles`.
+
+        Raises
+        ------
+        ValueError
+            If stages were fitted with another method, percentile or
+            percentage than those of this run.
+        """
+        mismatched = [
+            pair for pair, (method, percentile, percentage)
+            in completed.items()
+            if pair[1] in percentiles and (
+                method != self.method
+                or not np.isclose(percentile, percentiles[pair[1]][0])
+                or not np.isclose(percentage, percentiles[pair[1]][1]))]
+        if mismatched:
+            raise ValueError(
+                f"{len(mismatched)} stages of {self.output}, e.g. "
+                f"{mismatched[0]}, were fitted with another method, "
+                "percentile or percentage. Run with resume=False "
+                "or another output file.")
+
+    def run(self, resume=True):
+        """Run the pipeline
+
+        Parameters
+        ----------
+        resume : bool, optional
+            Skip the stages already in the output file.
+            Otherwise, the output file is overwritten.
+            Defaults True.
+
+        Raises
+        ------
+        ValueError
+            If resuming with another method, percentile or percentage
+            than that of the stages in the output file.
+
+        Returns
+        -------
+        report : dict
+            "n_stages": number of stages fitted.
+            "n_skipped": number of stages skipped
+            (completed or too few scores).
+            "n_failed": number of stages whose fit did not converge,
+            not written.
+            "n_scores": number of hit factors fitted.
+            "elapsed": total time in seconds.
+            "stages_per_second" and "scores_per_second": throughput.
+        """
+        logger = uclass.logger.logger
+        t0 = time.perf_counter()
+        percentiles = self.get_percentiles()
+        if resume:
+            self._repair_output()
+            completed = self.completed()
+            self.check_completed(completed, percentiles)
+        else:
+            completed = {}
+            if os.path.exists(self.output):
+                os.remove(self.output)
+
+        n_stages = n_skipped = n_failed = n_scores = 0
+        executor = None
+        if self.max_workers != 1:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                self.max_workers)
+        try:
+            with open(self.output, "a", newline="") as f:
+                writer = csv.DictWriter(
+                    f, fieldnames=self.fields, extrasaction="ignore")
+                if f.tell() == 0:
+                    writer.writeheader()
+                for division, (percentile, percentage) in percentiles.items():
+                    t_division = time.perf_counter()
+                    hf_all = self.database.get_hf_all(division)
+                    classifiers = []
+                    for classifier in sorted(hf_all):
+                        if ((classifier, division) in completed
+                                or len(hf_all[classifier]) < self.min_scores):
+                            n_skipped += 1
+                            continue
+                        classifiers.append(classifier)
+                    tasks = [
+                        (division, chunk,
+                         [np.asarray(hf_all[classifier])
+                          for classifier in chunk],
+                         self.method, percentile, percentage)
+                        for chunk in _chunks(classifiers, self.chunk_size)]
+                    if executor is None:
+                        results = map(_fit_chunk, tasks)
+                    else:
+                        results = executor.map(_fit_chunk, tasks)
+                    n_division = 0
+                    for rows in results:
+                        converged = [row for row in rows if row["converged"]]
+                        n_failed += len(rows) - len(converged)
+                        writer.writerows(converged)
+                        f.flush()
+                        n_division += len(converged)
+                        n_scores += sum(row["n_scores"] for row in converged)
+                    n_stages += n_division
+                    uclass.instrumentation.count(
+                        "pipeline_stages", n_division, division=division)
+                    elapsed = time.perf_counter() - t_division
+                    logger.info(
+                        f"{division}: {n_division} stages in {elapsed:.2f} s "
+                        f"({n_division/max(elapsed, 1e-9):.1f} stages/s)")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - t0
+        report = {
+            "n_stages": n_stages,
+            "n_skipped": n_skipped,
+            "n_failed": n_failed,
+            "n_scores": n_scores,
+            "elapsed": elapsed,
+            "stages_per_second": n_stages / max(elapsed, 1e-9),
+            "scores_per_second": n_scores / max(elapsed, 1e-9),
+        }
+        logger.info(
+            f"{n_stages} stages ({n_scores} scores) in {elapsed:.2f} s, "
+            f"{report['stages_per_second']:.1f} stages/s, "
+            f"{report['scores_per_second']:.0f} scores/s")
+        if n_failed:
+            logger.warning(f"{n_failed} stages not converged, not written.")
+        return report
+
+    def to_parquet(self, path):
+        """Convert the output file to Parquet
+
+        Requires pyarrow or fastparquet.
+
+        Parameters
+        ----------
+        path : str
+            Path of the Parquet file.
+        """
+        import pandas as pd
+
+        pd.read_csv(self.output).to_parquet(path)
+
+    def _repair_output(self):
+        """Drop an incomplete last line of the output file"""
+        if not os.path.exists(self.output):
+            return
+        with open(self.output, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_reference(path, divisions=None):
+    """Load reference stages of PPRegress
+
+    Parameters
+    ----------
+    path : str
+        Directory with `{division}_hf_sample.pkl` and
+        `{division}_hhf_sample.pkl` files.
+    divisions : list of str, optional
+        The divisions.
+        Defaults None, i.e. `DIVISIONS`.
+
+    Returns
+    -------
+    reference : dict
+        `{division: (hf_sample, hhf_sample)}` of the divisions with files.
+    """
+    if divisions is None:
+        divisions = DIVISIONS
+    reference = {}
+    for division in divisions:
+        hf_path = os.path.join(path, f"{division}_hf_sample.pkl")
+        hhf_path = os.path.join(path, f"{division}_hhf_sample.pkl")
+        if not (os.path.exists(hf_path) and os.path.exists(hhf_path)):
+            continue
+        with open(hf_path, "rb") as f:
+            hf_sample = pickle.load(f)
+        with open(hhf_path, "rb") as f:
+            hhf_sample = pickle.load(f)
+        reference[division] = (hf_sample, hhf_sample)
+    return reference
+
+
+def _chunks(items, size):
+    """Split a list into chunks"""
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+
+def _fit_chunk(task):
+    """Fit a chunk of stages, for process pools
+
+    Parameters
+    ----------
+    task : tuple
+        (division, classifiers, list_hf, method, percentile, percentage).
+
+    Returns
+    -------
+    rows : list of dict
+        A row of the output file per stage,
+        and whether its fit converged as "converged".
+    """
+    division, classifiers, list_hf, method, percentile, percentage = task
+    t0 = time.perf_counter()
+    params, converged = uclass.statistics.weibull_mle.fit_weibull_batch(
+        list_hf)
+    lam, k = params.T
+    weibull = uclass.statistics.weibull.Weibull(lam, k)
+    hhf = weibull.quantile(percentile) / percentage
+    elapsed = (time.perf_counter()-t0) / len(classifiers)
+    rows = [
+        {
+            "classifier": classifier,
+            "division": division,
+            "method": method,
+            "n_scores": len(hf),
+            "lam": lam_,
+            "k": k_,
+            "percentile": percentile,
+            "percentage": percentage,
+            "hhf": hhf_,
+            "elapsed": elapsed,
+            "converged": bool(converged_),
+        }
+        for classifier, hf, lam_, k_, hhf_, converged_
+        in zip(classifiers, list_hf, lam, k, hhf, converged)]
+    return rows
@@ -0,0 +1,315 @@
+"""Precomputed high hit factor lookup table"""
+import concurrent.futures
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import uclass.hhf_pipeline.hhf_pipeline
+import uclass.instrumentation
+import uclass.logger
+
+
+class HHFTable:
+    """Precomputed high hit factor lookup table
+
+    Notes
+    -----
+    The table is a NumPy .npz file with a column per field in `fields`
+    and a row per stage, sorted by division and classifier.
+    It is loaded in memory with a dictionary index of the rows,
+    so `get_hhf` is a dictionary and a list lookup.
+
+    `update` only refits the stale stages, i.e. those whose number of
+    positive hit factors, method, percentile or percentage changed,
+    with the same fits as `HHFPipeline`, and writes the table
+    atomically. Stages whose fit does not converge keep their previous
+    row, if any, and are retried by the next update.
+    "updated" is the time of the fit of each row in seconds since
+    the epoch.
+    """
+    fields = ["classifier", "division", "method", "n_scores", "lam", "k",
+              "percentile", "percentage", "hhf", "updated"]
+    dtypes = {"classifier": str, "division": str, "method": str,
+              "n_scores": np.int64}
+
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            Path of the table file, e.g. "hhf.npz".
+            The table is empty if the file does not exist.
+        """
+        self.path = path
+        self.load()
+
+    @property
+    def path(self):
+        """Path of the table file"""
+        return self._path
+
+    @path.setter
+    def path(self, _path):
+        """path.setter"""
+        self._path = _path
+
+    def __len__(self):
+        """Number of stages"""
+        return len(self.index)
+
+    def __contains__(self, pair):
+        """Whether a (classifier, division) stage is in the table"""
+        return tuple(pair) in self.index
+
+    def load(self):
+        """Load the table file"""
+        if os.path.exists(self.path):
+            with np.load(self.path) as f:
+                data = {field: f[field] for field in self.fields}
+        else:
+            data = {field: np.empty(0, dtype=self.dtypes.get(field, float))
+                    for field in self.fields}
+        self._set_data(data)
+
+    def save(self):
+        """Write the table file atomically"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile(
+                dir=directory, prefix=".hhf_table_", suffix=".npz",
+                delete=False) as f:
+            try:
+                np.savez(f, **self.data)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, self.path)
+
+    def get_hhf(self, classifier, division):
+        """Look up a high hit factor
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+
+        Returns
+        -------
+        hhf : float
+            The high hit factor.
+
+        Raises
+        ------
+        KeyError
+            If the stage is not in the table.
+        """
+        return self._hhf[self.index[classifier, division]]
+
+    def get(self, classifier, division):
+        """Look up a row
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+
+        Returns
+        -------
+        row : dict
+            The fields of the stage, None if it is not in the table.
+        """
+        i = self.index.get((classifier, division))
+        if i is None:
+            return None
+        return {field: self.data[field][i].item() for field in self.fields}
+
+    def is_stale(self, classifier, division, n_scores, method=None,
+                 percentile=None, percentage=None):
+        """Whether a stage needs to be refitted
+
+        Parameters
+        ----------
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+        n_scores : int
+            The current number of positive hit factors of the stage.
+        method : str, optional
+            The current HHF method.
+            Defaults None, i.e. not compared.
+        percentile : float, optional
+            The current percentile.
+            Defaults None, i.e. not compared.
+        percentage : float, optional
+            The current percentage.
+            Defaults None, i.e. not compared.
+
+        Returns
+        -------
+        bool
+            True if the stage is not in the table or any of them changed.
+        """
+        i = self.index.get((classifier, division))
+        if i is None:
+            return True
+        data = self.data
+        return bool(
+            data["n_scores"][i] != n_scores
+            or (method is not None and data["method"][i] != method)
+            or (percentile is not None
+                and not np.isclose(data["percentile"][i], percentile))
+            or (percentage is not None
+                and not np.isclose(data["percentage"][i], percentage)))
+
+    def update(self, database, method="weibull5", reference=None,
+               divisions=None, chunk_size=64, max_workers=1, min_scores=10,
+               force=False):
+        """Refit the stale stages and write the table
+
+        Parameters
+        ----------
+        database : object
+            The hit factor database, e.g.
+            `uclass.database.snapshot.Snapshot` or
+            `uclass.database.mongo.Mongo`.
+            Must have `get_hf_many(pairs)` and `get_counts(division)`
+            methods.
+        method : str, optional
+            The HHF method, "weibull5" or "ppregress".
+            Defaults "weibull5".
+        reference : dict, optional
+            Reference stages of each division for "ppregress".
+            See `uclass.hhf_pipeline.hhf_pipeline.HHFPipeline`.
+            Defaults None.
+        divisions : list of str, optional
+            The divisions.
+            Defaults None, i.e. all divisions.
+        chunk_size : int, optional
+            Number of stages fitted per task.
+            Defaults 64.
+        max_workers : int, optional
+            Number of processes.
+            The chunks are fitted in this process if it is 1.
+            Defaults 1.
+        min_scores : int, optional
+            Stages with fewer positive hit factors are removed.
+            Defaults 10.
+        force : bool, optional
+            Refit all stages.
+            Defaults False.
+
+        Returns
+        -------
+        report : dict
+            "n_updated": number of stages fitted.
+            "n_fresh": number of stages kept as they were.
+            "n_failed": number of stages whose fit did not converge.
+            "n_removed": number of stages removed, i.e. without
+            enough scores any more.
+            "elapsed": total time in seconds.
+        """
+        t0 = time.perf_counter()
+        pipeline = uclass.hhf_pipeline.hhf_pipeline.HHFPipeline(
+            database, None, method=method, reference=reference,
+            divisions=divisions, chunk_size=chunk_size,
+            max_workers=max_workers, min_scores=min_scores)
+        percentiles = pipeline.get_percentiles()
+
+        removed = set()
+        new_rows = []
+        n_fresh = n_failed = 0
+        executor = None
+        if max_workers != 1:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+        try:
+            for division, (percentile, percentage) in percentiles.items():
+                counts = database.get_counts(division)
+                for classifier, division_ in self.index:
+                    if (division_ == division
+                            and counts.get(classifier, 0) < min_scores):
+                        removed.add((classifier, division))
+                stale = []
+                for classifier in sorted(counts):
+                    if counts[classifier] < min_scores:
+                        continue
+                    if force or self.is_stale(
+                            classifier, division, counts[classifier],
+                            method, percentile, percentage):
+                        stale.append(classifier)
+                    else:
+                        n_fresh += 1
+                hf = database.get_hf_many(
+                    [(classifier, division) for classifier in stale])
+                tasks = [
+                    (division, chunk,
+                     [np.asarray(hf[classifier, division])
+                      for classifier in chunk],
+                     method, percentile, percentage)
+                    for chunk in uclass.hhf_pipeline.hhf_pipeline._chunks(
+                        stale, chunk_size)]
+                fit_chunk = uclass.hhf_pipeline.hhf_pipeline._fit_chunk
+                if executor is None:
+                    results = map(fit_chunk, tasks)
+                else:
+                    results = executor.map(fit_chunk, tasks)
+                for rows in results:
+                    updated = time.time()
+                    for row in rows:
+                        if not row["converged"]:
+                            n_failed += 1
+                            continue
+                        row["updated"] = updated
+                        new_rows.append(row)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self._merge(new_rows, removed)
+        self.save()
+
+        elapsed = time.perf_counter() - t0
+        report = {
+            "n_updated": len(new_rows),
+            "n_fresh": n_fresh,
+            "n_removed": len(removed),
+            "n_failed": n_failed,
+            "elapsed": elapsed,
+        }
+        uclass.instrumentation.count("hhf_table_updated", len(new_rows))
+        uclass.logger.logger.info(
+            f"HHF table: {len(new_rows)} stages updated, {n_fresh} fresh, "
+            f"{len(removed)} removed in {elapsed:.2f} s")
+        if n_failed:
+            uclass.logger.logger.warning(
+                f"HHF table: {n_failed} stages not converged, not updated.")
+        return report
+
+    def _merge(self, rows, removed):
+        """Replace and remove rows, keeping the table sorted"""
+        replaced = {(row["classifier"], row["division"]) for row in rows}
+        keep = [i for pair, i in self.index.items()
+                if pair not in replaced and pair not in removed]
+        data = {}
+        for field in self.fields:
+            new = np.array([row[field] for row in rows],
+                           dtype=self.dtypes.get(field, float))
+            data[field] = np.concatenate([self.data[field][keep], new])
+        order = np.lexsort((data["classifier"], data["division"]))
+        self._set_data({field: data[field][order] for field in self.fields})
+
+    def _set_data(self, data):
+        """Set the columns and rebuild the index"""
+        self.data = data
+        self.index = {
+            pair: i for i, pair in enumerate(
+                zip(data["classifier"].tolist(), data["division"].tolist()))}
+        # Python floats are faster to look up than NumPy scalars.
+        self._hhf = data["hhf"].tolist()
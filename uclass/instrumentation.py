@@ -0,0 +1,323 @@
+"""Opt-in instrumentation of uclass hot paths
+
+Notes
+-----
+Instrumentation is disabled by default and every hook returns
+immediately after checking a flag, so it can be left in place.
+`enable()` records timings and counters into a process-wide report,
+and `collect()` records those of a block of code into a report of its
+own, e.g.
+
+    with uclass.instrumentation.collect() as report:
+        hhf = weibull5.get_hhf()
+    report.to_dict()
+
+Recorded metrics include the time of the fits, regressions and queries,
+optimizer iterations ("*_nit") and function evaluations ("*_nfev"),
+rows fetched from databases ("rows_fetched") and cache hits and misses
+("cache_hits", "cache_misses").
+"""
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+
+_enabled = False
+_lock = threading.Lock()
+_collectors = contextvars.ContextVar("uclass_collectors", default=())
+
+
+class Report:
+    """Timings and counters
+
+    Notes
+    -----
+    Metrics are keyed by name and labels,
+    e.g. ("rows_fetched", (("source", "mongo"),)).
+    """
+    def __init__(self):
+        """Constructor"""
+        self.timers = {}
+        self.counters = {}
+
+    def add_time(self, key, seconds):
+        """Record a timing
+
+        Parameters
+        ----------
+        key : tuple
+            Name and labels.
+        seconds : float
+            The time.
+        """
+        count, total = self.timers.get(key, (0, 0.))
+        self.timers[key] = (count+1, total+seconds)
+
+    def add_count(self, key, value):
+        """Increment a counter
+
+        Parameters
+        ----------
+        key : tuple
+            Name and labels.
+        value : float
+            The increment.
+        """
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def clear(self):
+        """Remove all metrics"""
+        self.timers.clear()
+        self.counters.clear()
+
+    def to_dict(self):
+        """Structured report
+
+        Returns
+        -------
+        report : dict
+            "timers": {metric: {"count", "total", "mean"}} in seconds.
+            "counters": {metric: value}.
+            Metrics are formatted as `name{label=value,...}`.
+        """
+        timers = {
+            _format(key): {"count": count, "total": total,
+                           "mean": total/count}
+            for key, (count, total) in sorted(self.timers.items())}
+        counters = {
+            _format(key): value
+            for key, value in sorted(self.counters.items())}
+        return {"timers": timers, "counters": counters}
+
+    def prometheus(self, prefix="uclass"):
+        """Prometheus text exposition of the metrics
+
+        Timers are exported as `<prefix>_<name>_seconds_sum` and
+        `<prefix>_<name>_seconds_count`, counters as
+        `<prefix>_<name>_total`.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Prefix of the metric names.
+            Defaults "uclass".
+
+        Returns
+        -------
+        str
+        """
+        lines = []
+        names = sorted({key[0] for key in self.timers})
+        for name in names:
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for key, (count, total) in sorted(self.timers.items()):
+                if key[0] == name:
+                    labels = _format_labels(key[1])
+                    lines.append(f"{metric}_sum{labels} {total!r}")
+                    lines.append(f"{metric}_count{labels} {count}")
+        names = sorted({key[0] for key in self.counters})
+        for name in names:
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(self.counters.items()):
+                if key[0] == name:
+                    labels = _format_labels(key[1])
+                    lines.append(f"{metric}{labels} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+_report = Report()
+
+
+def enable():
+    """Record metrics into the process-wide report"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording metrics into the process-wide report"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """Whether the process-wide report is recording"""
+    return _enabled
+
+
+def reset():
+    """Clear the process-wide report"""
+    with _lock:
+        _report.clear()
+
+
+def report():
+    """Structured process-wide report, see `Report.to_dict`"""
+    with _lock:
+        return _report.to_dict()
+
+
+def prometheus_text(prefix="uclass"):
+    """Prometheus text of the process-wide report, see `Report.prometheus`"""
+    with _lock:
+        return _report.prometheus(prefix)
+
+
+@contextlib.contextmanager
+def collect():
+    """Record the metrics of a block of code
+
+    Collectors nest and are local to the thread or asyncio task.
+
+    Yields
+    ------
+    report : Report
+        The metrics recorded in the block.
+    """
+    report = Report()
+    token = _collectors.set(_collectors.get() + (report,))
+    try:
+        yield report
+    finally:
+        _collectors.reset(token)
+
+
+def count(name, value=1, **labels):
+    """Increment a counter
+
+    Parameters
+    ----------
+    name : str
+        Name of the counter.
+    value : float, optional
+        The increment.
+        Defaults 1.
+    **labels
+        Labels of the counter.
+    """
+    if not _enabled and not _collectors.get():
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        for sink in _sinks():
+            sink.add_count(key, value)
+
+
+def timer(name, **labels):
+    """Time a block of code
+
+    Parameters
+    ----------
+    name : str
+        Name of the timer.
+    **labels
+        Labels of the timer.
+
+    Returns
+    -------
+    context manager
+    """
+    if not _enabled and not _collectors.get():
+        return _null_timer
+    return _Timer((name, tuple(sorted(labels.items()))))
+
+
+def timed(name, **labels):
+    """Decorator timing a function
+
+    Parameters
+    ----------
+    name : str
+        Name of the timer.
+    **labels
+        Labels of the timer.
+
+    Returns
+    -------
+    decorator
+    """
+    key = (name, tuple(sorted(labels.items())))
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and not _collectors.get():
+                return func(*args, **kwargs)
+            with _Timer(key):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_optimize(name, res, **labels):
+    """Count the iterations and function evaluations of an optimizer
+
+    Parameters
+    ----------
+    name : str
+        Prefix of the counters "<name>_nit" and "<name>_nfev".
+    res : scipy.optimize.OptimizeResult
+        The result of the optimizer.
+    **labels
+        Labels of the counters.
+    """
+    if not _enabled and not _collectors.get():
+        return
+    count(f"{name}_nit", getattr(res, "nit", 0), **labels)
+    count(f"{name}_nfev", getattr(res, "nfev", 0), **labels)
+
+
+def _sinks():
+    """Reports to record into"""
+    sinks = list(_collectors.get())
+    if _enabled:
+        sinks.append(_report)
+    return sinks
+
+
+def _format(key):
+    """name{label=value,...}"""
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def _format_labels(labels):
+    """Prometheus labels"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class _Timer:
+    """Timer context manager"""
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.t0
+        with _lock:
+            for sink in _sinks():
+                sink.add_time(self.key, seconds)
+        return False
+
+
+class _NullTimer:
+    """Timer context manager doing nothing, when disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_timer = _NullTimer()
@@ -0,0 +1,60 @@
+"""Lazy loading of package attributes
+
+Notes
+-----
+Packages export their names with a module-level `__getattr__`
+(PEP 562), so that `import uclass` is cheap and the submodules,
+and numpy, scipy and pymongo with them, are imported on first use, e.g.
+
+    __getattr__, __dir__, __all__ = uclass.lazy.attach(
+        __name__, {"Weibull": "weibull"}, submodules=["weibull"])
+"""
+import importlib
+
+
+def attach(package, exports, submodules=()):
+    """Lazy attributes of a package
+
+    Parameters
+    ----------
+    package : str
+        Name of the package, i.e. `__name__`.
+    exports : dict
+        `{name: submodule}` of the exported names,
+        the submodule being relative to the package.
+    submodules : list of str, optional
+        Submodules or subpackages also loaded on attribute access,
+        e.g. `uclass.statistics`.
+        Defaults ().
+
+    Returns
+    -------
+    __getattr__ : func
+        Module `__getattr__`, importing the submodule of a name on
+        first access.
+    __dir__ : func
+        Module `__dir__`, listing the exported names and submodules.
+    __all__ : list of str
+        The exported names, for star imports.
+    """
+    exports = dict(exports)
+    submodules = set(submodules)
+
+    def __getattr__(name):
+        if name in exports:
+            module = importlib.import_module(f".{exports[name]}", package)
+            value = getattr(module, name)
+        elif name in submodules:
+            value = importlib.import_module(f".{name}", package)
+        else:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}")
+        # Cache it, so that __getattr__ is only called once per name.
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        module = importlib.import_module(package)
+        return sorted(set(vars(module)) | set(exports) | submodules)
+
+    return __getattr__, __dir__, list(exports)
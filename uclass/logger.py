@@ -1,20 +1,45 @@
 import logging
 
 
-logger = logging.getLogger("uclass")
+_configured = False
 
-logger.setLevel(logging.DEBUG)
 
-# create console handler and set level to debug
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
+def get_logger():
+    """The uclass logger
 
-# create formatter
-formatter = logging.Formatter('%(asctime)s %(name)s %(levelname)-8s: %(message)s', datefmt='%H:%M')
+    A console handler is attached on first use,
+    not when the module is imported.
 
-# add formatter to ch
-ch.setFormatter(formatter)
+    Returns
+    -------
+    logger : logging.Logger
+    """
+    global _configured
+    logger = logging.getLogger("uclass")
+    if _configured:
+        return logger
 
-# add ch to logger
-logger.addHandler(ch)
-logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s %(name)s %(levelname)-8s: %(message)s', datefmt='%H:%M')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.propagate = False
+    _configured = True
+    return logger
+
+
+def __getattr__(name):
+    """`logger` is configured on first access"""
+    if name == "logger":
+        return get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1,21 @@
-from .weibull import *
+import uclass.lazy
+
+
+__getattr__, __dir__, __all__ = uclass.lazy.attach(
+    __name__,
+    {
+        "Distribution": "distribution",
+        "Weibull": "weibull",
+        "LogitNormal": "logitnormal",
+        "profile_score": "weibull_mle",
+        "profile_scale": "weibull_mle",
+        "fit_weibull_mle": "weibull_mle",
+        "fit_weibull_batch": "weibull_mle",
+        "fit_weibull_weighted": "weibull_mle",
+        "negative_log_likelihood": "fitting",
+        "fit_distribution": "fitting",
+        "fit_distribution_batch": "fitting",
+        "QuantileSketch": "sketch",
+    },
+    submodules=["distribution", "weibull", "logitnormal", "weibull_mle",
+                "fitting", "sketch"])
@@ -1,12 +1,57 @@
 """Distribution base class"""
+import numpy as np
+
+
+def _log(x, out=None, shape=None):
+    """Logarithm into an array, which is a 0-d array for scalars
+
+    The array has the given shape, `x` broadcast against it.
+    """
+    if out is None:
+        if shape is None:
+            shape = np.shape(x)
+        out = np.empty(shape)
+    return np.log(x, out=out)
+
+
+def _unwrap(z):
+    """Scalar from a 0-d array"""
+    if z.ndim == 0:
+        return z[()]
+    return z
+
+
+def _as_param(value):
+    """Parameter as a float array, scalars are kept as is"""
+    if np.ndim(value) == 0:
+        return value
+    return np.asarray(value, dtype=float)
 
 
 class Distribution:
-    """Distribution base class"""
+    """Distribution base class
+
+    Notes
+    -----
+    Parameters can be arrays, in which case an object represents
+    many distributions. Parameters are broadcast against each other
+    and against the random variable following NumPy rules,
+    e.g. parameters of shape (m, 1) and samples of shape (n,)
+    give an (m, n) array.
+    """
     def __init__(self):
         """Constructor"""
         pass
 
+    # Transform of each parameter for fitting, None or "log".
+    # See uclass.statistics.fitting.fit_distribution.
+    param_transforms = ()
+
+    @property
+    def params(self):
+        """Parameters"""
+        return ()
+
     @property
     def mean(self):
         """Mean"""
@@ -72,5 +117,37 @@ class Distribution:
         """
         return None
 
+    def logpdf(self, x):
+        """Logarithm of the probability density function
+
+        Parameters
+        ----------
+        x : array-like
+            The random variable
 
+        Returns
+        -------
+        array-like
+            The logarithm of the probability density function.
+        """
+        return None
+
+    def nll(self, x):
+        """Mean negative log likelihood
+
+        Parameters
+        ----------
+        x : array-like
+            Observed values of the random variable.
+
+        Returns
+        -------
+        float or array
+            The mean negative log likelihood over the last axis.
+        """
+        return -np.mean(self.logpdf(x), axis=-1)
 
+    def _shape(self, x):
+        """Shape of x broadcast against the parameters"""
+        return np.broadcast_shapes(
+            np.shape(x), *(np.shape(param) for param in self.params))
@@ -1,10 +1,25 @@
-"""Probability distribution fitting class"""
+"""Probability distribution fitting"""
 import numpy as np
+import scipy.optimize
+
+import uclass.instrumentation
+
+
+_transforms = {
+    # name: (forward, inverse, derivative of inverse)
+    None: (lambda p: p, lambda t: t, lambda t: np.ones_like(t)),
+    "identity": (lambda p: p, lambda t: t, lambda t: np.ones_like(t)),
+    "log": (np.log, np.exp, np.exp),
+}
+
+# Methods of scipy.optimize.minimize that need no Hessian.
+_methods = ["nelder-mead", "powell", "cg", "bfgs", "l-bfgs-b", "tnc",
+            "cobyla", "cobyqa", "slsqp", "trust-constr"]
 
 
 def negative_log_likelihood(params, x, pdf):
     """Cost function for maximum likelihood estimation.
-    
+
     Parameters
     ----------
     params : array-like
@@ -23,24 +38,166 @@ def negative_log_likelihood(params, x, pdf):
     return np.mean(nll)
 
 
-def fit_distribution(pdf, x, params0):
+@uclass.instrumentation.timed("fit_distribution")
+def fit_distribution(distribution, x, params0, method=None, transforms=None,
+                     options=None):
     """Fit distribution to samples of random variables
 
     Parameters
     ----------
-    pdf : func
-        Probability distribution function.
+    distribution : type
+        Subclass of `uclass.statistics.distribution.Distribution`,
+        constructed as `distribution(*params)`.
     x : array-like
         Samples of random variables.
     params0 : array-like
-        Iniital guess of the PDF parameters.
+        Initial guess of the parameters, e.g. a previous fit (warm start).
+    method : str, optional
+        "mle" uses the dedicated maximum likelihood solver
+        `distribution._mle` of the distribution.
+        Other methods are passed to `scipy.optimize.minimize`,
+        e.g. "BFGS" or "Nelder-Mead".
+        Defaults None, i.e. "mle" if the distribution has a dedicated
+        solver, otherwise "BFGS".
+    transforms : list, optional
+        Transform of each parameter to the space of the optimizer,
+        None or "identity", or "log" (for positive parameters).
+        Defaults None, i.e. `distribution.param_transforms`.
+    options : dict, optional
+        Options passed to `scipy.optimize.minimize`.
 
     Returns
     -------
     res : scipy.optimize.OptimizeResult
+        `res.x` are the fitted parameters.
+
+    Raises
+    ------
+    ValueError
+        If the method is not supported, or is "mle" and the
+        distribution has no dedicated solver.
+
+    Notes
+    -----
+    Gradient-based methods use the analytic gradient
+    `distribution.nll_grad` if the distribution provides it,
+    and finite differences otherwise.
     """
+    if method is None:
+        if hasattr(distribution, "_mle"):
+            method = "mle"
+        else:
+            method = "BFGS"
+    if method != "mle" and method.lower() not in _methods:
+        raise ValueError(f"Method {method} not supported.")
+    if method == "mle":
+        if not hasattr(distribution, "_mle"):
+            raise ValueError(
+                f"{distribution.__name__} has no maximum likelihood solver.")
+        res = distribution._mle(x, params0)
+        uclass.instrumentation.record_optimize(
+            "fit_distribution", res, distribution=distribution.__name__,
+            method=method)
+        return res
+
+    if transforms is None:
+        transforms = distribution.param_transforms
+    forward = [_transforms[transform][0] for transform in transforms]
+    inverse = [_transforms[transform][1] for transform in transforms]
+    derivative = [_transforms[transform][2] for transform in transforms]
+
+    def to_params(theta):
+        """Parameters from the optimizer variables"""
+        return [f(theta_i) for f, theta_i in zip(inverse, theta)]
+
+    analytic = hasattr(distribution, "nll_grad")
+    derivative_free = method.lower() in ["nelder-mead", "powell", "cobyla"]
+    with_grad = analytic and not derivative_free
+
+    def cost(theta, x):
+        """Mean negative log likelihood, and its gradient if analytic"""
+        params = to_params(theta)
+        instance = distribution(*params)
+        nll = instance.nll(x)
+        if not with_grad:
+            return nll
+        # Chain rule through the transforms.
+        dparams = [f(theta_i) for f, theta_i in zip(derivative, theta)]
+        grad = instance.nll_grad(x) * np.array(dparams)
+        return nll, grad
+
+    if derivative_free:
+        jac = None
+    elif with_grad:
+        jac = True
+    else:
+        jac = "2-point"
+
+    theta0 = [f(p) for f, p in zip(forward, params0)]
+    x = np.asarray(x, dtype=float)
     res = scipy.optimize.minimize(
-        negative_log_likehood, x0=params0, args=(x, pdf),
-        method="Nelder-Mead")
+        cost, x0=theta0, args=(x,), method=method, jac=jac, options=options)
+    res.x = np.array(to_params(res.x))
+    uclass.instrumentation.record_optimize(
+        "fit_distribution", res, distribution=distribution.__name__,
+        method=method)
     return res
 
+
+def fit_distribution_batch(distribution, list_x, params0, method=None,
+                           transforms=None, options=None):
+    """Fit distributions to many sets of samples
+
+    Parameters
+    ----------
+    distribution : type
+        Subclass of `uclass.statistics.distribution.Distribution`.
+    list_x : list of array-like
+        Sets of samples of random variables.
+    params0 : array-like
+        Initial guess of the parameters.
+        Either one guess for all sets or one row per set.
+    method : str, optional
+        See `fit_distribution`.
+        "mle" uses `distribution._mle_batch` if the distribution has it,
+        which fits all sets at once.
+    transforms : list, optional
+        See `fit_distribution`.
+    options : dict, optional
+        See `fit_distribution`.
+
+    Returns
+    -------
+    params : array
+        Fitted parameters, one row per set.
+    success : array
+        Boolean array, whether each fit converged.
+
+    Notes
+    -----
+    Without a batch solver, the sets are fitted in turn and, if a single
+    initial guess is given, each fit is warm-started from the previous
+    solution.
+    """
+    if method is None and hasattr(distribution, "_mle"):
+        method = "mle"
+    if method == "mle" and hasattr(distribution, "_mle_batch"):
+        return distribution._mle_batch(list_x, params0)
+
+    n_sets = len(list_x)
+    params0 = np.asarray(params0, dtype=float)
+    warm_start = params0.ndim == 1
+    params = np.empty((n_sets, len(distribution.param_transforms)))
+    success = np.zeros(n_sets, dtype=bool)
+    guess = params0
+    for i, x in enumerate(list_x):
+        if not warm_start:
+            guess = params0[i]
+        res = fit_distribution(
+            distribution, x, guess, method=method, transforms=transforms,
+            options=options)
+        params[i] = res.x
+        success[i] = res.success
+        if warm_start and res.success:
+            guess = res.x
+    return params, success
@@ -1,18 +1,30 @@
 """Logit-normal distribution"""
 import numpy as np
+import scipy.optimize
 import scipy.special
 
+from uclass.statistics.distribution import (
+    Distribution, _as_param, _log, _unwrap)
+
+
+class LogitNormal(Distribution):
+    """Logit-normal distribution class
+
+    Notes
+    -----
+    `sigma` and `mu` can be arrays.
+    See `uclass.statistics.distribution.Distribution`.
+    """
+    param_transforms = ("log", None)
 
-class LogitNormal:
-    """Logit-normal distribution class"""
     def __init__(self, sigma, mu):
         """Constructor
         
         Parameters
         ----------
-        sigma : float
+        sigma : float or array-like
             Scale.
-        mu : float
+        mu : float or array-like
             Location.
         """
         self.sigma = sigma
@@ -26,7 +38,7 @@ class LogitNormal:
     @sigma.setter
     def sigma(self, _sigma):
         """sigma.setter"""
-        self._sigma = _sigma
+        self._sigma = _as_param(_sigma)
 
     @property
     def mu(self):
@@ -36,7 +48,12 @@ class LogitNormal:
     @mu.setter
     def mu(self, _mu):
         """mu.setter"""
-        self._mu = _mu
+        self._mu = _as_param(_mu)
+
+    @property
+    def params(self):
+        """Parameters (sigma, mu)"""
+        return self.sigma, self.mu
 
     def pdf(self, x):
         """Probability density function
@@ -54,7 +71,7 @@ class LogitNormal:
         logit = lambda p: np.log(p/(1-p))
         _pdf = (1 / (self.sigma*np.sqrt(2*np.pi))
                 * 1 / (x*(1-x))
-                * np.exp(-(logit(x)-self.mu)**2/(2*self.sigma)**2))
+                * np.exp(-(logit(x)-self.mu)**2/(2*self.sigma**2)))
         return _pdf
 
     def cdf(self, x):
@@ -75,5 +92,197 @@ class LogitNormal:
                 * (1 + scipy.special.erf(
                     (logit(x)-self.mu)/(np.sqrt(2*self.sigma**2)))))
         return _cdf
-        
 
+    def logpdf(self, x, out=None):
+        """Logarithm of the probability density function
+
+        Parameters
+        ----------
+        x : array-like
+            Random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the probability density function.
+        """
+        logx = _log(x)
+        log1mx = self._log1m(x)
+        if out is None:
+            out = np.empty(self._shape(x))
+        z = np.subtract(logx, log1mx, out=out)  # logit(x)
+        z -= self.mu
+        z *= z
+        z *= -0.5 / self.sigma**2
+        logx += log1mx
+        z -= logx
+        z -= np.log(self.sigma) + 0.5*np.log(2*np.pi)
+        return _unwrap(z)
+
+    def logcdf(self, x, out=None):
+        """Logarithm of the cumulative distribution function
+
+        Parameters
+        ----------
+        x : array-like
+            Random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the cumulative distribution function.
+        """
+        z = self._standardize(_log(x), self._log1m(x), out=out)
+        scipy.special.log_ndtr(z, out=z)
+        return _unwrap(z)
+
+    def logsf(self, x, out=None):
+        """Logarithm of the survival function
+
+        Parameters
+        ----------
+        x : array-like
+            Random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the survival function, i.e. `log(1-cdf(x))`.
+        """
+        z = self._standardize(_log(x), self._log1m(x), out=out)
+        np.negative(z, out=z)
+        scipy.special.log_ndtr(z, out=z)
+        return _unwrap(z)
+
+    def nll(self, x):
+        """Mean negative log likelihood
+
+        Parameters
+        ----------
+        x : array-like
+            Observed values of the random variable.
+
+        Returns
+        -------
+        float or array
+            The mean negative log likelihood.
+            With array parameters, the mean is over the last axis.
+        """
+        if np.ndim(self.sigma) or np.ndim(self.mu):
+            return -np.mean(self.logpdf(x), axis=-1)
+
+        logx = _log(x)
+        log1mx = self._log1m(x)
+        n = logx.size
+        d = logx - log1mx - self.mu  # logit(x) - mu
+        logx += log1mx
+        nll_ = (np.log(self.sigma) + 0.5*np.log(2*np.pi) + np.sum(logx)/n
+                + 0.5*(d.ravel()@d.ravel())/n/self.sigma**2)
+        return nll_
+
+    def nll_grad(self, x):
+        """Gradient of the mean negative log likelihood
+
+        Parameters
+        ----------
+        x : array-like
+            Observed values of the random variable.
+
+        Returns
+        -------
+        array
+            The derivatives with respect to `sigma` and `mu`.
+        """
+        d = _log(x) - self._log1m(x) - self.mu  # logit(x) - mu
+        d = d.ravel()
+        dsigma = 1/self.sigma - (d@d)/d.size/self.sigma**3
+        dmu = -np.mean(d) / self.sigma**2
+        return np.array([dsigma, dmu])
+
+    def quantile(self, percentile):
+        """Quantile function
+
+        Parameters
+        ----------
+        percentile : float
+            Percentile (in fraction).
+
+        Returns
+        -------
+        x : float
+            The value of the random variable.
+        """
+        z = self.mu + self.sigma*scipy.special.ndtri(percentile)
+        return scipy.special.expit(z)
+
+    @staticmethod
+    def _mle(x, params0=None):
+        """Maximum likelihood fit in closed form
+
+        The maximum likelihood `mu` and `sigma` are the mean and
+        the (biased) standard deviation of `logit(x)`.
+        See `uclass.statistics.fitting.fit_distribution`.
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        if len(x) == 0:
+            raise ValueError(
+                "Cannot fit a logit-normal distribution to no samples.")
+        if np.any(x <= 0) or np.any(x >= 1):
+            raise ValueError("Logit-normal MLE requires samples in (0, 1).")
+        logit = scipy.special.logit(x)
+        mu = np.mean(logit)
+        logit -= mu
+        sigma = np.sqrt(logit@logit / len(logit))
+        return scipy.optimize.OptimizeResult(
+            x=np.array([sigma, mu]), success=True, nit=0, nfev=1)
+
+    @staticmethod
+    def _mle_batch(list_x, params0=None):
+        """Maximum likelihood fits of many sets of samples at once
+
+        The samples are concatenated and the mean and variance of
+        `logit(x)` of each set are reduced by offsets in one pass.
+        See `uclass.statistics.fitting.fit_distribution_batch`.
+        """
+        arrays = [np.asarray(x, dtype=float).ravel() for x in list_x]
+        n_sets = len(arrays)
+        if n_sets == 0:
+            return np.empty((0, 2)), np.empty(0, dtype=bool)
+        counts = np.array([len(x) for x in arrays])
+        if np.any(counts == 0):
+            raise ValueError(
+                "Cannot fit a logit-normal distribution to no samples.")
+        logit = np.concatenate(arrays)
+        if np.any(logit <= 0) or np.any(logit >= 1):
+            raise ValueError("Logit-normal MLE requires samples in (0, 1).")
+        scipy.special.logit(logit, out=logit)
+        offsets = np.zeros(n_sets, dtype=int)
+        offsets[1:] = np.cumsum(counts)[:-1]
+
+        mu = np.add.reduceat(logit, offsets) / counts
+        logit -= np.repeat(mu, counts)
+        logit *= logit
+        sigma = np.sqrt(np.add.reduceat(logit, offsets) / counts)
+        params = np.column_stack([sigma, mu])
+        return params, np.ones(n_sets, dtype=bool)
+
+    @staticmethod
+    def _log1m(x):
+        """log(1-x)"""
+        log1mx = np.subtract(1, x, out=np.empty(np.shape(x)))
+        return np.log(log1mx, out=log1mx)
+
+    def _standardize(self, logx, log1mx, out=None):
+        """(logit(x)-mu)/sigma"""
+        if out is None:
+            out = np.empty(self._shape(logx))
+        z = np.subtract(logx, log1mx, out=out)
+        z -= self.mu
+        z /= self.sigma
+        return z
@@ -0,0 +1,281 @@
+"""Mergeable quantile sketch"""
+import io
+
+import numpy as np
+
+import uclass.statistics.weibull
+import uclass.statistics.weibull_mle
+
+
+class QuantileSketch:
+    """KLL quantile sketch
+
+    Notes
+    -----
+    The sketch keeps a hierarchy of compactors. Items at level h stand
+    for 2**h samples. When a level exceeds its capacity, it is sorted
+    and every other item (from a random offset) is promoted to the next
+    level, so the memory is O(k) regardless of the number of samples
+    and the rank error is O(1/k) with high probability.
+    Sketches are mergeable, so they can be built per shard and combined.
+
+    References
+    ----------
+    Z. Karnin, K. Lang, E. Liberty,
+    Optimal Quantile Approximation in Streams, FOCS 2016.
+    """
+    def __init__(self, k=200, rng=None):
+        """Constructor
+
+        Parameters
+        ----------
+        k : int, optional
+            Capacity of the top level, which sets the accuracy.
+            Defaults 200.
+        rng : int or numpy.random.Generator, optional
+            Random number generator of the compaction offsets.
+            Defaults None.
+        """
+        self.k = k
+        self.rng = np.random.default_rng(rng)
+        self.n = 0
+        self.levels = [np.empty(0)]
+
+    @property
+    def k(self):
+        """Capacity of the top level"""
+        return self._k
+
+    @k.setter
+    def k(self, _k):
+        """k.setter"""
+        self._k = _k
+
+    @property
+    def size(self):
+        """Number of items retained"""
+        return sum(len(level) for level in self.levels)
+
+    def update(self, x):
+        """Add samples
+
+        Parameters
+        ----------
+        x : array-like
+            Samples of the random variable.
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self.n += len(x)
+        self._compress()
+
+    def merge(self, other):
+        """Merge another sketch into this one
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            The other sketch.
+
+        Returns
+        -------
+        self : QuantileSketch
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def items(self):
+        """Retained items and their weights
+
+        Returns
+        -------
+        items : array
+            The items, sorted.
+        weights : array
+            The number of samples each item stands for.
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 2.**h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """Approximate quantile
+
+        Parameters
+        ----------
+        q : float or array-like
+            Quantile (in fraction).
+
+        Returns
+        -------
+        x : float or array
+            The value of the random variable.
+        """
+        if self.n == 0:
+            raise ValueError("Empty sketch.")
+        items, weights = self.items()
+        cumulative = np.cumsum(weights)
+        index = np.searchsorted(
+            cumulative, np.asarray(q)*cumulative[-1], side="left")
+        return items[np.minimum(index, len(items)-1)]
+
+    def cdf(self, x):
+        """Approximate cumulative distribution function
+
+        Parameters
+        ----------
+        x : float or array-like
+            Random variable.
+
+        Returns
+        -------
+        float or array
+            The fraction of samples less than or equal to `x`.
+        """
+        if self.n == 0:
+            raise ValueError("Empty sketch.")
+        items, weights = self.items()
+        cumulative = np.concatenate([[0.], np.cumsum(weights)])
+        index = np.searchsorted(items, x, side="right")
+        return cumulative[index] / cumulative[-1]
+
+    def fit_weibull(self, k0=3.6):
+        """Approximate Weibull maximum likelihood fit
+
+        The retained items are fitted with their weights,
+        see `uclass.statistics.weibull_mle.fit_weibull_mle`.
+        Non-positive items are ignored.
+
+        Parameters
+        ----------
+        k0 : float, optional
+            Initial guess of the shape parameter.
+            Defaults 3.6.
+
+        Returns
+        -------
+        weibull : uclass.statistics.weibull.Weibull
+        """
+        items, weights = self.items()
+        mask = items > 0
+        res = uclass.statistics.weibull_mle.fit_weibull_mle(
+            items[mask], k0=k0, weights=weights[mask])
+        lam, k = res.x
+        return uclass.statistics.weibull.Weibull(lam, k)
+
+    def to_bytes(self):
+        """Serialize the sketch
+
+        Returns
+        -------
+        bytes
+        """
+        buffer = io.BytesIO()
+        np.savez(
+            buffer, k=self.k, n=self.n,
+            sizes=[len(level) for level in self.levels],
+            items=np.concatenate(self.levels))
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(data, rng=None):
+        """Deserialize a sketch
+
+        Parameters
+        ----------
+        data : bytes
+            Output of `to_bytes`.
+        rng : int or numpy.random.Generator, optional
+            Random number generator of the compaction offsets.
+            Defaults None.
+
+        Returns
+        -------
+        QuantileSketch
+        """
+        with np.load(io.BytesIO(data)) as arrays:
+            sketch = QuantileSketch(k=int(arrays["k"]), rng=rng)
+            sketch.n = int(arrays["n"])
+            sketch.levels = np.split(
+                arrays["items"], np.cumsum(arrays["sizes"])[:-1])
+        return sketch
+
+    @staticmethod
+    def from_mongo(mongo, classifier, division, k=200, batch_size=10000,
+                   rng=None):
+        """Sketch the positive hit factors of a stage from a Mongo stream
+
+        Parameters
+        ----------
+        mongo : uclass.database.mongo.Mongo
+            The Mongo database.
+        classifier : str
+            The classifier, e.g. "23-01".
+        division : str
+            The division, e.g. "co".
+        k : int, optional
+            Capacity of the top level.
+            Defaults 200.
+        batch_size : int, optional
+            Number of documents per cursor batch,
+            which is also the size of the buffer between updates.
+            Defaults 10000.
+        rng : int or numpy.random.Generator, optional
+            Random number generator of the compaction offsets.
+            Defaults None.
+
+        Returns
+        -------
+        QuantileSketch
+        """
+        import uclass.database.mongo
+        query = {
+            "classifier": classifier,
+            "division": division,
+            "bad": uclass.database.mongo.NOT_BAD,
+            "hf": {"$gt": 0},
+        }
+        cursor = mongo.scores.find(
+            query, projection={"_id": 0, "hf": 1}, batch_size=batch_size)
+        sketch = QuantileSketch(k=k, rng=rng)
+        buffer = np.empty(batch_size)
+        n = 0
+        for item in cursor:
+            buffer[n] = item["hf"]
+            n += 1
+            if n == batch_size:
+                sketch.update(buffer)
+                n = 0
+        sketch.update(buffer[:n])
+        return sketch
+
+    def _capacity(self, h):
+        """Capacity of level h"""
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2/3)**depth)))
+
+    def _compress(self):
+        """Compact levels exceeding their capacity"""
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity(h):
+                h += 1
+                continue
+            if h == len(self.levels) - 1:
+                self.levels.append(np.empty(0))
+            level = np.sort(level)
+            # An odd item out stays at this level.
+            n_even = len(level) - len(level)%2
+            offset = self.rng.integers(2)
+            promoted = level[offset:n_even:2]
+            self.levels[h] = level[n_even:]
+            self.levels[h+1] = np.concatenate([self.levels[h+1], promoted])
+            h += 1
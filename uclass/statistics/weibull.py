@@ -2,17 +2,30 @@
 import numpy as np
 import scipy.special
 
+import uclass.statistics.weibull_mle
+from uclass.statistics.distribution import (
+    Distribution, _as_param, _log, _unwrap)
+
+
+class Weibull(Distribution):
+    """Weibull distribution class
+
+    Notes
+    -----
+    `lam` and `k` can be arrays, e.g. the fitted parameters of many
+    stages, in which case the properties and methods return arrays.
+    See `uclass.statistics.distribution.Distribution`.
+    """
+    param_transforms = ("log", "log")
 
-class Weibull:
-    """Weibull distribution class"""
     def __init__(self, lam, k):
         """Constructor
         
         Parameters
         ----------
-        lam : float
+        lam : float or array-like
             Scale parameter.
-        k : float
+        k : float or array-like
             shape parameter.
         """
         self.lam = lam
@@ -26,7 +39,7 @@ class Weibull:
     @lam.setter
     def lam(self, _lam):
         """lam.setter"""
-        self._lam = _lam
+        self._lam = _as_param(_lam)
 
     @property
     def k(self):
@@ -36,13 +49,18 @@ class Weibull:
     @k.setter
     def k(self, _k):
         """k.setter"""
-        self._k = _k
+        self._k = _as_param(_k)
+
+    @property
+    def params(self):
+        """Parameters (lam, k)"""
+        return self.lam, self.k
 
     @property
     def mean(self):
         """Mean"""
-        gamma = scipy.special.gamma(1+1/self.k)
-        _mean = self.lam * gamma
+        gamma1, _, _, _ = self._gamma_terms()
+        _mean = self.lam * gamma1
         return _mean
 
     @property
@@ -60,28 +78,27 @@ class Weibull:
     @property
     def kurtosis(self):
         """Kurtosis"""
-        gamma4 = scipy.special.gamma(1+4/self.k)
-        _kurtosis = (self.lam**4 * gamma4
-                     - 4 * self.skewness * self.std**3 * self.mean
-                     - 6 * self.mean**2 * self.std**2
-                     - self.mean**4)
-        _kurtosis /= self.std**4
+        gamma1, gamma2, gamma3, gamma4 = self._gamma_terms()
+        variance = gamma2 - gamma1**2
+        _kurtosis = (gamma4 - 4*gamma1*gamma3 + 6*gamma1**2*gamma2
+                     - 3*gamma1**4)
+        _kurtosis /= variance**2
         _kurtosis -= 3
         return _kurtosis 
 
     @property
     def skewness(self):
         """Skewness"""
-        gamma3 = scipy.special.gamma(1+3/self.k)
-        _skewness = gamma3*self.lam**3 - 3*self.mean*self.std**2 - self.mean**3
-        _skewness /= self.std**3
+        gamma1, gamma2, gamma3, _ = self._gamma_terms()
+        variance = gamma2 - gamma1**2
+        _skewness = gamma3 - 3*gamma1*gamma2 + 2*gamma1**3
+        _skewness /= variance**1.5
         return _skewness
 
     @property
     def variance(self):
         """Variance"""
-        gamma2 = scipy.special.gamma(1+2/self.k)
-        gamma1 = scipy.special.gamma(1+1/self.k)
+        gamma1, gamma2, _, _ = self._gamma_terms()
         _variance = self.lam**2 * (gamma2 - gamma1**2)
         return _variance
 
@@ -90,6 +107,12 @@ class Weibull:
         """Standard deviation"""
         return self.variance**.5
 
+    def _gamma_terms(self):
+        """gamma(1+i/k) for i = 1, 2, 3, 4, from one gamma evaluation"""
+        i = np.arange(1, 5)
+        gamma = scipy.special.gamma(1 + i/np.expand_dims(self.k, -1))
+        return np.moveaxis(gamma, -1, 0)
+
     def pdf(self, x, lam=None, k=None):
         """Probability density function
         
@@ -97,22 +120,20 @@ class Weibull:
         ----------
         x : array-like
             The random variable.
-        lam : float, optional
+        lam : float or array-like, optional
             Scale parameter.
-        k : float, optional
+            Defaults `self.lam`. The object is not modified.
+        k : float or array-like, optional
             shape parameter.
+            Defaults `self.k`. The object is not modified.
 
         Returns
         -------
         array-like
             The probability density function.
         """
-        if lam is not None:
-            self.lam = lam
-        if k is not None:
-            self.k = k
-        k = self.k
-        lam = self.lam
+        lam = self.lam if lam is None else _as_param(lam)
+        k = self.k if k is None else _as_param(k)
         _pdf = (k/lam) * (x/lam)**(k-1) * np.exp(-(x/lam)**k)
         return _pdf
 
@@ -123,25 +144,165 @@ class Weibull:
         ----------
         x : array-like
             The random variable
-        lam : float, optional
+        lam : float or array-like, optional
             Scale parameter.
-        k : float, optional
+            Defaults `self.lam`. The object is not modified.
+        k : float or array-like, optional
             shape parameter.
+            Defaults `self.k`. The object is not modified.
 
         Returns
         -------
         array-like
             The cumulative distribution function
         """
-        if lam is not None:
-            self.lam = lam
-        if k is not None:
-            self.k = k
-        k = self.k
-        lam = self.lam
+        lam = self.lam if lam is None else _as_param(lam)
+        k = self.k if k is None else _as_param(k)
         _cdf = 1-np.exp(-(x/lam)**k)
         return _cdf
 
+    def logpdf(self, x, out=None):
+        """Logarithm of the probability density function
+
+        Parameters
+        ----------
+        x : array-like
+            The random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the probability density function.
+        """
+        k = self.k
+        lam = self.lam
+        z = _log(x, out=out, shape=self._shape(x))
+        z -= np.log(lam)  # log(x/lam)
+        power = np.exp(k*z)  # (x/lam)**k
+        z *= k - 1
+        z -= power
+        z += np.log(k/lam)
+        return _unwrap(z)
+
+    def logcdf(self, x, out=None):
+        """Logarithm of the cumulative distribution function
+
+        Parameters
+        ----------
+        x : array-like
+            The random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the cumulative distribution function.
+        """
+        z = self._neg_log_sf(x, out=out)
+        np.negative(z, out=z)
+        np.expm1(z, out=z)
+        np.negative(z, out=z)
+        np.log(z, out=z)
+        return _unwrap(z)
+
+    def logsf(self, x, out=None):
+        """Logarithm of the survival function
+
+        Parameters
+        ----------
+        x : array-like
+            The random variable.
+        out : array, optional
+            Array to store the result in.
+
+        Returns
+        -------
+        array-like
+            The logarithm of the survival function, i.e. `log(1-cdf(x))`.
+        """
+        z = self._neg_log_sf(x, out=out)
+        np.negative(z, out=z)
+        return _unwrap(z)
+
+    def nll(self, x):
+        """Mean negative log likelihood
+
+        Parameters
+        ----------
+        x : array-like
+            Observed values of the random variable.
+
+        Returns
+        -------
+        float or array
+            The mean negative log likelihood.
+            With array parameters, the mean is over the last axis.
+        """
+        if np.ndim(self.lam) or np.ndim(self.k):
+            return -np.mean(self.logpdf(x), axis=-1)
+
+        k = self.k
+        log_lam = np.log(self.lam)
+        logx = _log(x)
+        mean_logx = np.mean(logx)
+        logx -= log_lam
+        logx *= k
+        np.exp(logx, out=logx)  # (x/lam)**k
+        nll_ = np.log(self.lam/k) - (k-1)*(mean_logx-log_lam) + np.mean(logx)
+        return nll_
+
+    def nll_grad(self, x):
+        """Gradient of the mean negative log likelihood
+
+        Parameters
+        ----------
+        x : array-like
+            Observed values of the random variable.
+
+        Returns
+        -------
+        array
+            The derivatives with respect to `lam` and `k`.
+        """
+        k = self.k
+        lam = self.lam
+        z = np.log(x)
+        z -= np.log(lam)  # log(x/lam)
+        power = np.exp(k*z)  # (x/lam)**k
+        mean_power = np.mean(power)
+        dlam = k/lam * (1-mean_power)
+        dk = -1/k - np.mean(z) + power.ravel() @ z.ravel() / power.size
+        return np.array([dlam, dk])
+
+    @staticmethod
+    def _mle(x, params0):
+        """Maximum likelihood fit with the profile likelihood solver
+
+        See `uclass.statistics.fitting.fit_distribution`.
+        """
+        _, k0 = params0
+        return uclass.statistics.weibull_mle.fit_weibull_mle(x, k0=k0)
+
+    @staticmethod
+    def _mle_batch(list_x, params0):
+        """Maximum likelihood fits of many sets of samples at once
+
+        See `uclass.statistics.fitting.fit_distribution_batch`.
+        """
+        k0 = np.asarray(params0, dtype=float)[..., 1]
+        return uclass.statistics.weibull_mle.fit_weibull_batch(list_x, k0=k0)
+
+    def _neg_log_sf(self, x, out=None):
+        """(x/lam)**k"""
+        z = _log(x, out=out, shape=self._shape(x))
+        z -= np.log(self.lam)
+        z *= self.k
+        np.exp(z, out=z)
+        return z
+
     def quantile(self, percentile):
         """Quantile function
         
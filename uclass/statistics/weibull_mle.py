@@ -0,0 +1,601 @@
+"""Weibull maximum likelihood estimation
+
+Notes
+-----
+The Weibull log-likelihood can be profiled over the scale parameter.
+For a fixed shape parameter k, the maximum likelihood scale is
+`lam = mean(x**k)**(1/k)` and the shape parameter is the unique root of
+
+    g(k) = sum(x**k * log(x)) / sum(x**k) - 1/k - mean(log(x)).
+
+The first term is the mean of `log(x)` under the weights `x**k`,
+so g and its derivatives are weighted cumulants of `log(x)`,
+which are evaluated in log space to avoid overflow.
+"""
+import numpy as np
+import scipy.optimize
+
+import uclass.instrumentation
+
+
+DEGENERATE_MESSAGE = (
+    "All samples are equal, the shape parameter is unbounded.")
+
+
+def profile_score(k, logx, logx_max=None, weights=None):
+    """Score of the profile likelihood of the shape parameter
+
+    Parameters
+    ----------
+    k : float
+        Shape parameter.
+    logx : array
+        Logarithm of the samples.
+    logx_max : float, optional
+        Maximum of `logx`.
+        Computed if not specified.
+    weights : array, optional
+        Weights of the samples, e.g. from a quantile sketch.
+        Defaults None, i.e. equal weights.
+
+    Returns
+    -------
+    g : float
+        The profile likelihood score g(k).
+    dg : float
+        The first derivative of g(k).
+    d2g : float
+        The second derivative of g(k).
+    """
+    if logx_max is None:
+        logx_max = np.max(logx)
+    w = np.exp(k*(logx-logx_max))
+    if weights is not None:
+        w *= weights
+    w /= w.sum()
+    m1 = w @ logx
+    d = logx - m1
+    d2 = d * d
+    var = w @ d2
+    mu3 = w @ (d2*d)
+    g = m1 - 1/k - np.average(logx, weights=weights)
+    dg = var + 1/k**2
+    d2g = mu3 - 2/k**3
+    return g, dg, d2g
+
+
+def profile_scale(k, logx, logx_max=None, weights=None):
+    """Maximum likelihood scale parameter given the shape parameter
+
+    Parameters
+    ----------
+    k : float
+        Shape parameter.
+    logx : array
+        Logarithm of the samples.
+    logx_max : float, optional
+        Maximum of `logx`.
+        Computed if not specified.
+    weights : array, optional
+        Weights of the samples.
+        Defaults None, i.e. equal weights.
+
+    Returns
+    -------
+    lam : float
+        Scale parameter.
+    """
+    if logx_max is None:
+        logx_max = np.max(logx)
+    log_mean = np.log(
+        np.average(np.exp(k*(logx-logx_max)), weights=weights))
+    lam = np.exp(logx_max + log_mean/k)
+    return lam
+
+
+def fit_weibull_mle(x, k0=3.6, tol=1e-10, maxiter=100, weights=None):
+    """Fit a Weibull distribution by maximum likelihood
+
+    Parameters
+    ----------
+    x : array-like
+        Samples of the random variable. Must be positive.
+    k0 : float, optional
+        Initial guess of the shape parameter.
+        Defaults 3.6.
+    tol : float, optional
+        Relative tolerance of the shape parameter.
+        Defaults 1e-10.
+    maxiter : int, optional
+        Maximum number of Halley iterations.
+        Defaults 100.
+    weights : array-like, optional
+        Weights of the samples, e.g. the items of a quantile sketch.
+        Defaults None, i.e. equal weights.
+
+    Returns
+    -------
+    res : scipy.optimize.OptimizeResult
+        `res.x` is the array `[lam, k]`.
+        If all samples (of positive weight) are equal, the likelihood
+        has no maximum: `res.success` is False and `res.x` is
+        `[x, inf]`, the limit of the Weibull distributions.
+    """
+    x = np.asarray(x, dtype=float)
+    if x.size == 0:
+        raise ValueError("Cannot fit a Weibull distribution to no samples.")
+    if np.any(x <= 0):
+        raise ValueError("Weibull MLE requires positive samples.")
+
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != x.shape:
+            raise ValueError("weights must have the same shape as x.")
+    logx = np.log(x)
+    logx_max = logx.max()
+    x_support = x if weights is None else x[weights > 0]
+    if x_support.max() == x_support.min():
+        return scipy.optimize.OptimizeResult(
+            x=np.array([x_support.max(), np.inf]),
+            success=False, status=2, message=DEGENERATE_MESSAGE,
+            nit=0, nfev=0)
+
+    # g(k) is strictly increasing, so the root is kept bracketed
+    # and a bisection step is taken whenever Halley's step leaves it.
+    k = float(k0)
+    lower, upper = 0., np.inf
+    success = False
+    nit = 0
+    for nit in range(1, maxiter+1):
+        g, dg, d2g = profile_score(k, logx, logx_max, weights)
+        if g > 0:
+            upper = k
+        else:
+            lower = k
+        step = g / dg
+        denominator = 1 - 0.5*step*d2g/dg
+        if denominator > 0.5:
+            step /= denominator
+        if abs(step) <= tol*k:
+            k -= step
+            success = True
+            break
+        k_new = k - step
+        if not lower < k_new < upper:
+            if np.isinf(upper):
+                k_new = 2 * k
+            else:
+                k_new = 0.5 * (lower+upper)
+        k = k_new
+
+    lam = profile_scale(k, logx, logx_max, weights)
+    if success:
+        message = "Converged."
+    else:
+        message = "Maximum number of iterations reached."
+    res = scipy.optimize.OptimizeResult(
+        x=np.array([lam, k]), success=success, status=int(not success),
+        message=message, nit=nit, nfev=nit)
+    return res
+
+
+@uclass.instrumentation.timed("fit_weibull_batch")
+def fit_weibull_batch(list_x, k0=3.6, tol=1e-10, maxiter=100,
+                      block_size=65536, loop_size=4096):
+    """Fit Weibull distributions to many sets of samples at once
+
+    Parameters
+    ----------
+    list_x : list of array-like
+        Sets of samples of the random variables.
+        The sets may have different lengths.
+        All samples must be positive.
+    k0 : float or array-like, optional
+        Initial guess of the shape parameters.
+        Defaults 3.6.
+    tol : float, optional
+        Relative tolerance of the shape parameters.
+        Defaults 1e-10.
+    maxiter : int, optional
+        Maximum number of Halley iterations.
+        Defaults 100.
+    block_size : int, optional
+        Approximate number of samples fitted together.
+        Defaults 65536.
+    loop_size : int, optional
+        Sets of at least this many samples are fitted one by one
+        with `fit_weibull_mle`.
+        Defaults 4096.
+
+    Returns
+    -------
+    params : array
+        Array of shape (n_sets, 2). Each row is `[lam, k]`.
+    converged : array
+        Boolean array of shape (n_sets,).
+        False for sets whose samples are all equal,
+        whose parameters are `[x, inf]`, see `fit_weibull_mle`.
+
+    Notes
+    -----
+    The samples of consecutive sets are concatenated into flat blocks
+    of about `block_size` samples, small enough to stay in the CPU
+    cache, and indexed by offsets, so the profile likelihood equations
+    of the sets of a block are solved simultaneously with vectorized
+    Halley iterations. The sets are dropped from the iterations as
+    they converge.
+    Large sets gain nothing from the batching and are fitted one by one.
+    """
+    arrays = [np.asarray(x, dtype=float).ravel() for x in list_x]
+    n_sets = len(arrays)
+    if n_sets == 0:
+        return np.empty((0, 2)), np.empty(0, dtype=bool)
+    counts = np.array([len(x) for x in arrays])
+    if np.any(counts == 0):
+        raise ValueError("Cannot fit a Weibull distribution to no samples.")
+    k0 = np.broadcast_to(np.asarray(k0, dtype=float), (n_sets,))
+
+    params = np.empty((n_sets, 2))
+    converged = np.empty(n_sets, dtype=bool)
+    nit = 0
+    block = []
+    n_block = 0
+    for i, x in enumerate(arrays):
+        if len(x) >= loop_size:
+            res = fit_weibull_mle(x, k0=k0[i], tol=tol, maxiter=maxiter)
+            params[i] = res.x
+            converged[i] = res.success
+            nit = max(nit, res.nit)
+            continue
+        block.append(i)
+        n_block += len(x)
+        if n_block >= block_size:
+            params[block], converged[block], nit_block = _fit_weibull_block(
+                [arrays[j] for j in block], k0[block], tol, maxiter)
+            nit = max(nit, nit_block)
+            block = []
+            n_block = 0
+    if block:
+        params[block], converged[block], nit_block = _fit_weibull_block(
+            [arrays[j] for j in block], k0[block], tol, maxiter)
+        nit = max(nit, nit_block)
+    uclass.instrumentation.count("fit_weibull_batch_stages", n_sets)
+    uclass.instrumentation.count("fit_weibull_batch_nit", nit)
+    return params, converged
+
+
+def _fit_weibull_block(arrays, k0, tol, maxiter):
+    """Fit Weibull distributions to a block of sets of samples
+
+    Parameters
+    ----------
+    arrays : list of array
+        Sets of positive samples.
+    k0 : array
+        Initial guess of the shape parameters.
+    tol : float
+        Relative tolerance of the shape parameters.
+    maxiter : int
+        Maximum number of Halley iterations.
+
+    Returns
+    -------
+    params : array
+        Array of shape (n_sets, 2). Each row is `[lam, k]`.
+    converged : array
+        Boolean array of shape (n_sets,).
+    nit : int
+        Number of iterations.
+    """
+    n_sets = len(arrays)
+    counts = np.array([len(x) for x in arrays])
+    x = np.concatenate(arrays)
+    if np.any(x <= 0):
+        raise ValueError("Weibull MLE requires positive samples.")
+    logx = np.log(x)
+    offsets = np.zeros(n_sets, dtype=int)
+    offsets[1:] = np.cumsum(counts)[:-1]
+
+    def segment_sum(values, offsets=offsets):
+        """Sum of each set"""
+        return np.add.reduceat(values, offsets)
+
+    logx_max = np.maximum.reduceat(logx, offsets)
+    degenerate = logx_max == np.minimum.reduceat(logx, offsets)
+    logx_mean = segment_sum(logx) / counts
+    logx_shifted = logx - np.repeat(logx_max, counts)
+
+    k = k0.copy()
+    lower = np.zeros(n_sets)
+    upper = np.full(n_sets, np.inf)
+    # Degenerate sets are left out of the iterations.
+    converged = degenerate.copy()
+
+    # The iterations only run over the samples of the active sets,
+    # which are compacted as sets converge, so that the sets
+    # converging first are not recomputed until the slowest one has.
+    active = np.flatnonzero(~converged)
+    keep = np.repeat(~converged, counts)
+    counts_active = counts[active]
+    offsets_active = np.zeros(len(active), dtype=int)
+    offsets_active[1:] = np.cumsum(counts_active)[:-1]
+    shifted = logx_shifted[keep]
+    # The weighted cumulants are computed from raw moments of the
+    # log samples centered per set, which keeps them well conditioned.
+    centered = logx[keep] - np.repeat(logx_mean[active], counts_active)
+    w = np.empty_like(shifted)
+    wx = np.empty_like(shifted)
+    nit = 0
+    for nit in range(1, maxiter+1):
+        if not active.size:
+            break
+        k_active = k[active]
+        np.multiply(np.repeat(k_active, counts_active), shifted, out=w)
+        np.exp(w, out=w)
+        s0 = segment_sum(w, offsets_active)
+        np.multiply(w, centered, out=wx)
+        s1 = segment_sum(wx, offsets_active)
+        wx *= centered
+        s2 = segment_sum(wx, offsets_active)
+        wx *= centered
+        s3 = segment_sum(wx, offsets_active)
+        m1 = s1 / s0
+        var = s2/s0 - m1**2
+        mu3 = s3/s0 - 3*m1*s2/s0 + 2*m1**3
+        g = m1 - 1/k_active
+        dg = var + 1/k_active**2
+        d2g = mu3 - 2/k_active**3
+
+        converged_active = np.zeros(len(active), dtype=bool)
+        k[active], lower[active], upper[active] = _halley_step(
+            k_active, g, dg, d2g, lower[active], upper[active],
+            converged_active, tol)
+        if converged_active.any():
+            converged[active] = converged_active
+            keep = np.repeat(~converged_active, counts_active)
+            active = active[~converged_active]
+            counts_active = counts_active[~converged_active]
+            offsets_active = np.zeros(len(active), dtype=int)
+            offsets_active[1:] = np.cumsum(counts_active)[:-1]
+            shifted = shifted[keep]
+            centered = centered[keep]
+            w = w[:len(shifted)]
+            wx = wx[:len(shifted)]
+
+    w = np.exp(np.repeat(k, counts)*logx_shifted)
+    log_mean = np.log(segment_sum(w)/counts)
+    lam = np.exp(logx_max + log_mean/k)
+    params = np.column_stack([lam, k])
+    params[degenerate] = np.column_stack(
+        [np.maximum.reduceat(x, offsets)[degenerate],
+         np.full(degenerate.sum(), np.inf)])
+    converged[degenerate] = False
+    return params, converged, nit
+
+
+def fit_weibull_weighted(x, weights, k0=3.6, tol=1e-10, maxiter=100,
+                         order=None):
+    """Fit Weibull distributions to many weightings of the same samples
+
+    Parameters
+    ----------
+    x : array-like
+        Samples of the random variable, shape (n,).
+        All samples must be positive.
+    weights : array-like
+        Weights of the samples, shape (n_sets, n),
+        e.g. the counts of bootstrap resamples.
+    k0 : float or array-like, optional
+        Initial guess of the shape parameters.
+        Defaults 3.6.
+    tol : float, optional
+        Relative tolerance of the shape parameters.
+        Defaults 1e-10.
+    maxiter : int, optional
+        Maximum number of Halley iterations.
+        Defaults 100.
+    order : int, optional
+        If specified, the power sums are expanded to this order
+        around the scalar `k0` and computed once,
+        see `uclass.hhf_methods.online_weibull5.OnlineWeibull5`.
+        Sets whose shape parameter moves too far from `k0` for the
+        expansion to be accurate are refitted without it.
+        Use when all sets are close, e.g. bootstrap resamples with `k0`
+        fitted to the original samples.
+        Defaults None.
+
+    Returns
+    -------
+    params : array
+        Array of shape (n_sets, 2). Each row is `[lam, k]`.
+    converged : array
+        Boolean array of shape (n_sets,).
+        False for sets whose samples of positive weight are all equal,
+        whose parameters are `[x, inf]`, see `fit_weibull_mle`.
+
+    Notes
+    -----
+    Since the sets share the samples, the weighted power sums of all
+    sets are a single matrix product per iteration,
+    `(weights * x**k) @ [1, log(x), log(x)**2, log(x)**3]`,
+    or a single matrix product in total with `order`.
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if x.size == 0:
+        raise ValueError("Cannot fit a Weibull distribution to no samples.")
+    if np.any(x <= 0):
+        raise ValueError("Weibull MLE requires positive samples.")
+    if weights.shape[1] != x.size:
+        raise ValueError("weights must have one column per sample.")
+    n_sets = len(weights)
+
+    logx = np.log(x)
+    logx_max = logx.max()
+    logx_shifted = logx - logx_max
+    logx_centered = logx - logx.mean()
+    powers = np.column_stack([
+        np.ones_like(logx), logx_centered, logx_centered**2,
+        logx_centered**3])
+    total = weights.sum(axis=1)
+    mean_centered = weights @ logx_centered / total
+    support = weights > 0
+    support_max = np.where(support, logx, -np.inf).max(axis=1)
+    degenerate = support_max == np.where(support, logx, np.inf).min(axis=1)
+    if order is not None:
+        params, converged = _fit_weibull_weighted_expanded(
+            x, weights, float(k0), tol, maxiter, order, logx_max,
+            logx_shifted, logx_centered, total, mean_centered, degenerate)
+    else:
+        params, converged = _fit_weibull_weighted_exact(
+            weights, k0, tol, maxiter, logx_max, logx_shifted, powers,
+            total, mean_centered, degenerate)
+    params[degenerate] = np.column_stack(
+        [np.where(support, x, -np.inf).max(axis=1)[degenerate],
+         np.full(degenerate.sum(), np.inf)])
+    converged[degenerate] = False
+    return params, converged
+
+
+def _fit_weibull_weighted_exact(weights, k0, tol, maxiter, logx_max,
+                                logx_shifted, powers, total, mean_centered,
+                                degenerate):
+    """fit_weibull_weighted with exact power sums"""
+    n_sets = len(weights)
+    w = np.empty_like(weights)
+
+    k = np.broadcast_to(np.asarray(k0, dtype=float), (n_sets,)).copy()
+    lower = np.zeros(n_sets)
+    upper = np.full(n_sets, np.inf)
+    # Degenerate sets are left out of the iterations.
+    converged = degenerate.copy()
+    for _ in range(maxiter):
+        np.multiply(k[:, np.newaxis], logx_shifted, out=w)
+        np.exp(w, out=w)
+        w *= weights
+        s0, s1, s2, s3 = (w @ powers).T
+        m1 = s1 / s0
+        var = s2/s0 - m1**2
+        mu3 = s3/s0 - 3*m1*s2/s0 + 2*m1**3
+        g = m1 - 1/k - mean_centered
+        dg = var + 1/k**2
+        d2g = mu3 - 2/k**3
+
+        k, lower, upper = _halley_step(
+            k, g, dg, d2g, lower, upper, converged, tol)
+        if converged.all():
+            break
+
+    np.multiply(k[:, np.newaxis], logx_shifted, out=w)
+    np.exp(w, out=w)
+    w *= weights
+    log_mean = np.log(w.sum(axis=1)/total)
+    lam = np.exp(logx_max + log_mean/k)
+    params = np.column_stack([lam, k])
+    return params, converged
+
+
+def _fit_weibull_weighted_expanded(x, weights, k_ref, tol, maxiter, order,
+                                   logx_max, logx_shifted, logx_centered,
+                                   total, mean_centered, degenerate):
+    """fit_weibull_weighted with power sums expanded around k_ref"""
+    n_sets = len(weights)
+    # S_m = sum(weights * x**k_ref * c**m), with c the centered log(x)
+    # and x relative to its maximum.
+    shift = logx_centered[0] - logx_shifted[0]  # max(log(x)) - mean
+    base = np.exp(k_ref*logx_shifted)
+    powers = np.empty((len(x), order+4))
+    powers[:, 0] = base
+    for m in range(1, order+4):
+        powers[:, m] = powers[:, m-1] * logx_centered
+    power_sums = weights @ powers
+    dmax = np.max(np.abs(logx_centered))
+    factorials = np.cumprod(np.arange(1., order+1))
+
+    k = np.full(n_sets, k_ref)
+    lower = np.zeros(n_sets)
+    upper = np.full(n_sets, np.inf)
+    converged = degenerate.copy()
+    accurate = np.ones(n_sets, dtype=bool)
+
+    def expand(k):
+        """A_j(k), j = 0...3, of each set"""
+        delta = (k - k_ref)[:, np.newaxis]
+        coefficients = np.ones((n_sets, order+1))
+        coefficients[:, 1:] = delta**np.arange(1, order+1) / factorials
+        return [
+            np.einsum("ij,ij->i", coefficients, power_sums[:, j:j+order+1])
+            for j in range(4)]
+
+    for _ in range(maxiter):
+        a0, a1, a2, a3 = expand(k)
+        m1 = a1 / a0
+        var = a2/a0 - m1**2
+        mu3 = a3/a0 - 3*m1*a2/a0 + 2*m1**3
+        g = m1 - 1/k - mean_centered
+        dg = var + 1/k**2
+        d2g = mu3 - 2/k**3
+        k_new, lower, upper = _halley_step(
+            k, g, dg, d2g, lower, upper, converged, tol)
+        # The remainder is bounded by
+        # (|k-k_ref|*max|c|)**(order+1) / (order+1)!.
+        error = ((np.abs(k_new-k_ref)*dmax)**(order+1)
+                 / (factorials[-1]*(order+1)))
+        accurate &= error <= 1e-13
+        converged |= ~accurate
+        k = np.where(accurate, k_new, k)
+        if converged.all():
+            break
+    converged &= accurate
+
+    # The expansion is in c = log(x/max(x)) + shift.
+    a0, _, _, _ = expand(k)
+    log_mean = np.log(a0/total) - (k-k_ref)*shift
+    lam = np.exp(logx_max + log_mean/k)
+    params = np.column_stack([lam, k])
+    if not accurate.all():
+        params[~accurate], converged[~accurate] = fit_weibull_weighted(
+            x, weights[~accurate], k0=k_ref, tol=tol, maxiter=maxiter)
+    converged[degenerate] = False
+    return params, converged
+
+
+def _halley_step(k, g, dg, d2g, lower, upper, converged, tol):
+    """Safeguarded Halley step of many shape parameters
+
+    Parameters
+    ----------
+    k : array
+        Shape parameters.
+    g, dg, d2g : array
+        Profile likelihood scores and their derivatives.
+    lower, upper : array
+        Brackets of the roots.
+    converged : array
+        Whether each shape parameter has converged.
+        Updated in place.
+    tol : float
+        Relative tolerance of the shape parameters.
+
+    Returns
+    -------
+    k : array
+        The updated shape parameters.
+    lower, upper : array
+        The updated brackets.
+    """
+    upper = np.where(g > 0, k, upper)
+    lower = np.where(g > 0, lower, k)
+    step = g / dg
+    denominator = 1 - 0.5*step*d2g/dg
+    step = np.divide(step, denominator, out=step, where=denominator > 0.5)
+    step = np.where(converged, 0, step)
+    small = np.abs(step) <= tol*k
+    k_new = k - step
+    outside = ~small & ((k_new <= lower) | (k_new >= upper))
+    k_new = np.where(
+        outside,
+        np.where(np.isinf(upper), 2*k, 0.5*(lower+upper)),
+        k_new)
+    converged |= small
+    return k_new, lower, upper